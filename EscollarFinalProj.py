@@ -1,27 +1,701 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, simpledialog, ttk
 import mysql.connector
+import heapq
+import os
+import queue
+import string
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+try:
+    import numpy as np   # optional: only the demand forecast needs it
+except ImportError:
+    np = None
+
+# Booking logic shared with booking_api.py
+from hotel_core import (
+    PAYMENT_CURRENCY, PAYMENT_GATEWAYS, PAYMENT_METHODS, PROPERTIES, RESERVATION_COLUMNS, RESERVATION_COPY_COLUMNS,
+    RESERVATION_JOINS, RESERVATION_LIST_SQL, RESERVATION_SEARCH_SQL, ROOMS_SQL, UPSERT_GUEST_SQL, BookingError, Guest,
+    PaymentResult, Reservation, Room, Service, book_steps, cancel_steps, fill_from_waitlist_steps, payment_key,
+    place_unassigned_steps, plan_room_assignments, restore_payments_steps, room_schedule_steps, run_steps,
+    validate_phone_number
+)
 
 print(sys.prefix)
 
+# ---------- Schema migrations ----------
+# Each entry is (version, description, statements). ensure_schema() applies the
+# ones not yet recorded in `schema_migrations`, in order, on startup.
+SCHEMA_MIGRATIONS = [
+    (1, "base tables", [
+        """CREATE TABLE IF NOT EXISTS rooms (
+               room_id INT AUTO_INCREMENT PRIMARY KEY,
+               room_type VARCHAR(100) NOT NULL UNIQUE,
+               price DECIMAL(10,2) NOT NULL DEFAULT 0,
+               available INT NOT NULL DEFAULT 0
+           ) ENGINE=InnoDB""",
+        """CREATE TABLE IF NOT EXISTS services (
+               service_id INT AUTO_INCREMENT PRIMARY KEY,
+               name VARCHAR(100) NOT NULL UNIQUE,
+               price DECIMAL(10,2) NOT NULL DEFAULT 0
+           ) ENGINE=InnoDB""",
+        """CREATE TABLE IF NOT EXISTS guests (
+               guest_id INT AUTO_INCREMENT PRIMARY KEY,
+               name VARCHAR(150) NOT NULL,
+               phone VARCHAR(20) NOT NULL
+           ) ENGINE=InnoDB""",
+        """CREATE TABLE IF NOT EXISTS reservations (
+               reservation_id INT AUTO_INCREMENT PRIMARY KEY,
+               guest_id INT NULL,
+               room_id INT NULL,
+               nights INT NOT NULL,
+               services VARCHAR(255) NOT NULL DEFAULT '',
+               total DECIMAL(10,2) NOT NULL DEFAULT 0,
+               payment VARCHAR(50),
+               created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+           ) ENGINE=InnoDB""",
+    ]),
+    (2, "indexes and foreign keys for listing and search", [
+        # listing: ORDER BY created_at DESC LIMIT n, carrying the join keys
+        "ALTER TABLE reservations ADD INDEX idx_res_listing (created_at, guest_id, room_id)",
+        "ALTER TABLE reservations ADD INDEX idx_res_guest (guest_id)",
+        "ALTER TABLE reservations ADD INDEX idx_res_room (room_id)",
+        # search: LIKE '%q%' cannot seek, but a covering index keeps it off the table rows
+        "ALTER TABLE guests ADD INDEX idx_guests_name_phone (name, phone)",
+        "ALTER TABLE guests ADD INDEX idx_guests_phone (phone)",
+        # rows left pointing at deleted guests/rooms would make ADD CONSTRAINT fail
+        # (errno 1452); clear them the way ON DELETE SET NULL would have
+        """UPDATE reservations r LEFT JOIN guests g ON r.guest_id = g.guest_id
+           SET r.guest_id = NULL
+           WHERE r.guest_id IS NOT NULL AND g.guest_id IS NULL""",
+        """UPDATE reservations r LEFT JOIN rooms rm ON r.room_id = rm.room_id
+           SET r.room_id = NULL
+           WHERE r.room_id IS NOT NULL AND rm.room_id IS NULL""",
+        """ALTER TABLE reservations ADD CONSTRAINT fk_res_guest
+               FOREIGN KEY (guest_id) REFERENCES guests (guest_id) ON DELETE SET NULL""",
+        """ALTER TABLE reservations ADD CONSTRAINT fk_res_room
+               FOREIGN KEY (room_id) REFERENCES rooms (room_id) ON DELETE SET NULL""",
+    ]),
+    (3, "one guest per normalized phone", [
+        # same normalization as validate_phone_number()
+        "UPDATE guests SET phone = REPLACE(REPLACE(REPLACE(phone, '-', ''), ' ', ''), '+', '')",
+        # repoint reservations of duplicate guests to the oldest row for that phone
+        """UPDATE reservations r
+               JOIN guests g ON r.guest_id = g.guest_id
+               JOIN (SELECT phone, MIN(guest_id) AS keep_id FROM guests GROUP BY phone) k ON k.phone = g.phone
+           SET r.guest_id = k.keep_id
+           WHERE r.guest_id <> k.keep_id""",
+        """DELETE g FROM guests g
+               JOIN (SELECT phone, MIN(guest_id) AS keep_id FROM guests GROUP BY phone) k ON k.phone = g.phone
+           WHERE g.guest_id <> k.keep_id""",
+        "ALTER TABLE guests DROP INDEX idx_guests_phone",
+        "ALTER TABLE guests ADD UNIQUE INDEX uq_guests_phone (phone)",
+    ]),
+    (4, "archive table for completed stays", [
+        "CREATE TABLE IF NOT EXISTS reservations_archive LIKE reservations",
+        """ALTER TABLE reservations_archive
+               ADD COLUMN archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP""",
+    ]),
+    (5, "soft-deleted reservations for undo", [
+        "CREATE TABLE IF NOT EXISTS reservations_cancelled LIKE reservations",
+        """ALTER TABLE reservations_cancelled
+               ADD COLUMN cancelled_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP""",
+    ]),
+    (6, "inventory holds during checkout", [
+        """CREATE TABLE IF NOT EXISTS inventory_holds (
+               hold_id INT AUTO_INCREMENT PRIMARY KEY,
+               room_id INT NOT NULL,
+               expires_at DATETIME NOT NULL,
+               created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+               INDEX idx_holds_room_expiry (room_id, expires_at),
+               INDEX idx_holds_expiry (expires_at),
+               CONSTRAINT fk_holds_room FOREIGN KEY (room_id) REFERENCES rooms (room_id) ON DELETE CASCADE
+           ) ENGINE=InnoDB""",
+    ]),
+    (7, "waitlist per room type", [
+        # idx_waitlist_queue returns the next entries for a room type in priority order
+        # without sorting, however long the queue gets
+        """CREATE TABLE IF NOT EXISTS waitlist (
+               entry_id INT AUTO_INCREMENT PRIMARY KEY,
+               room_id INT NOT NULL,
+               guest_id INT NULL,
+               nights INT NOT NULL,
+               services VARCHAR(255) NOT NULL DEFAULT '',
+               total DECIMAL(10,2) NOT NULL DEFAULT 0,
+               priority INT NOT NULL DEFAULT 0,
+               status VARCHAR(16) NOT NULL DEFAULT 'waiting',
+               reservation_id INT NULL,
+               created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+               INDEX idx_waitlist_queue (room_id, status, priority DESC, entry_id),
+               CONSTRAINT fk_waitlist_room FOREIGN KEY (room_id) REFERENCES rooms (room_id) ON DELETE CASCADE,
+               CONSTRAINT fk_waitlist_guest FOREIGN KEY (guest_id) REFERENCES guests (guest_id) ON DELETE SET NULL
+           ) ENGINE=InnoDB""",
+    ]),
+    (8, "physical room units", [
+        """CREATE TABLE IF NOT EXISTS room_units (
+               unit_id INT AUTO_INCREMENT PRIMARY KEY,
+               room_id INT NOT NULL,
+               room_number VARCHAR(20) NOT NULL UNIQUE,
+               INDEX idx_units_room (room_id),
+               CONSTRAINT fk_units_room FOREIGN KEY (room_id) REFERENCES rooms (room_id) ON DELETE CASCADE
+           ) ENGINE=InnoDB""",
+        "ALTER TABLE reservations ADD COLUMN unit_id INT NULL",
+        """ALTER TABLE reservations ADD CONSTRAINT fk_res_unit
+               FOREIGN KEY (unit_id) REFERENCES room_units (unit_id) ON DELETE SET NULL""",
+        # archived/cancelled copies keep the column so the listing SQL works on them too
+        "ALTER TABLE reservations_archive ADD COLUMN unit_id INT NULL",
+        "ALTER TABLE reservations_cancelled ADD COLUMN unit_id INT NULL",
+    ]),
+    (9, "gateway payments and settlement batches", [
+        """CREATE TABLE IF NOT EXISTS settlements (
+               settlement_id INT AUTO_INCREMENT PRIMARY KEY,
+               gateway VARCHAR(32) NOT NULL,
+               status VARCHAR(16) NOT NULL DEFAULT 'open',
+               batch_ref VARCHAR(64) NULL,
+               payment_count INT NOT NULL DEFAULT 0,
+               amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+               created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+               INDEX idx_settlements_status (status, created_at)
+           ) ENGINE=InnoDB""",
+        # no FK to reservations: the row outlives it in reservations_archive/_cancelled
+        """CREATE TABLE IF NOT EXISTS payments (
+               payment_id INT AUTO_INCREMENT PRIMARY KEY,
+               reservation_id INT NOT NULL,
+               method VARCHAR(32) NOT NULL,
+               gateway VARCHAR(32) NOT NULL,
+               amount DECIMAL(10,2) NOT NULL,
+               currency CHAR(3) NOT NULL DEFAULT 'PHP',
+               status VARCHAR(16) NOT NULL DEFAULT 'pending',
+               idempotency_key VARCHAR(80) NOT NULL UNIQUE,
+               attempts INT NOT NULL DEFAULT 0,
+               next_attempt_at DATETIME NULL,
+               auth_code VARCHAR(64) NULL,
+               last_error VARCHAR(255) NULL,
+               settlement_id INT NULL,
+               created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+               updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+               INDEX idx_payments_queue (status, next_attempt_at),
+               INDEX idx_payments_res (reservation_id),
+               INDEX idx_payments_settlement (settlement_id),
+               CONSTRAINT fk_payments_settlement FOREIGN KEY (settlement_id) REFERENCES settlements (settlement_id)
+           ) ENGINE=InnoDB""",
+    ]),
+]
+
+# MySQL errors meaning "this DDL is already in place" (dup column/key/FK, missing
+# key on drop) so migrations also run cleanly on hand-made phpMyAdmin schemas.
+MIGRATION_IGNORABLE_ERRORS = {1022, 1060, 1061, 1091, 1826}
+
+# Most recent reservations shown in the staff list; older ones are reached via search.
+RESERVATION_LIST_LIMIT = 500
+
+# Same queries against the archive, used only when staff ask for archived rows
+ARCHIVE_LIST_SQL = RESERVATION_LIST_SQL.replace("FROM reservations r", "FROM reservations_archive r")
+ARCHIVE_SEARCH_SQL = RESERVATION_SEARCH_SQL.replace("FROM reservations r", "FROM reservations_archive r")
+
+# Archival: stays that ended more than ARCHIVE_AFTER_DAYS ago leave the hot table,
+# moved ARCHIVE_BATCH_SIZE rows per transaction, every ARCHIVE_INTERVAL_MS.
+# Check-in is the booking date, so a stay ends at DATE(created_at) + nights.
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_INTERVAL_MS = 6 * 60 * 60 * 1000
+
+# Inventory holds: a room picked in Room Selection is held this long, renewed on
+# every later checkout screen; this session's expired holds are reaped every
+# HOLD_REAP_INTERVAL_MS.
+HOLD_TTL_SECONDS = 10 * 60
+HOLD_REAP_INTERVAL_MS = 30 * 1000
+
+WAITLIST_SQL = """
+    SELECT w.entry_id, g.name, g.phone, rm.room_type, w.nights, w.priority, w.created_at
+    FROM waitlist w
+    LEFT JOIN guests g ON w.guest_id = g.guest_id
+    JOIN rooms rm ON w.room_id = rm.room_id
+    WHERE w.status = 'waiting'
+    ORDER BY rm.room_type, w.priority DESC, w.entry_id
+"""
+
+# Upper bound on parallel connections when a search fans out across properties
+PROPERTY_FANOUT_WORKERS = 8
+
+# Database outage handling
+DB_CONNECT_TIMEOUT_SECONDS = 5     # unless a db_config sets connection_timeout
+CIRCUIT_FAILURE_THRESHOLD = 2      # consecutive connection failures that open the breaker
+CIRCUIT_PROBE_BASE_MS = 2000       # first background reconnect attempt after opening
+CIRCUIT_PROBE_MAX_MS = 60 * 1000   # probe backoff doubles up to this
+CIRCUIT_POLL_MS = 250             # how soon the main loop picks up a breaker opened by a worker thread
+
+# Read replicas (see "replicas" in HotelReservation.properties)
+REPLICA_MAX_LAG_SECONDS = 5      # replicas further behind than this are skipped
+REPLICA_LAG_CHECK_SECONDS = 10   # how long a measured lag is trusted
+REPLICA_RETRY_SECONDS = 30       # how long an unreachable replica is skipped
+REPLICA_STICKY_SECONDS = 2       # margin on top of lag before our own writes count as replicated
+
+# Gateway payments: authorized in the background after booking, captured in settlement runs
+PAYMENT_POLL_MS = 5 * 1000
+PAYMENT_SETTLE_INTERVAL_MS = 15 * 60 * 1000
+PAYMENT_WORKERS = 8
+PAYMENT_CLAIM_LIMIT = 50          # authorizations started per property per poll
+PAYMENT_SETTLE_BATCH = 200        # captures per settlement batch
+PAYMENT_MAX_ATTEMPTS = 5
+PAYMENT_RETRY_BASE_SECONDS = 10   # doubles per failed attempt
+PAYMENT_STALE_SECONDS = 300       # in-flight rows older than this are resumed after a crash
+
+# Rooms per type: numbered units where they exist, otherwise free units plus current reservations
+ROOM_CAPACITY_SQL = """
+    SELECT rm.room_id, rm.room_type,
+           COALESCE(NULLIF((SELECT COUNT(*) FROM room_units u WHERE u.room_id = rm.room_id), 0),
+                    rm.available + (SELECT COUNT(*) FROM reservations r WHERE r.room_id = rm.room_id))
+    FROM rooms rm
+    ORDER BY rm.room_id
+"""
+
+# Hot queries checked by explain_hot_queries() and `python EscollarFinalProj.py --check-indexes`:
+# name -> (sql, sample params, aliases that must be read through an index,
+#          aliases whose full index scan is the intended plan, filesort allowed)
+HOT_QUERIES = {
+    # idx_res_listing is walked newest first and the scan stops at the LIMIT
+    "listing": (RESERVATION_LIST_SQL, (RESERVATION_LIST_LIMIT,), {"r", "g"}, {"r"}, False),
+    # '%q%' cannot seek, so scanning the covering idx_guests_name_phone is the plan
+    "search": (RESERVATION_SEARCH_SQL, ("%a%", "%a%"), {"r", "g"}, {"g"}, True),
+}
+
+def plan_problems(query_name, plan, indexed_aliases, index_scan_aliases=(), allow_filesort=False):
+    """
+    Problems in one EXPLAIN result (rows as dicts): a full table scan ('ALL') or a
+    full index scan ('index') on one of indexed_aliases, unless that alias is in
+    index_scan_aliases, and a filesort unless allowed.
+    """
+    problems = []
+    for step in plan:
+        alias = step.get('table')
+        access = (step.get('type') or '').upper()
+        extra = step.get('Extra') or ''
+        if alias in indexed_aliases:
+            if access == 'ALL':
+                problems.append(f"{query_name}: full scan on '{alias}' (rows≈{step.get('rows')})")
+            elif access == 'INDEX' and alias not in index_scan_aliases:
+                problems.append(f"{query_name}: full index scan on '{alias}' using {step.get('key')} (rows≈{step.get('rows')})")
+        if not allow_filesort and 'filesort' in extra:
+            problems.append(f"{query_name}: filesort on '{alias}' ({extra})")
+    return problems
+
+def check_hot_queries(cursor):
+    """EXPLAIN every HOT_QUERIES entry on a dictionary cursor; returns the problem strings."""
+    problems = []
+    for query_name, (sql, params, indexed_aliases, index_scan_aliases, allow_filesort) in HOT_QUERIES.items():
+        cursor.execute("EXPLAIN " + sql, params)
+        problems.extend(plan_problems(query_name, cursor.fetchall(), indexed_aliases, index_scan_aliases, allow_filesort))
+    return problems
+
+# ---------- Occupancy calendar ----------
+OCCUPANCY_PAST_DAYS = 30          # calendar starts this many nights before today
+OCCUPANCY_DAYS = 365
+OCCUPANCY_CELL_WIDTH = 14         # px per night at the default zoom
+OCCUPANCY_MIN_CELL_WIDTH = 3      # a whole year fits on screen
+OCCUPANCY_MAX_CELL_WIDTH = 48
+OCCUPANCY_ROW_HEIGHT = 28
+OCCUPANCY_LABEL_WIDTH = 150
+OCCUPANCY_HEADER_HEIGHT = 40
+OCCUPANCY_REFRESH_MS = 30 * 1000
+OCCUPANCY_STAYS_SQL = """
+    SELECT room_id, DATE(created_at), nights FROM {table}
+    WHERE room_id IS NOT NULL
+      AND created_at < %s
+      AND DATE(created_at) + INTERVAL nights DAY > %s
+"""
+
+def build_occupancy_grid(stays, room_ids, first_ordinal, days):
+    """
+    Rooms occupied per night: {room_id: [count for each of the days from first_ordinal]}
+    from (room_id, check_in date, nights) stays, via a difference array per room type.
+    """
+    diffs = {room_id: [0] * (days + 1) for room_id in room_ids}
+    for room_id, check_in, nights in stays:
+        row = diffs.get(room_id)
+        if row is None:
+            continue
+        start = check_in.toordinal() - first_ordinal
+        end = min(start + int(nights), days)
+        start = max(start, 0)
+        if start < end:
+            row[start] += 1
+            row[end] -= 1
+    return {room_id: list(accumulate(row[:days])) for room_id, row in diffs.items()}
+
+def _blend(color_a, color_b, t):
+    a = [int(color_a[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(color_b[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(a, b))
+
+# empty -> half full -> full; overbooked nights get their own colour
+OCCUPANCY_PALETTE = ([_blend('#EAF7EE', '#F7DC6F', i / 10) for i in range(11)] +
+                     [_blend('#F7DC6F', '#E74C3C', i / 10) for i in range(1, 11)])
+OCCUPANCY_OVERBOOKED_COLOR = '#6C3483'
+
+def occupancy_color(count, capacity):
+    if capacity <= 0:
+        return OCCUPANCY_PALETTE[-1] if count else OCCUPANCY_PALETTE[0]
+    if count > capacity:
+        return OCCUPANCY_OVERBOOKED_COLOR
+    return OCCUPANCY_PALETTE[round(count / capacity * (len(OCCUPANCY_PALETTE) - 1))]
+
+# ---------- Circuit breaker ----------
+class CircuitBreaker:
+    """
+    Connection health of one property's primary database. Closed: connect normally.
+    Open (after CIRCUIT_FAILURE_THRESHOLD failures in a row): callers fail fast
+    until a background probe succeeds. Safe to update from worker threads.
+    """
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD):
+        self.threshold = threshold
+        self.failures = 0
+        self.is_open = False
+        self.last_error = None
+        self.probe_delay_ms = CIRCUIT_PROBE_BASE_MS
+        self.lock = threading.Lock()
+
+    def allow(self):
+        return not self.is_open
+
+    def record_success(self):
+        """Close the breaker. Returns True if it was open."""
+        with self.lock:
+            was_open = self.is_open
+            self.failures = 0
+            self.is_open = False
+            self.probe_delay_ms = CIRCUIT_PROBE_BASE_MS
+            return was_open
+
+    def record_failure(self, error):
+        """Count a failed connection. Returns True if this failure opened the breaker."""
+        with self.lock:
+            self.failures += 1
+            self.last_error = error
+            if not self.is_open and self.failures >= self.threshold:
+                self.is_open = True
+                return True
+            return False
+
+    def next_probe_delay(self):
+        """Delay before the next probe; each call doubles the following one."""
+        with self.lock:
+            delay = self.probe_delay_ms
+            self.probe_delay_ms = min(delay * 2, CIRCUIT_PROBE_MAX_MS)
+            return delay
+
+# ---------- Night audit ----------
+AUDIT_HOUR = 3                 # local hour the nightly audit runs
+AUDIT_REPAIR_NIGHTLY = False   # report only; set True to let the nightly run fix counter drift
+AUDIT_CHUNK_SIZE = 100000      # reservation/guest id range per scan
+AUDIT_WORKERS = min(8, os.cpu_count() or 1)
+AUDIT_TABLES = ("reservations", "reservations_archive", "reservations_cancelled")
+
+# per room_id in one id range: rows, rows whose room is gone, rows whose guest is gone
+AUDIT_RESERVATION_CHUNK_SQL = """
+    SELECT r.room_id, COUNT(*),
+           SUM(r.room_id IS NOT NULL AND rm.room_id IS NULL),
+           SUM(r.guest_id IS NOT NULL AND g.guest_id IS NULL)
+    FROM {table} r
+    LEFT JOIN rooms rm ON r.room_id = rm.room_id
+    LEFT JOIN guests g ON r.guest_id = g.guest_id
+    WHERE r.reservation_id >= %s AND r.reservation_id < %s
+    GROUP BY r.room_id
+"""
+
+AUDIT_ORPHAN_GUEST_CHUNK_SQL = """
+    SELECT COUNT(*) FROM guests g
+    WHERE g.guest_id >= %s AND g.guest_id < %s
+      AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.guest_id = g.guest_id)
+      AND NOT EXISTS (SELECT 1 FROM reservations_archive r WHERE r.guest_id = g.guest_id)
+      AND NOT EXISTS (SELECT 1 FROM reservations_cancelled r WHERE r.guest_id = g.guest_id)
+      AND NOT EXISTS (SELECT 1 FROM waitlist w WHERE w.guest_id = g.guest_id)
+"""
+
+# ---------- Demand forecasting ----------
+FORECAST_HORIZON_DAYS = 90
+FORECAST_FETCH_SIZE = 5000
+FORECAST_LEVEL_DAYS = 28     # recent window that sets the booking pace
+FORECAST_MAX_STAY = 60       # longer stays share the last length-of-stay bucket
+FORECAST_SEASON_CLIP = (0.25, 4.0)
+FORECAST_STAY_COLUMNS = "reservation_id, room_id, DATE(created_at), nights, total"
+
+class DemandForecaster:
+    """
+    Daily arrivals, occupancy and revenue per room type in NumPy arrays, fed
+    incrementally from reservation rows. Projections combine the recent booking
+    pace with weekday and same-week-last-year seasonality, spread over future
+    nights by the observed length-of-stay mix, on top of stays already booked.
+    """
+    def __init__(self):
+        self.room_index = {}        # room_id -> array row
+        self.origin = None          # date ordinal of column 0
+        self.arrivals = np.zeros((0, 0))
+        self.revenue = np.zeros((0, 0))
+        self.occupancy_diff = np.zeros((0, 0))
+        self.los = np.zeros((0, FORECAST_MAX_STAY + 1))
+        # sync watermarks, see HotelReservation.refresh_forecast()
+        self.last_reservation_id = 0
+        self.synced_at = None
+
+    def _ensure_rows(self, room_ids):
+        added = 0
+        for room_id in room_ids:
+            if room_id not in self.room_index:
+                self.room_index[room_id] = len(self.room_index)
+                added += 1
+        if added:
+            pad = ((0, added), (0, 0))
+            self.arrivals = np.pad(self.arrivals, pad)
+            self.revenue = np.pad(self.revenue, pad)
+            self.occupancy_diff = np.pad(self.occupancy_diff, pad)
+            self.los = np.pad(self.los, pad)
+
+    def _ensure_days(self, first, last):
+        """Grow the day axis to cover ordinals first..last (inclusive)."""
+        if self.origin is None:
+            self.origin = first
+        before = max(0, self.origin - first)
+        after = max(0, last - (self.origin + self.arrivals.shape[1] - 1))
+        if before or after:
+            pad = ((0, 0), (before, after))
+            self.arrivals = np.pad(self.arrivals, pad)
+            self.revenue = np.pad(self.revenue, pad)
+            self.occupancy_diff = np.pad(self.occupancy_diff, pad)
+            self.origin -= before
+
+    def ingest(self, rows, sign=1):
+        """Add (sign=1) or remove (sign=-1) rows of (reservation_id, room_id, check_in, nights, total)."""
+        if not rows:
+            return
+        self._ensure_rows({row[1] for row in rows})
+        count = len(rows)
+        res_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        index = np.fromiter((self.room_index[row[1]] for row in rows), dtype=np.int64, count=count)
+        starts = np.fromiter((row[2].toordinal() for row in rows), dtype=np.int64, count=count)
+        nights = np.fromiter((max(1, int(row[3] or 1)) for row in rows), dtype=np.int64, count=count)
+        totals = np.fromiter((float(row[4] or 0) for row in rows), dtype=np.float64, count=count)
+        self._ensure_days(int(starts.min()), int((starts + nights).max()) + FORECAST_HORIZON_DAYS)
+        cols = starts - self.origin
+        np.add.at(self.arrivals, (index, cols), sign)
+        np.add.at(self.revenue, (index, cols), sign * totals)
+        np.add.at(self.occupancy_diff, (index, cols), sign)
+        np.add.at(self.occupancy_diff, (index, cols + nights), -sign)
+        np.add.at(self.los, (index, np.minimum(nights, FORECAST_MAX_STAY)), sign)
+        if sign > 0:
+            self.last_reservation_id = max(self.last_reservation_id, int(res_ids.max()))
+
+    def project(self, today, horizon=FORECAST_HORIZON_DAYS):
+        """
+        Forecast the next horizon nights from today (a date ordinal).
+        Returns {room_id: (occupied_rooms, revenue)} as float arrays of length horizon.
+        """
+        if self.origin is None or not self.room_index:
+            return {}
+        self._ensure_days(today, today + horizon + FORECAST_MAX_STAY)
+        t = today - self.origin
+        occupancy = np.cumsum(self.occupancy_diff, axis=1)
+        hist = self.arrivals[:, :t]
+        days_seen = hist.shape[1]
+        if days_seen == 0:
+            level = np.zeros(len(self.room_index))
+            weekday_factor = np.ones((len(self.room_index), 7))
+        else:
+            level = hist[:, -FORECAST_LEVEL_DAYS:].mean(axis=1)
+            weekdays = (self.origin + np.arange(days_seen)) % 7
+            overall = hist.mean(axis=1)
+            weekday_factor = np.ones((len(self.room_index), 7))
+            for w in range(7):
+                mask = weekdays == w
+                if mask.any():
+                    weekday_factor[:, w] = np.divide(hist[:, mask].mean(axis=1), overall,
+                                                     out=np.ones_like(overall), where=overall > 0)
+        future = today + np.arange(horizon)
+        expected = level[:, None] * weekday_factor[:, future % 7]
+        # same week last year, relative to last year's pace at this point
+        if t - 365 - FORECAST_LEVEL_DAYS >= 0:
+            smooth = np.apply_along_axis(lambda a: np.convolve(a, np.ones(7) / 7, mode='same'), 1, self.arrivals)
+            ly_level = self.arrivals[:, t - 365 - FORECAST_LEVEL_DAYS:t - 365].mean(axis=1)
+            ly = smooth[:, t - 365:t - 365 + horizon]
+            season = np.divide(ly, ly_level[:, None], out=np.ones_like(ly), where=ly_level[:, None] > 0)
+            expected = expected * np.clip(season, *FORECAST_SEASON_CLIP)
+        # today's walk-ins so far are already on the books
+        expected[:, 0] = np.maximum(0, expected[:, 0] - self.arrivals[:, t])
+        # P(stay > k nights) spreads each expected arrival over the following nights
+        los_total = self.los.sum(axis=1, keepdims=True)
+        los_p = np.divide(self.los, los_total, out=np.zeros_like(self.los), where=los_total > 0)
+        survival = np.zeros((len(self.room_index), horizon))
+        tail = 1.0 - np.cumsum(los_p, axis=1)
+        width = min(horizon, FORECAST_MAX_STAY + 1)
+        survival[:, :width] = np.clip(np.concatenate([np.ones((len(self.room_index), 1)), tail[:, 1:width]], axis=1), 0, 1)
+        on_books = occupancy[:, t:t + horizon]
+        nights_sold = occupancy[:, max(0, t - 90):t].sum(axis=1)
+        rate = np.divide(self.revenue[:, max(0, t - 90):t].sum(axis=1), nights_sold,
+                         out=np.zeros(len(self.room_index)), where=nights_sold > 0)
+        result = {}
+        for room_id, row in self.room_index.items():
+            new_stays = np.convolve(expected[row], survival[row])[:horizon]
+            occupied = on_books[row] + new_stays
+            result[room_id] = (occupied, occupied * rate[row])
+        return result
+
+# ---------- Receipt rendering ----------
+# Templates are compiled once at import; worker processes reuse them for every receipt.
+RECEIPT_TEXT_TEMPLATE = string.Template("""\
+$hotel
+Reservation Receipt #$reservation_id
+Issued: $issued
+----------------------------------------
+Guest Name:        $name
+Phone Number:      $phone
+Room Type:         $room
+Room Number:       $room_number
+Check-in:          $check_in
+Number of Nights:  $nights
+Services:          $services
+Payment Method:    $payment
+----------------------------------------
+Total Amount:      $currency$total
+""")
+RECEIPT_FILENAME_TEMPLATE = string.Template("receipt_${reservation_id}.$ext")
+
+RECEIPT_OUTPUT_DIR = "receipts"
+# Batches smaller than this render in-process; process start-up would cost more
+RECEIPT_PARALLEL_THRESHOLD = 200
+RECEIPT_CHUNK_SIZE = 64
+
+def _receipt_fields(reservation, hotel, currency):
+    """Template fields for a Reservation."""
+    created_at = reservation.created_at
+    services = reservation.services or ''
+    if isinstance(services, (list, tuple)):
+        services = ', '.join(services)
+    total = reservation.total
+    return {
+        'hotel': hotel or '',
+        'reservation_id': reservation.reservation_id or '-',
+        'issued': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'name': reservation.guest_name or '',
+        'phone': reservation.phone or '',
+        'room': reservation.room_type or '',
+        'room_number': reservation.room_number or 'To be assigned',
+        'check_in': created_at.strftime('%Y-%m-%d') if created_at else '-',
+        'nights': reservation.nights or '',
+        'services': services or 'None',
+        'payment': reservation.payment or '',
+        'currency': currency,
+        'total': f"{float(total):.2f}" if total is not None else '0.00'
+    }
+
+def render_receipt_text(reservation, hotel='', currency='₱'):
+    return RECEIPT_TEXT_TEMPLATE.substitute(_receipt_fields(reservation, hotel, currency))
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def render_receipt_pdf(reservation, hotel=''):
+    """Single-page PDF of the text receipt in Courier (no third-party PDF library needed)."""
+    # the standard PDF fonts have no peso sign
+    lines = render_receipt_text(reservation, hotel, currency='PHP ').splitlines()
+    content = ["BT", "/F1 11 Tf", "14 TL", "72 740 Td"]
+    content.extend(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+    content.append("ET")
+    stream = "\n".join(content).encode('latin-1', 'replace')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+def write_receipt(job):
+    """Render one receipt to disk. job is (reservation, hotel, output_dir, fmt); returns the file path."""
+    reservation, hotel, output_dir, fmt = job
+    filename = RECEIPT_FILENAME_TEMPLATE.substitute(reservation_id=reservation.reservation_id, ext=fmt)
+    path = os.path.join(output_dir, filename)
+    if fmt == 'pdf':
+        with open(path, 'wb') as f:
+            f.write(render_receipt_pdf(reservation, hotel))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_receipt_text(reservation, hotel))
+    return path
+
+def render_receipts_batch(reservations, output_dir, fmt='pdf', hotel='', workers=None):
+    """
+    Write one receipt file per Reservation into output_dir ('pdf' or 'txt').
+    Large batches are spread over worker processes. Returns the written paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(reservation, hotel, output_dir, fmt) for reservation in reservations]
+    if len(jobs) < RECEIPT_PARALLEL_THRESHOLD:
+        return [write_receipt(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(write_receipt, jobs, chunksize=RECEIPT_CHUNK_SIZE))
+
 class HotelReservation:
     def __init__(self, root):
         self.root = root
         self.setup_styles()
         self.setup_window()
 
-        # ✅ Database configuration (simplified, no SQL port needed)
-        self.db_config = {
-            "host": "localhost",   # Default MySQL host
-            "user": "root",        # Default MySQL user
-            "password": "",        # Enter your MySQL password here if you have one
-            "database": "hotel_reservation_system"  # Make sure this DB exists in phpMyAdmin
-        }
+        # Properties served by this install (see PROPERTIES)
+        self.properties = PROPERTIES
+        self.property_code = next(iter(self.properties))
+        self.db_config = self.properties[self.property_code]['db_config']
+        # property_code -> {'rooms', 'services', 'guest_ids'} for properties not on screen
+        self.property_caches = {}
+        # read routing: (property_code, replica index) -> (checked_at, lag or None),
+        # property_code -> monotonic time of this session's last committed write;
+        # fan-out threads share both, so they are read and written under replica_lock
+        self.replica_state = {}
+        self.last_write_at = {}
+        self.replica_turn = {}
+        self.replica_lock = threading.Lock()
+        # property_code -> CircuitBreaker for its primary; last good catalogs per property
+        # are served while the breaker is open
+        self.breakers = {code: CircuitBreaker() for code in self.properties}
+        self.catalog_cache = {}
+        self.db_banner = None
+        self.probing = set()
+        # property codes whose breaker a worker thread just opened; drained on the
+        # main loop by _poll_breaker_events(), since Tk may only be used from there
+        self.breaker_events = queue.SimpleQueue()
 
         # Attempt to load rooms/services from DB
         self.rooms = {}
         self.services = {}
+        # normalized phone -> Guest for guests seen this session
+        self.guest_ids = {}
+        # id of the reservation most recently created by add_reservation()
+        self.last_reservation_id = None
+        # waitlist entries booked by the most recent cancel_reservations() call
+        self.last_waitlist_filled = []
+        # property_code -> DemandForecaster, kept warm between forecast refreshes
+        self.forecasters = {}
+        # refresh callback of the open occupancy calendar (see view_occupancy)
+        self.occupancy_refresh = None
+        # background gateway calls (see process_payments)
+        self.payment_executor = ThreadPoolExecutor(max_workers=PAYMENT_WORKERS)
+        self.payment_cycle_running = False
         self._initial_db_load()
 
         # pending reservation state across screens
@@ -32,9 +706,26 @@ class HotelReservation:
             "room": None,
             "services": [],
             "payment": None,
-            "total": 0.0
+            "total": 0.0,
+            "hold": None   # (property_code, hold_id, room_type) while a unit is held
         }
 
+        # min-heap of (expires_at, property_code, hold_id) for holds placed by this session;
+        # hold_expiry has the current expiry per (property_code, hold_id) so renewed or
+        # released entries are skipped when they surface
+        self.hold_heap = []
+        self.hold_expiry = {}
+        self.sweep_expired_holds()
+        self.root.after(HOLD_REAP_INTERVAL_MS, self.reap_expired_holds)
+
+        # Keep the hot reservations table small
+        self.schedule_archival()
+        self.schedule_night_audit()
+        # Authorize and settle gateway payments in the background
+        self.schedule_payments()
+        self.root.after(PAYMENT_SETTLE_INTERVAL_MS, self.schedule_settlement)
+        self.root.after(CIRCUIT_POLL_MS, self._poll_breaker_events)
+
         # Start at welcome screen
         self.show_welcome()
 
@@ -45,6 +736,7 @@ class HotelReservation:
             'secondary': '#3498DB',    # Bright blue
             'accent': '#E74C3C',       # Red for danger / Cancel Reservation
             'success': '#27AE60',      # Green for confirm
+            'warning': '#F39C12',      # Amber for the database outage banner
             'light': '#ECF0F1',        # Page background
             'white': '#FFFFFF',
             'dark_text': '#2C3E50',
@@ -75,151 +767,1769 @@ class HotelReservation:
             print(f"Error setting up window: {e}")
 
     # ---------- Database helpers ----------
-    def connect(self):
+    def _db_config_for(self, property_code=None):
+        """Database settings for a property (the active one when property_code is None)."""
+        if property_code is None or property_code == self.property_code:
+            return self.db_config
+        return self.properties[property_code]['db_config']
+
+    def _replica_configs(self, property_code=None):
+        """Connection settings for the property's read replicas (empty without any)."""
+        code = property_code or self.property_code
+        primary = self._db_config_for(code)
+        return [{**primary, **replica} for replica in self.properties[code].get('replicas', [])]
+
+    def _measure_replica_lag(self, conn):
+        """Seconds the replica is behind its source, or None if it is not replicating."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # MySQL < 8.0.22 / MariaDB < 10.5
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if not row:
+            return None
+        status = dict(zip(cursor.column_names, row))
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else int(lag)
+
+    def _connect_replica(self, property_code=None):
+        """
+        Connection to a replica that is caught up enough for this session, or None to
+        fall back to the primary. Replicas are tried round-robin; one that is down,
+        not replicating or lagging past REPLICA_MAX_LAG_SECONDS is skipped, as is any
+        replica that may not yet have this session's last write (read-your-writes).
+        """
+        code = property_code or self.property_code
+        configs = self._replica_configs(code)
+        if not configs:
+            return None
+        with self.replica_lock:
+            start = self.replica_turn.get(code, 0)
+            self.replica_turn[code] = start + 1
+            last_write = self.last_write_at.get(code)
+        for offset in range(len(configs)):
+            index = (start + offset) % len(configs)
+            key = (code, index)
+            now = time.monotonic()
+            with self.replica_lock:
+                checked_at, lag = self.replica_state.get(key, (None, None))
+            fresh = checked_at is not None and now - checked_at < (REPLICA_LAG_CHECK_SECONDS if lag is not None else REPLICA_RETRY_SECONDS)
+            if fresh and (lag is None or lag > REPLICA_MAX_LAG_SECONDS):
+                continue
+            if fresh and last_write is not None and now - last_write <= lag + REPLICA_STICKY_SECONDS:
+                continue
+            try:
+                conn = mysql.connector.connect(**self._with_timeout(configs[index]))
+            except Exception as e:
+                print(f"Replica {index} of {code} unavailable: {e}")
+                with self.replica_lock:
+                    self.replica_state[key] = (now, None)
+                continue
+            if not fresh:
+                try:
+                    lag = self._measure_replica_lag(conn)
+                except Exception as e:
+                    print(f"Could not read replication status of replica {index} of {code}: {e}")
+                    lag = None
+                with self.replica_lock:
+                    self.replica_state[key] = (now, lag)
+                if lag is None or lag > REPLICA_MAX_LAG_SECONDS or \
+                        (last_write is not None and now - last_write <= lag + REPLICA_STICKY_SECONDS):
+                    try:
+                        conn.close()
+                    except:
+                        pass
+                    continue
+            return conn
+        return None
+
+    def _note_write(self, property_code=None):
+        """
+        Remember that this session just committed a write (see _connect_replica).
+        Called after the commit on the clerk's own actions only; background workers
+        write without it so they do not keep the session off the replicas.
+        """
+        with self.replica_lock:
+            self.last_write_at[property_code or self.property_code] = time.monotonic()
+
+    @staticmethod
+    def _with_timeout(config):
+        """config with a connection timeout so an unreachable server fails in seconds."""
+        return {'connection_timeout': DB_CONNECT_TIMEOUT_SECONDS, **config}
+
+    def _connect_primary(self, property_code=None):
+        """
+        Connect to the property's primary through its circuit breaker.
+        Returns (conn, error_message, just_opened).
+        """
+        code = property_code or self.property_code
+        breaker = self.breakers[code]
+        if not breaker.allow():
+            return None, f"Database unavailable: {breaker.last_error}", False
+        try:
+            conn = mysql.connector.connect(**self._with_timeout(self._db_config_for(code)))
+        except Exception as e:
+            return None, str(e), self._record_db_failure(code, str(e))
+        breaker.record_success()
+        return conn, None, False
+
+    def connect(self, property_code=None, readonly=False):
+        """
+        Connection to the property's database. readonly=True may return a replica
+        connection; callers must not write through it. While the property's circuit
+        breaker is open this returns None at once and the outage banner is shown
+        instead of an error dialog.
+        """
+        if readonly:
+            conn = self._connect_replica(property_code)
+            if conn:
+                return conn
+        code = property_code or self.property_code
+        conn, err, _ = self._connect_primary(code)
+        if conn:
+            return conn
+        breaker = self.breakers[code]
+        if breaker.allow():
+            # first failure of a streak: tell the user once, later ones open the breaker
+            if breaker.failures == 1:
+                messagebox.showerror("Database Error", f"Connection failed: {err}")
+        else:
+            self._show_db_banner(code)
+        return None
+
+    def try_connect_silent(self, property_code=None, readonly=False):
+        """Try to connect without showing a messagebox (returns (conn, err))"""
+        if readonly:
+            conn = self._connect_replica(property_code)
+            if conn:
+                return conn, None
+        conn, err, _ = self._connect_primary(property_code)
+        return conn, err
+
+    def _record_db_failure(self, property_code, error):
+        """
+        Count a failed connection on any thread. When it opens the breaker, the
+        main loop is told to show the banner and start probing (see
+        _poll_breaker_events). Returns True if the breaker just opened.
+        """
+        opened = self.breakers[property_code].record_failure(error)
+        if opened:
+            self.breaker_events.put(property_code)
+        return opened
+
+    def _poll_breaker_events(self):
+        """Main loop: show the banner for breakers opened since the last poll, then reschedule."""
+        try:
+            while True:
+                try:
+                    code = self.breaker_events.get_nowait()
+                except queue.Empty:
+                    break
+                if not self.breakers[code].allow():
+                    self._show_db_banner(code)
+        except Exception as e:
+            print(f"Error handling database outage: {e}")
+        finally:
+            try:
+                self.root.after(CIRCUIT_POLL_MS, self._poll_breaker_events)
+            except Exception:
+                pass
+
+    def _show_db_banner(self, property_code=None):
+        """Show the outage banner (once) and start probing the property's database."""
+        code = property_code or self.property_code
+        try:
+            breaker = self.breakers[code]
+            text = (f"⚠️ {self.property_name(code)}: database unreachable - showing saved rooms and prices. "
+                    f"Reconnecting in the background...")
+            if self.db_banner is None or not self.db_banner.winfo_exists():
+                self.db_banner = tk.Label(self.root, text=text, font=('Segoe UI', 10, 'bold'),
+                                          bg=self.colors['warning'], fg=self.colors['dark_text'], pady=6)
+                slaves = [w for w in self.root.pack_slaves() if w is not self.db_banner]
+                if slaves:
+                    self.db_banner.pack(side='top', fill='x', before=slaves[0])
+                else:
+                    self.db_banner.pack(side='top', fill='x')
+            else:
+                self.db_banner.config(text=text)
+            if code not in self.probing:
+                self.probing.add(code)
+                self.root.after(breaker.next_probe_delay(), self._probe_database, code)
+        except Exception as e:
+            print(f"Error showing database banner: {e}")
+
+    def _hide_db_banner(self):
+        if self.db_banner is not None:
+            try:
+                self.db_banner.destroy()
+            except Exception:
+                pass
+            self.db_banner = None
+
+    def _probe_database(self, property_code):
+        """Try the property's primary on a worker thread; _finish_probe() polls for the result."""
+        result = {}
+
+        def worker():
+            try:
+                conn = mysql.connector.connect(**self._with_timeout(self._db_config_for(property_code)))
+                conn.close()
+                result['ok'] = True
+            except Exception as e:
+                result['error'] = str(e)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(200, self._finish_probe, property_code, thread, result)
+
+    def _finish_probe(self, property_code, thread, result):
+        if thread.is_alive():
+            self.root.after(200, self._finish_probe, property_code, thread, result)
+            return
+        breaker = self.breakers[property_code]
+        if not result.get('ok'):
+            breaker.last_error = result.get('error')
+            self.root.after(breaker.next_probe_delay(), self._probe_database, property_code)
+            return
+        breaker.record_success()
+        self.probing.discard(property_code)
+        print(f"Database for {property_code} is reachable again")
+        if not any(not b.allow() for b in self.breakers.values()):
+            self._hide_db_banner()
+        if property_code == self.property_code:
+            self.rooms = self.load_rooms()
+            self.services = self.load_services()
+        else:
+            self.property_caches.pop(property_code, None)
+
+    # ---------- Schema & query plans ----------
+    def ensure_schema(self, property_code=None):
+        """
+        Create the property's database if needed and apply pending SCHEMA_MIGRATIONS.
+        Returns (ok, error_message) and never shows a messagebox.
+        """
+        db_config = self._db_config_for(property_code)
+        server_config = {k: v for k, v in db_config.items() if k != 'database'}
+        try:
+            conn = mysql.connector.connect(**self._with_timeout(server_config))
+        except Exception as e:
+            self._record_db_failure(property_code or self.property_code, str(e))
+            return False, str(e)
+        try:
+            cursor = conn.cursor()
+            db_name = db_config['database']
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}`")
+            cursor.execute(f"USE `{db_name}`")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255),
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB
+            """)
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            for version, description, statements in SCHEMA_MIGRATIONS:
+                if version in applied:
+                    continue
+                for stmt in statements:
+                    try:
+                        cursor.execute(stmt)
+                    except mysql.connector.Error as e:
+                        if e.errno not in MIGRATION_IGNORABLE_ERRORS:
+                            raise
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                               (version, description))
+                conn.commit()
+            return True, None
+        except mysql.connector.Error as e:
+            conn.rollback()
+            return False, f"Migration failed: {str(e)}"
+        except Exception as e:
+            conn.rollback()
+            return False, f"Unexpected migration error: {str(e)}"
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def explain_hot_queries(self, property_code=None):
+        """
+        EXPLAIN each query in HOT_QUERIES and report plans that fall back to a full
+        table or index scan (or a filesort where the index should provide the order).
+        Returns a list of problem strings, or None if the DB is unreachable.
+        """
+        conn = self.connect(property_code)
+        if not conn:
+            return None
+        try:
+            return check_hot_queries(conn.cursor(dictionary=True))
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to check query plans: {str(e)}")
+            return None
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error checking query plans: {str(e)}")
+            return None
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def _initial_db_load(self):
+        """
+        Bring every property's schema up to date in parallel on worker threads, so one
+        unreachable property does not hold up startup; _finish_initial_load() then
+        loads rooms/services on the main loop.
+        """
+        result = {}
+
+        def worker():
+            try:
+                codes = list(self.properties)
+                with ThreadPoolExecutor(max_workers=min(PROPERTY_FANOUT_WORKERS, len(codes)) or 1) as pool:
+                    for code, (ok, err) in zip(codes, pool.map(self.ensure_schema, codes)):
+                        if not ok:
+                            print(f"Schema bootstrap skipped for {code}: {err}")
+                conn, err = self.try_connect_silent()
+                if conn:
+                    conn.close()
+                    result['ok'] = True
+            except Exception as e:
+                print(f"Error during initial DB load: {e}")
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(200, self._finish_initial_load, thread, result)
+
+    def _finish_initial_load(self, thread, result):
+        if thread.is_alive():
+            self.root.after(200, self._finish_initial_load, thread, result)
+            return
+        try:
+            if result.get('ok'):
+                self.rooms = self.load_rooms()
+                self.services = self.load_services()
+        except Exception as e:
+            print(f"Error during initial DB load: {e}")
+        if not self.breakers[self.property_code].allow():
+            self._show_db_banner(self.property_code)
+
+    def load_rooms(self, property_code=None):
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
+            # last rooms read while the database was up (availability may be stale)
+            return self.catalog_cache.get((property_code or self.property_code, 'rooms'), {})
+        try:
+            cursor = conn.cursor()
+            cursor.execute(ROOMS_SQL)
+            result = {}
+            for row in cursor:
+                room = Room.from_row(row)
+                result[room.room_type] = room
+            self.catalog_cache[(property_code or self.property_code, 'rooms')] = result
+            return result
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load rooms: {str(e)}")
+            return {}
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error loading rooms: {str(e)}")
+            return {}
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def load_services(self, property_code=None):
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
+            return self.catalog_cache.get((property_code or self.property_code, 'services'), {})
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {Service.COLUMNS} FROM services")
+            result = {}
+            for row in cursor:
+                service = Service.from_row(row)
+                result[service.name] = service
+            self.catalog_cache[(property_code or self.property_code, 'services')] = result
+            return result
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load services: {str(e)}")
+            return {}
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error loading services: {str(e)}")
+            return {}
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    # ---------- Properties ----------
+    def property_name(self, property_code=None):
+        code = property_code or self.property_code
+        return self.properties.get(code, {}).get('name', code)
+
+    def switch_property(self, property_code):
+        """
+        Make property_code the active property. The outgoing property's catalog and
+        guest cache are kept so switching back does not hit its database again.
+        """
+        try:
+            if property_code == self.property_code or property_code not in self.properties:
+                return
+            self.property_caches[self.property_code] = {
+                'rooms': self.rooms,
+                'services': self.services,
+                'guest_ids': self.guest_ids
+            }
+            self.property_code = property_code
+            self.db_config = self.properties[property_code]['db_config']
+            cached = self.property_caches.pop(property_code, None)
+            if cached is not None:
+                self.rooms = cached['rooms']
+                self.services = cached['services']
+                self.guest_ids = cached['guest_ids']
+            else:
+                self.guest_ids = {}
+                self.rooms = self.load_rooms()
+                self.services = self.load_services()
+            self.root.title(f"{self.property_name()} - Hotel Reservation System")
+        except Exception as e:
+            print(f"Error switching property: {e}")
+
+    def _refresh_rooms_cache(self, property_code=None):
+        """Reload room availability after a write to property_code."""
+        if property_code is None or property_code == self.property_code:
+            self.rooms = self.load_rooms()
+        else:
+            # reloaded the next time staff switch to that property
+            self.property_caches.pop(property_code, None)
+
+    def _fetch_property_rows(self, property_code, sql, params, archive_sql=None):
+        """
+        Worker for cross-property fan-out: run sql (and archive_sql) on one property
+        without any messagebox. Returns (property_code, reservations, error_message).
+        """
+        conn, err = self.try_connect_silent(property_code, readonly=True)
+        if not conn:
+            return property_code, [], err
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = Reservation.from_rows(cursor.fetchall(), property_code)
+            if archive_sql:
+                cursor.execute(archive_sql, params)
+                rows.extend(Reservation.from_rows(cursor.fetchall(), property_code))
+            return property_code, rows, None
+        except Exception as e:
+            return property_code, [], str(e)
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def get_reservations_all_properties(self, query_text=None, include_archive=False, limit=RESERVATION_LIST_LIMIT):
+        """
+        List (query_text None) or search reservations across every property in parallel.
+        Returns (reservations, errors): Reservations merged newest first, errors maps
+        unreachable property codes to their error message.
+        """
+        if query_text is None:
+            sql, archive_sql, params = RESERVATION_LIST_SQL, ARCHIVE_LIST_SQL, (limit,)
+        else:
+            like_q = f"%{query_text}%"
+            sql, archive_sql, params = RESERVATION_SEARCH_SQL, ARCHIVE_SEARCH_SQL, (like_q, like_q)
+        if not include_archive:
+            archive_sql = None
+        workers = min(PROPERTY_FANOUT_WORKERS, len(self.properties)) or 1
+        merged, errors = [], {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._fetch_property_rows, code, sql, params, archive_sql)
+                       for code in self.properties]
+            for future in futures:
+                code, rows, err = future.result()
+                if err:
+                    errors[code] = err
+                merged.extend(rows)
+        merged.sort(key=lambda reservation: reservation.created_at or datetime.min, reverse=True)
+        return merged, errors
+
+    def _upsert_guest(self, cursor, name, phone):
+        """
+        Return the guest_id for this phone, creating or renaming the guest as needed.
+        Guests are keyed on the normalized 11-digit phone (unique in the DB).
+        """
+        guest_id = self._cached_guest_id(name, phone)
+        if guest_id is None:
+            is_valid, cleaned = self.validate_phone_number(phone)
+            cursor.execute(UPSERT_GUEST_SQL, (name, cleaned if is_valid else phone))
+            guest_id = cursor.lastrowid
+            self._remember_guest(guest_id, name, phone)
+        return guest_id
+
+    def _cached_guest_id(self, name, phone):
+        """guest_id of this name and phone if this session has seen them, else None."""
+        is_valid, cleaned = self.validate_phone_number(phone)
+        cached = self.guest_ids.get(cleaned if is_valid else phone)
+        return cached.guest_id if cached and cached.name == name else None
+
+    def _remember_guest(self, guest_id, name, phone):
+        is_valid, cleaned = self.validate_phone_number(phone)
+        phone = cleaned if is_valid else phone
+        self.guest_ids[phone] = Guest(guest_id, name, phone)
+
+    def add_reservation(self, name, phone, room, nights, services, total, payment, hold=None):
+        conn = self.connect()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            # same transaction as booking_api.py: lock the room row, consume our hold or
+            # check nobody else holds the last unit, book, then give the stay a room
+            hold_id = hold[1] if hold and hold[0] == self.property_code else None
+            booking = run_steps(cursor, book_steps(self.property_code, room, name, phone, nights, services, payment,
+                                                   total=total, guest_id=self._cached_guest_id(name, phone),
+                                                   hold_id=hold_id))
+            conn.commit()
+            self._note_write()
+            self.last_reservation_id = booking['reservation_id']
+            self._remember_guest(booking['guest_id'], name, phone)
+            if hold:
+                self.hold_expiry.pop((hold[0], hold[1]), None)
+            # refresh local cache
+            self.rooms = self.load_rooms()
+            return True
+        except BookingError as e:
+            conn.rollback()
+            messagebox.showerror("Unavailable", str(e))
+            return False
+        except mysql.connector.Error as e:
+            conn.rollback()
+            # a rolled-back insert may have cached a guest_id that no longer exists
+            self.guest_ids.clear()
+            messagebox.showerror("Database Error", f"Failed to add reservation: {str(e)}")
+            return False
+        except Exception as e:
+            conn.rollback()
+            self.guest_ids.clear()
+            messagebox.showerror("Error", f"Unexpected error adding reservation: {str(e)}")
+            return False
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def get_reservations(self, limit=RESERVATION_LIST_LIMIT, include_archive=False, property_code=None):
+        """
+        Most recent Reservations from the hot table. With include_archive, archived
+        ones follow (newest first) up to the same limit.
+        """
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
+            return []
+        try:
+            code = property_code or self.property_code
+            cursor = conn.cursor()
+            cursor.execute(RESERVATION_LIST_SQL, (limit,))
+            rows = Reservation.from_rows(cursor.fetchall(), code)
+            if include_archive:
+                cursor.execute(ARCHIVE_LIST_SQL, (limit,))
+                rows.extend(Reservation.from_rows(cursor.fetchall(), code))
+            return rows
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to retrieve reservations: {str(e)}")
+            return []
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error retrieving reservations: {str(e)}")
+            return []
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def get_reservations_filtered(self, query_text, include_archive=False, property_code=None):
+        """
+        Search reservations by guest name or phone (case-insensitive).
+        Returns Reservations like get_reservations(); archived matches follow the hot
+        ones when include_archive is set.
+        """
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor()
+            like_q = f"%{query_text}%"
+            code = property_code or self.property_code
+            cursor.execute(RESERVATION_SEARCH_SQL, (like_q, like_q))
+            rows = Reservation.from_rows(cursor.fetchall(), code)
+            if include_archive:
+                cursor.execute(ARCHIVE_SEARCH_SQL, (like_q, like_q))
+                rows.extend(Reservation.from_rows(cursor.fetchall(), code))
+            return rows
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Search failed: {str(e)}")
+            return []
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error during search: {str(e)}")
+            return []
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def delete_reservation(self, res_id, property_code=None):
+        return bool(self.cancel_reservations([res_id], property_code))
+
+    def cancel_reservations(self, res_ids, property_code=None):
+        """
+        Cancel several reservations in one transaction (see cancel_steps). Availability
+        goes back with a single UPDATE grouped by room, and the rows move to
+        reservations_cancelled so restore_reservations() can undo it. Freed units are
+        then offered to the waitlist in the same transaction. Charged reservations are
+        refused, none cancelled. Returns the number cancelled (None on error).
+        """
+        self.last_waitlist_filled = []
+        res_ids = [int(r) for r in res_ids]
+        if not res_ids:
+            return 0
+        conn = self.connect(property_code)
+        if not conn:
+            return None
         try:
-            return mysql.connector.connect(**self.db_config)
+            cursor = conn.cursor()
+            # shared with booking_api.py's DELETE handler
+            found, filled = run_steps(cursor, cancel_steps(res_ids))
+            if not found:
+                conn.rollback()
+                return 0
+            conn.commit()
+            self._note_write(property_code)
+            self.last_waitlist_filled = filled
+            # refresh local cache so future Room Selection shows updated availability
+            self._refresh_rooms_cache(property_code)
+            return len(found)
+        except BookingError as e:
+            conn.rollback()
+            messagebox.showwarning("Cannot Cancel", str(e))
+            return None
+        except mysql.connector.Error as e:
+            conn.rollback()
+            messagebox.showerror("Database Error", f"Failed to cancel reservations: {str(e)}")
+            return None
+        except Exception as e:
+            conn.rollback()
+            messagebox.showerror("Error", f"Unexpected error cancelling reservations: {str(e)}")
+            return None
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    # ---------- Room assignment ----------
+    def _room_schedule(self, cursor, room_id):
+        """
+        Units of one room type and its current and future stays as
+        (reservation_id, start, end, unit_id) date-ordinal tuples.
+        """
+        return run_steps(cursor, room_schedule_steps(room_id))
+
+    def _place_unassigned(self, cursor, room_ids):
+        """
+        Incremental step after a booking or cancellation: put stays of these room
+        types that have no unit into the best-fitting free unit, moving nobody.
+        Runs inside the caller's transaction; returns how many were placed.
+        """
+        return run_steps(cursor, place_unassigned_steps(room_ids))
+
+    def _ensure_room_units(self, cursor):
+        """
+        Give room types without physical units one unit per sellable room
+        (free units plus current reservations), numbered <room_id>-<nnn>.
+        Returns how many units were created.
+        """
+        cursor.execute("""
+            SELECT rm.room_id, rm.available + COUNT(r.reservation_id)
+            FROM rooms rm
+            LEFT JOIN reservations r ON r.room_id = rm.room_id
+            WHERE NOT EXISTS (SELECT 1 FROM room_units u WHERE u.room_id = rm.room_id)
+            GROUP BY rm.room_id, rm.available
+        """)
+        new_units = []
+        for room_id, capacity in cursor.fetchall():
+            new_units.extend((room_id, f"{room_id}-{n:03d}") for n in range(1, int(capacity or 0) + 1))
+        if new_units:
+            cursor.executemany("INSERT INTO room_units (room_id, room_number) VALUES (%s, %s)", new_units)
+        return len(new_units)
+
+    def optimize_room_assignments(self, allow_moves=False, property_code=None):
+        """
+        Assign every current and future stay to a physical room, per room type.
+        With allow_moves, stays that have not started are repacked to close gaps;
+        otherwise only unassigned or conflicting stays get a (new) room.
+        Returns a summary dict, or None on error.
+        """
+        conn = self.connect(property_code)
+        if not conn:
+            return None
+        try:
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            created = self._ensure_room_units(cursor)
+            today = date.today().toordinal()
+            cursor.execute("SELECT room_id FROM rooms")
+            room_ids = [row[0] for row in cursor.fetchall()]
+            updates, moved, unassigned, total = [], 0, 0, 0
+            for room_id in room_ids:
+                units, bookings = self._room_schedule(cursor, room_id)
+                plan = plan_room_assignments(units, bookings, today, allow_moves)
+                total += len(bookings)
+                for res_id, _, _, unit_id in bookings:
+                    new_unit = plan.get(res_id)
+                    if new_unit is None:
+                        unassigned += 1
+                    if new_unit != unit_id:
+                        updates.append((new_unit, res_id))
+                        if unit_id is not None:
+                            moved += 1
+            if updates:
+                cursor.executemany("UPDATE reservations SET unit_id = %s WHERE reservation_id = %s", updates)
+            conn.commit()
+            self._note_write(property_code)
+            return {
+                'stays': total,
+                'changed': len(updates),
+                'moved': moved,
+                'unassigned': unassigned,
+                'units_created': created,
+                'seconds': time.perf_counter() - started
+            }
+        except mysql.connector.Error as e:
+            conn.rollback()
+            messagebox.showerror("Database Error", f"Failed to assign rooms: {str(e)}")
+            return None
+        except Exception as e:
+            conn.rollback()
+            messagebox.showerror("Error", f"Unexpected error assigning rooms: {str(e)}")
+            return None
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    # ---------- Waitlist ----------
+    def join_waitlist(self, room_name, priority=0):
+        """
+        Queue the pending guest for room_name. They are booked automatically when a
+        cancellation frees a unit of that type. Returns True on success.
+        """
+        room = self.rooms.get(room_name)
+        if room is None:
+            return False
+        conn = self.connect()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            guest_id = self._upsert_guest(cursor, self.pending['name'], self.pending['phone'])
+            cursor.execute(
+                """INSERT INTO waitlist (room_id, guest_id, nights, services, total, priority)
+                   VALUES (%s, %s, %s, %s, %s, %s)""",
+                (room.room_id, guest_id, self.pending['nights'], ",".join(self.pending['services']),
+                 self.pending['total'], priority)
+            )
+            conn.commit()
+            self._note_write()
+            return True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            self.guest_ids.clear()
+            messagebox.showerror("Database Error", f"Failed to join waitlist: {str(e)}")
+            return False
+        except Exception as e:
+            conn.rollback()
+            self.guest_ids.clear()
+            messagebox.showerror("Error", f"Unexpected error joining waitlist: {str(e)}")
+            return False
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def _fill_from_waitlist(self, cursor, freed):
+        """
+        Book waiting entries into freed units inside the caller's transaction
+        (see fill_from_waitlist_steps). Returns the booked (entry_id, reservation_id) pairs.
+        """
+        return run_steps(cursor, fill_from_waitlist_steps(freed))
+
+    def get_waitlist(self, property_code=None):
+        """Waiting entries as (entry_id, name, phone, room_type, nights, priority, created_at)."""
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor()
+            cursor.execute(WAITLIST_SQL)
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load waitlist: {str(e)}")
+            return []
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error loading waitlist: {str(e)}")
+            return []
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def remove_waitlist_entries(self, entry_ids, property_code=None):
+        entry_ids = [int(e) for e in entry_ids]
+        if not entry_ids:
+            return True
+        conn = self.connect(property_code)
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(entry_ids))
+            cursor.execute(f"UPDATE waitlist SET status = 'cancelled' WHERE status = 'waiting' AND entry_id IN ({placeholders})", entry_ids)
+            conn.commit()
+            self._note_write(property_code)
+            return True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            messagebox.showerror("Database Error", f"Failed to update waitlist: {str(e)}")
+            return False
+        except Exception as e:
+            conn.rollback()
+            messagebox.showerror("Error", f"Unexpected error updating waitlist: {str(e)}")
+            return False
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def restore_reservations(self, res_ids, property_code=None):
+        """
+        Undo cancel_reservations(): move the rows back, take their units again and
+        reinstate their payments, all or nothing. Returns (restored_count, error_message).
+        """
+        res_ids = [int(r) for r in res_ids]
+        if not res_ids:
+            return 0, None
+        conn = self.connect(property_code)
+        if not conn:
+            return 0, "Could not connect to the database."
+        try:
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(res_ids))
+            cursor.execute(f"""
+                SELECT c.room_id, COUNT(*), rm.room_type, rm.available
+                FROM reservations_cancelled c
+                JOIN rooms rm ON rm.room_id = c.room_id
+                WHERE c.reservation_id IN ({placeholders})
+                GROUP BY c.room_id, rm.room_type, rm.available
+                FOR UPDATE
+            """, res_ids)
+            needed_rooms = cursor.fetchall()
+            held = {}
+            if needed_rooms:
+                # units under other clerks' active holds are spoken for, as in book_steps
+                room_placeholders = ", ".join(["%s"] * len(needed_rooms))
+                cursor.execute(f"""SELECT room_id, COUNT(*) FROM inventory_holds
+                                   WHERE room_id IN ({room_placeholders}) AND expires_at > NOW()
+                                   GROUP BY room_id""", [row[0] for row in needed_rooms])
+                held = dict(cursor.fetchall())
+            for room_id, needed, room_type, available in needed_rooms:
+                free = max(0, available - held.get(room_id, 0))
+                if free < needed:
+                    conn.rollback()
+                    return 0, f"Only {free} {room_type} left; {needed} needed to restore."
+            cursor.execute(f"""
+                UPDATE rooms rm
+                JOIN (SELECT room_id, COUNT(*) AS n FROM reservations_cancelled
+                      WHERE reservation_id IN ({placeholders}) AND room_id IS NOT NULL
+                      GROUP BY room_id) taken ON rm.room_id = taken.room_id
+                SET rm.available = rm.available - taken.n
+            """, res_ids)
+            cursor.execute(f"""INSERT INTO reservations ({RESERVATION_COLUMNS})
+                               SELECT {RESERVATION_COLUMNS} FROM reservations_cancelled WHERE reservation_id IN ({placeholders})""", res_ids)
+            restored = cursor.rowcount
+            cursor.execute(f"""SELECT {FORECAST_STAY_COLUMNS}, cancelled_at FROM reservations_cancelled
+                               WHERE reservation_id IN ({placeholders}) AND room_id IS NOT NULL""", res_ids)
+            forecast_rows = cursor.fetchall()
+            cursor.execute(f"DELETE FROM reservations_cancelled WHERE reservation_id IN ({placeholders})", res_ids)
+            # the cancellation voided their payments; reinstate them in the same transaction
+            run_steps(cursor, restore_payments_steps(property_code or self.property_code, res_ids))
+            # their old rooms may have been reassigned meanwhile, so place them again
+            self._place_unassigned(cursor, [row[0] for row in needed_rooms])
+            conn.commit()
+            self._note_write(property_code)
+            self._forecast_restored(property_code or self.property_code, forecast_rows)
+            self._refresh_rooms_cache(property_code)
+            return restored, None
+        except mysql.connector.Error as e:
+            conn.rollback()
+            return 0, f"Failed to restore reservations: {str(e)}"
+        except Exception as e:
+            conn.rollback()
+            return 0, f"Unexpected error restoring reservations: {str(e)}"
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    # ---------- Inventory holds ----------
+    def sellable(self, room_name):
+        """Units of room_name that can still be booked: free units minus other clerks' active holds."""
+        room = self.rooms.get(room_name)
+        if room is None:
+            return 0
+        units = room.available - room.held
+        hold = self.pending.get('hold')
+        if hold and hold[0] == self.property_code and hold[2] == room_name:
+            # our own hold is included in room.held
+            units += 1
+        return units
+
+    def _track_hold(self, property_code, hold_id, expires_at):
+        self.hold_expiry[(property_code, hold_id)] = expires_at
+        heapq.heappush(self.hold_heap, (expires_at, property_code, hold_id))
+
+    def place_hold(self, room_name):
+        """
+        Hold one unit of room_name for the pending booking for HOLD_TTL_SECONDS,
+        releasing any earlier hold first. Returns True if the unit is held.
+        """
+        self.release_hold()
+        room = self.rooms.get(room_name)
+        if room is None:
+            return False
+        conn = self.connect()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            # the room row lock serializes holds and bookings for this room type
+            cursor.execute("SELECT available FROM rooms WHERE room_id = %s FOR UPDATE", (room.room_id,))
+            row = cursor.fetchone()
+            cursor.execute("SELECT COUNT(*) FROM inventory_holds WHERE room_id = %s AND expires_at > NOW()", (room.room_id,))
+            held = cursor.fetchone()[0]
+            if not row or row[0] - held <= 0:
+                conn.rollback()
+                return False
+            expires_at = datetime.now() + timedelta(seconds=HOLD_TTL_SECONDS)
+            cursor.execute("INSERT INTO inventory_holds (room_id, expires_at) VALUES (%s, %s)", (room.room_id, expires_at))
+            hold_id = cursor.lastrowid
+            conn.commit()
+            self._note_write()
+            self.pending['hold'] = (self.property_code, hold_id, room_name)
+            self._track_hold(self.property_code, hold_id, expires_at)
+            return True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            messagebox.showerror("Database Error", f"Failed to hold room: {str(e)}")
+            return False
+        except Exception as e:
+            conn.rollback()
+            messagebox.showerror("Error", f"Unexpected error holding room: {str(e)}")
+            return False
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def renew_hold(self):
+        """Extend the pending booking's hold by another HOLD_TTL_SECONDS. Returns False if it has lapsed."""
+        hold = self.pending.get('hold')
+        if not hold:
+            return False
+        code, hold_id, _ = hold
+        conn, err = self.try_connect_silent(code)
+        if not conn:
+            print(f"Error renewing hold: {err}")
+            return False
+        try:
+            expires_at = datetime.now() + timedelta(seconds=HOLD_TTL_SECONDS)
+            cursor = conn.cursor()
+            cursor.execute("UPDATE inventory_holds SET expires_at = %s WHERE hold_id = %s AND expires_at > NOW()",
+                           (expires_at, hold_id))
+            conn.commit()
+            self._note_write(code)
+            if cursor.rowcount != 1:
+                self.hold_expiry.pop((code, hold_id), None)
+                self.pending['hold'] = None
+                return False
+            self._track_hold(code, hold_id, expires_at)
+            return True
+        except Exception as e:
+            print(f"Error renewing hold: {e}")
+            return False
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def release_hold(self):
+        """Give back the pending booking's held unit, if any (silent; the TTL covers failures)."""
+        hold = self.pending.get('hold') if hasattr(self, 'pending') else None
+        if not hold:
+            return
+        code, hold_id, _ = hold
+        self.pending['hold'] = None
+        self.hold_expiry.pop((code, hold_id), None)
+        conn, err = self.try_connect_silent(code)
+        if not conn:
+            print(f"Error releasing hold: {err}")
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM inventory_holds WHERE hold_id = %s", (hold_id,))
+            conn.commit()
+            self._note_write(code)
+        except Exception as e:
+            print(f"Error releasing hold: {e}")
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def reap_expired_holds(self):
+        """Delete this session's lapsed holds (heap order), then reschedule."""
+        try:
+            now = datetime.now()
+            expired = {}
+            while self.hold_heap and self.hold_heap[0][0] <= now:
+                expires_at, code, hold_id = heapq.heappop(self.hold_heap)
+                if self.hold_expiry.get((code, hold_id)) != expires_at:
+                    continue  # renewed, released or booked since this entry was pushed
+                del self.hold_expiry[(code, hold_id)]
+                expired.setdefault(code, []).append(hold_id)
+                hold = self.pending.get('hold')
+                if hold and hold[0] == code and hold[1] == hold_id:
+                    self.pending['hold'] = None
+            for code, hold_ids in expired.items():
+                conn, err = self.try_connect_silent(code)
+                if not conn:
+                    print(f"Error reaping holds: {err}")
+                    continue
+                try:
+                    placeholders = ", ".join(["%s"] * len(hold_ids))
+                    cursor = conn.cursor()
+                    cursor.execute(f"DELETE FROM inventory_holds WHERE hold_id IN ({placeholders}) AND expires_at <= NOW()", hold_ids)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            print(f"Error reaping holds: {e}")
+        finally:
+            try:
+                self.root.after(HOLD_REAP_INTERVAL_MS, self.reap_expired_holds)
+            except Exception:
+                pass
+
+    def sweep_expired_holds(self):
+        """Remove lapsed holds left by sessions that closed or crashed mid-checkout."""
+        for code in self.properties:
+            conn, err = self.try_connect_silent(code)
+            if not conn:
+                continue
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM inventory_holds WHERE expires_at <= NOW()")
+                conn.commit()
+            except Exception as e:
+                print(f"Error sweeping holds for {code}: {e}")
+            finally:
+                try:
+                    conn.close()
+                except:
+                    pass
+
+    # ---------- Archival ----------
+    def archive_completed_reservations(self, after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, property_code=None):
+        """
+        Move reservations whose stay ended more than after_days ago into
+        reservations_archive, one batch per transaction. A completed stay no longer
+        holds its room, so the unit is returned to rooms.available as it would be
+        by delete_reservation(). Silent (no messagebox) so it can run in the
+        background; returns (moved_count, error_message).
+        """
+        conn, err = self.try_connect_silent(property_code)
+        if not conn:
+            return 0, err
+        moved = 0
+        try:
+            cursor = conn.cursor()
+            while True:
+                # the created_at bound lets the listing index narrow the scan; the lock
+                # keeps a concurrent cancel from returning the same unit a second time
+                cursor.execute("""
+                    SELECT reservation_id, room_id FROM reservations
+                    WHERE created_at < CURDATE() - INTERVAL %s DAY
+                      AND DATE(created_at) + INTERVAL (nights + %s) DAY < CURDATE()
+                    ORDER BY created_at
+                    LIMIT %s
+                    FOR UPDATE
+                """, (after_days, after_days, batch_size))
+                batch = cursor.fetchall()
+                if not batch:
+                    break
+                ids = [row[0] for row in batch]
+                per_room = {}
+                for _, room_id in batch:
+                    if room_id:
+                        per_room[room_id] = per_room.get(room_id, 0) + 1
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(
+                    f"""INSERT INTO reservations_archive ({RESERVATION_COPY_COLUMNS})
+                        SELECT {RESERVATION_COPY_COLUMNS} FROM reservations WHERE reservation_id IN ({placeholders})""",
+                    ids
+                )
+                cursor.execute(f"DELETE FROM reservations WHERE reservation_id IN ({placeholders})", ids)
+                for room_id, count in per_room.items():
+                    cursor.execute("UPDATE rooms SET available = available + %s WHERE room_id = %s", (count, room_id))
+                conn.commit()
+                moved += len(ids)
+                if len(ids) < batch_size:
+                    break
+            return moved, None
+        except mysql.connector.Error as e:
+            conn.rollback()
+            return moved, f"Archival failed: {str(e)}"
+        except Exception as e:
+            conn.rollback()
+            return moved, f"Unexpected archival error: {str(e)}"
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def schedule_archival(self):
+        """Run archival for every property on a background thread now and every ARCHIVE_INTERVAL_MS."""
+        def worker():
+            for code in list(self.properties):
+                moved, err = self.archive_completed_reservations(property_code=code)
+                if err:
+                    print(f"Error archiving reservations for {code}: {err}")
+                elif moved:
+                    print(f"Archived {moved} completed reservation(s) for {code}")
+        try:
+            threading.Thread(target=worker, daemon=True).start()
+            self.root.after(ARCHIVE_INTERVAL_MS, self.schedule_archival)
+        except Exception as e:
+            print(f"Error scheduling archival: {e}")
+
+    # ---------- Night audit ----------
+    def _audit_scan(self, property_code, sql, params):
+        """Worker for the audit: run one chunk query on its own connection. Returns (rows, error_message)."""
+        conn, err = self.try_connect_silent(property_code)
+        if not conn:
+            return [], err
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall(), None
+        except Exception as e:
+            return [], str(e)
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def audit_inventory(self, repair=False, property_code=None, workers=AUDIT_WORKERS):
+        """
+        Recount every room type from the reservation rows and compare with the
+        rooms.available counter. The reservation and guest tables are scanned in id
+        ranges on parallel connections; with repair, each drifted counter is rechecked
+        under a row lock and corrected. Silent so it can run in the background;
+        returns (report, error_message).
+
+        report keys: 'drift' [(room_id, room_type, available, expected)],
+        'unknown_capacity' [(room_id, room_type, available)] for room types without
+        room numbers whose counter is negative, 'dangling_rooms' {table: {room_id: rows}},
+        'dangling_guests' {table: rows}, 'orphan_guests', 'reservations', 'repaired', 'seconds'.
+        """
+        code = property_code or self.property_code
+        started = time.perf_counter()
+        conn, err = self.try_connect_silent(code)
+        if not conn:
+            return None, err
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT room_id, room_type, available FROM rooms ORDER BY room_id")
+            rooms = cursor.fetchall()
+            cursor.execute("SELECT room_id, COUNT(*) FROM room_units GROUP BY room_id")
+            units = dict(cursor.fetchall())
+            tasks = []
+            for table in AUDIT_TABLES:
+                cursor.execute(f"SELECT MIN(reservation_id), MAX(reservation_id) FROM {table}")
+                low, high = cursor.fetchone()
+                if low is not None:
+                    sql = AUDIT_RESERVATION_CHUNK_SQL.format(table=table)
+                    tasks.extend((table, sql, (start, start + AUDIT_CHUNK_SIZE))
+                                 for start in range(low, high + 1, AUDIT_CHUNK_SIZE))
+            cursor.execute("SELECT MIN(guest_id), MAX(guest_id) FROM guests")
+            low, high = cursor.fetchone()
+            if low is not None:
+                tasks.extend(("guests", AUDIT_ORPHAN_GUEST_CHUNK_SQL, (start, start + AUDIT_CHUNK_SIZE))
+                             for start in range(low, high + 1, AUDIT_CHUNK_SIZE))
+        except Exception as e:
+            return None, f"Audit failed: {str(e)}"
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+        booked = {}
+        dangling_rooms = {table: {} for table in AUDIT_TABLES}
+        dangling_guests = {table: 0 for table in AUDIT_TABLES}
+        orphan_guests = 0
+        reservations = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tasks) or 1))) as pool:
+            futures = [(table, pool.submit(self._audit_scan, code, sql, params)) for table, sql, params in tasks]
+            for table, future in futures:
+                rows, err = future.result()
+                if err:
+                    return None, f"Audit scan of {table} failed: {err}"
+                if table == "guests":
+                    orphan_guests += sum(int(row[0] or 0) for row in rows)
+                    continue
+                for room_id, count, missing_room, missing_guest in rows:
+                    if missing_room:
+                        dangling_rooms[table][room_id] = dangling_rooms[table].get(room_id, 0) + int(missing_room)
+                    dangling_guests[table] += int(missing_guest or 0)
+                    if table == "reservations":
+                        reservations += int(count)
+                        if room_id is not None:
+                            booked[room_id] = booked.get(room_id, 0) + int(count)
+
+        drift, unknown = [], []
+        for room_id, room_type, available in rooms:
+            if room_id in units:
+                expected = units[room_id] - booked.get(room_id, 0)
+                if expected != available:
+                    drift.append((room_id, room_type, available, expected))
+            elif available < 0:
+                unknown.append((room_id, room_type, available))
+
+        repaired = 0
+        if repair and drift:
+            repaired, err = self._repair_availability(code, [row[0] for row in drift])
+            if err:
+                return None, err
+        report = {
+            'drift': drift,
+            'unknown_capacity': unknown,
+            'dangling_rooms': {table: per_room for table, per_room in dangling_rooms.items() if per_room},
+            'dangling_guests': {table: count for table, count in dangling_guests.items() if count},
+            'orphan_guests': orphan_guests,
+            'reservations': reservations,
+            'repaired': repaired,
+            'seconds': time.perf_counter() - started
+        }
+        return report, None
+
+    def _repair_availability(self, property_code, room_ids):
+        """
+        Reset rooms.available to room numbers minus reservations for room_ids, recounting
+        under a lock on each room row so bookings made since the scan are respected.
+        Returns (rooms_changed, error_message).
+        """
+        conn, err = self.try_connect_silent(property_code)
+        if not conn:
+            return 0, err
+        try:
+            cursor = conn.cursor()
+            changed = 0
+            for room_id in sorted(room_ids):
+                cursor.execute("SELECT available FROM rooms WHERE room_id = %s FOR UPDATE", (room_id,))
+                row = cursor.fetchone()
+                if not row:
+                    continue
+                cursor.execute("SELECT COUNT(*) FROM room_units WHERE room_id = %s", (room_id,))
+                capacity = cursor.fetchone()[0]
+                cursor.execute("SELECT COUNT(*) FROM reservations WHERE room_id = %s", (room_id,))
+                expected = capacity - cursor.fetchone()[0]
+                if capacity and expected != row[0]:
+                    cursor.execute("UPDATE rooms SET available = %s WHERE room_id = %s", (expected, room_id))
+                    changed += 1
+            conn.commit()
+            return changed, None
+        except mysql.connector.Error as e:
+            conn.rollback()
+            return 0, f"Availability repair failed: {str(e)}"
+        except Exception as e:
+            conn.rollback()
+            return 0, f"Unexpected repair error: {str(e)}"
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    @staticmethod
+    def format_audit_report(report):
+        """Human-readable summary of an audit_inventory() report."""
+        lines = [f"{report['reservations']} active reservation(s) checked in {report['seconds']:.2f}s."]
+        if report['drift']:
+            lines.append("")
+            lines.append("Availability drift:")
+            for room_id, room_type, available, expected in report['drift']:
+                lines.append(f"  {room_type} (#{room_id}): counter {available}, actual {expected}")
+            if report['repaired']:
+                lines.append(f"  {report['repaired']} counter(s) repaired.")
+        else:
+            lines.append("Room availability counters match the reservations.")
+        for room_id, room_type, available in report['unknown_capacity']:
+            lines.append(f"{room_type} (#{room_id}) is oversold ({available}); run Assign Rooms to number its units.")
+        for table, per_room in report['dangling_rooms'].items():
+            lines.append(f"{table}: {sum(per_room.values())} row(s) point at missing room id(s) "
+                         f"{', '.join(str(room_id) for room_id in sorted(per_room))}.")
+        for table, count in report['dangling_guests'].items():
+            lines.append(f"{table}: {count} row(s) point at missing guests.")
+        if report['orphan_guests']:
+            lines.append(f"{report['orphan_guests']} guest(s) have no reservations or waitlist entries.")
+        return "\n".join(lines)
+
+    def schedule_night_audit(self):
+        """
+        Run audit_inventory() for every property at the next AUDIT_HOUR, then nightly.
+        The run only reports drift unless AUDIT_REPAIR_NIGHTLY is set.
+        """
+        def worker():
+            for code in list(self.properties):
+                report, err = self.audit_inventory(repair=AUDIT_REPAIR_NIGHTLY, property_code=code)
+                if err:
+                    print(f"Night audit failed for {code}: {err}")
+                else:
+                    print(f"Night audit for {code}:\n{self.format_audit_report(report)}")
+
+        def run():
+            try:
+                threading.Thread(target=worker, daemon=True).start()
+            finally:
+                self.schedule_night_audit()
+        try:
+            now = datetime.now()
+            next_run = now.replace(hour=AUDIT_HOUR, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            self.root.after(int((next_run - now).total_seconds() * 1000), run)
+        except Exception as e:
+            print(f"Error scheduling night audit: {e}")
+
+    # ---------- Demand forecast ----------
+    def _forecast_restored(self, property_code, rows):
+        """
+        Add restored stays back to the cached forecaster. Restores keep their old ids,
+        below the sync watermark, so refresh_forecast() would never see them; only
+        stays whose cancellation an earlier sync already took back are added.
+        """
+        forecaster = self.forecasters.get(property_code)
+        if forecaster is None or forecaster.synced_at is None:
+            return
+        forecaster.ingest([row[:5] for row in rows
+                           if row[0] <= forecaster.last_reservation_id and row[5] < forecaster.synced_at])
+
+    def refresh_forecast(self, full=False, property_code=None):
+        """
+        Bring the property's DemandForecaster up to date. The first call (or full=True)
+        streams the hot and archive tables; later calls only ingest reservations newer
+        than the last one seen and take back stays cancelled since the last sync.
+        Returns the forecaster, or None if the database is unavailable.
+        """
+        code = property_code or self.property_code
+        forecaster = None if full else self.forecasters.get(code)
+        conn = self.connect(code)
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT NOW()")
+            synced_at = cursor.fetchone()[0]
+            stay_columns = FORECAST_STAY_COLUMNS
+            if forecaster is None:
+                forecaster = DemandForecaster()
+                sources = [(f"SELECT {stay_columns} FROM reservations_archive WHERE room_id IS NOT NULL", ()),
+                           (f"SELECT {stay_columns} FROM reservations WHERE room_id IS NOT NULL", ())]
+            else:
+                sources = [(f"SELECT {stay_columns} FROM reservations WHERE reservation_id > %s AND room_id IS NOT NULL",
+                            (forecaster.last_reservation_id,))]
+                if forecaster.synced_at is not None:
+                    # [last sync, this sync): each cancellation is taken back by exactly one sync
+                    cursor.execute(
+                        f"""SELECT {stay_columns} FROM reservations_cancelled
+                            WHERE cancelled_at >= %s AND cancelled_at < %s
+                              AND reservation_id <= %s AND room_id IS NOT NULL""",
+                        (forecaster.synced_at, synced_at, forecaster.last_reservation_id)
+                    )
+                    forecaster.ingest(cursor.fetchall(), sign=-1)
+            for sql, params in sources:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(FORECAST_FETCH_SIZE)
+                    if not rows:
+                        break
+                    forecaster.ingest(rows)
+            forecaster.synced_at = synced_at
+            self.forecasters[code] = forecaster
+            return forecaster
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load reservation history: {str(e)}")
+            return None
+        except Exception as e:
+            messagebox.showerror("Error", f"Unexpected error building forecast: {str(e)}")
+            return None
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+
+    def get_forecast(self, horizon=FORECAST_HORIZON_DAYS, full=False, property_code=None):
+        """
+        Projected occupancy per room type for the next horizon nights.
+        Returns a list of (room_type, capacity, occupied_rooms, revenue) with float arrays,
+        or None if NumPy or the database is unavailable.
+        """
+        if np is None:
+            messagebox.showerror("Forecast Unavailable", "Demand forecasting needs NumPy (pip install numpy).")
+            return None
+        code = property_code or self.property_code
+        forecaster = self.refresh_forecast(full, code)
+        if forecaster is None:
+            return None
+        conn = self.connect(code)
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(ROOM_CAPACITY_SQL)
+            capacities = cursor.fetchall()
         except mysql.connector.Error as e:
-            # show error to user when a DB operation requires it
-            messagebox.showerror("Database Error", f"Connection failed: {str(e)}")
+            messagebox.showerror("Database Error", f"Failed to load room capacity: {str(e)}")
             return None
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Unexpected error: {str(e)}")
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
+        projection = forecaster.project(date.today().toordinal(), horizon)
+        forecast = []
+        for room_id, room_type, capacity in capacities:
+            capacity = int(capacity or 0)
+            occupied, revenue = projection.get(room_id, (np.zeros(horizon), np.zeros(horizon)))
+            # demand above capacity is turned away, not sold
+            sold = np.minimum(occupied, capacity)
+            scale = np.divide(sold, occupied, out=np.zeros_like(sold), where=occupied > 0)
+            forecast.append((room_type, capacity, sold, revenue * scale))
+        return forecast
+
+    # ---------- Occupancy calendar ----------
+    def get_occupancy_grid(self, first_day, days=OCCUPANCY_DAYS, property_code=None):
+        """
+        Nightly occupancy per room type from first_day. Returns (rooms, grid) where rooms
+        is [(room_id, room_type, capacity)] and grid maps room_id to `days` counts,
+        or None on error.
+        """
+        conn = self.connect(property_code, readonly=True)
+        if not conn:
             return None
-
-    def try_connect_silent(self):
-        """Try to connect without showing a messagebox (returns (conn, err))"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
-            return conn, None
+            cursor = conn.cursor()
+            cursor.execute(ROOM_CAPACITY_SQL)
+            rooms = [(room_id, room_type, int(capacity or 0)) for room_id, room_type, capacity in cursor.fetchall()]
+            last_day = first_day + timedelta(days=days)
+            tables = ["reservations"]
+            # completed stays older than the archival cutoff only exist in the archive
+            if first_day < date.today() - timedelta(days=ARCHIVE_AFTER_DAYS):
+                tables.append("reservations_archive")
+            stays = []
+            for table in tables:
+                cursor.execute(OCCUPANCY_STAYS_SQL.format(table=table), (last_day, first_day))
+                stays.extend(cursor.fetchall())
+            grid = build_occupancy_grid(stays, [room[0] for room in rooms], first_day.toordinal(), days)
+            return rooms, grid
         except mysql.connector.Error as e:
-            return None, str(e)
+            messagebox.showerror("Database Error", f"Failed to load occupancy: {str(e)}")
+            return None
         except Exception as e:
-            return None, str(e)
+            messagebox.showerror("Error", f"Unexpected error loading occupancy: {str(e)}")
+            return None
+        finally:
+            try:
+                conn.close()
+            except:
+                pass
 
-    def _initial_db_load(self):
-        """Try connecting and loading rooms/services on startup silently."""
+    # ---------- Payments ----------
+    def _authorize_payment(self, property_code, payment_id, key, amount, gateway_name, attempts):
+        """Worker: one gateway authorization for a claimed payment, then record the outcome."""
+        gateway = PAYMENT_GATEWAYS.get(gateway_name)
         try:
-            conn, err = self.try_connect_silent()
-            if conn:
-                conn.close()
-                self.rooms = self.load_rooms()
-                self.services = self.load_services()
+            if gateway is None:
+                result = PaymentResult('error', message=f"Gateway {gateway_name} is not registered")
             else:
-                self.rooms = {}
-                self.services = {}
+                result = gateway.authorize(key, float(amount), PAYMENT_CURRENCY, f"Reservation {key}")
         except Exception as e:
-            print(f"Error during initial DB load: {e}")
-            self.rooms = {}
-            self.services = {}
-
-    def load_rooms(self):
-        conn = self.connect()
+            result = PaymentResult('error', message=str(e))
+        conn, err = self.try_connect_silent(property_code)
         if not conn:
-            return {}
+            # stays 'authorizing'; resumed with the same key once stale
+            print(f"Could not record payment {payment_id} for {property_code}: {err}")
+            return
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM rooms")
-            rows = cursor.fetchall()
-            result = {}
-            for r in rows:
-                room_type = r.get('room_type')
-                result[room_type] = {
-                    'id': r.get('room_id'),
-                    'price': float(r.get('price')) if r.get('price') is not None else 0.0,
-                    'available': int(r.get('available')) if r.get('available') is not None else 0
-                }
-            return result
-        except mysql.connector.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load rooms: {str(e)}")
-            return {}
+            cursor = conn.cursor()
+            if result.status == 'approved':
+                cursor.execute("""UPDATE payments SET status = 'authorized', auth_code = %s, last_error = NULL
+                                  WHERE payment_id = %s AND status = 'authorizing'""", (result.reference, payment_id))
+                if cursor.rowcount == 0:
+                    # cancelled while in flight: keep the code so the void can be traced
+                    cursor.execute("UPDATE payments SET auth_code = %s WHERE payment_id = %s", (result.reference, payment_id))
+            elif result.status == 'declined' or attempts >= PAYMENT_MAX_ATTEMPTS:
+                cursor.execute("""UPDATE payments SET status = %s, last_error = %s
+                                  WHERE payment_id = %s AND status = 'authorizing'""",
+                               ('declined' if result.status == 'declined' else 'failed', (result.message or '')[:255], payment_id))
+            else:
+                delay = PAYMENT_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                cursor.execute("""UPDATE payments SET status = 'pending', last_error = %s,
+                                         next_attempt_at = NOW() + INTERVAL %s SECOND
+                                  WHERE payment_id = %s AND status = 'authorizing'""",
+                               ((result.message or '')[:255], delay, payment_id))
+            conn.commit()
         except Exception as e:
-            messagebox.showerror("Error", f"Unexpected error loading rooms: {str(e)}")
-            return {}
+            conn.rollback()
+            print(f"Error recording payment {payment_id}: {e}")
         finally:
             try:
                 conn.close()
             except:
                 pass
 
-    def load_services(self):
-        conn = self.connect()
+    def process_payments(self, property_code=None):
+        """
+        One payment cycle for a property, meant for a background thread: resume rows
+        stuck in flight, void payments of cancelled bookings, then claim due
+        authorizations and run them on the payment executor. Returns (started, error).
+        """
+        code = property_code or self.property_code
+        conn, err = self.try_connect_silent(code)
         if not conn:
-            return {}
+            return 0, err
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM services")
-            rows = cursor.fetchall()
-            result = {}
-            for s in rows:
-                result[s.get('name')] = float(s.get('price')) if s.get('price') is not None else 0.0
-            return result
-        except mysql.connector.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load services: {str(e)}")
-            return {}
+            cursor = conn.cursor()
+            # a crash mid-call leaves rows in flight; the idempotency key makes a resend safe
+            cursor.execute("""UPDATE payments SET status = 'pending'
+                              WHERE status = 'authorizing' AND updated_at < NOW() - INTERVAL %s SECOND""",
+                           (PAYMENT_STALE_SECONDS,))
+            conn.commit()
+            cursor.execute("""SELECT payment_id, idempotency_key, gateway FROM payments
+                              WHERE status = 'void_pending'
+                                 OR (status = 'voiding' AND updated_at < NOW() - INTERVAL %s SECOND)""",
+                           (PAYMENT_STALE_SECONDS,))
+            for payment_id, key, gateway_name in cursor.fetchall():
+                # claim before calling the gateway: an undo only withdraws voids nobody has sent
+                cursor.execute("""UPDATE payments SET status = 'voiding', updated_at = NOW()
+                                  WHERE payment_id = %s
+                                    AND (status = 'void_pending'
+                                         OR (status = 'voiding' AND updated_at < NOW() - INTERVAL %s SECOND))""",
+                               (payment_id, PAYMENT_STALE_SECONDS))
+                claimed = cursor.rowcount == 1
+                conn.commit()
+                if not claimed:
+                    continue
+                gateway = PAYMENT_GATEWAYS.get(gateway_name)
+                result = gateway.void(key) if gateway else PaymentResult('error', message="Gateway not registered")
+                if result.status == 'approved':
+                    cursor.execute("UPDATE payments SET status = 'voided' WHERE payment_id = %s AND status = 'voiding'", (payment_id,))
+                else:
+                    cursor.execute("UPDATE payments SET status = 'void_pending', last_error = %s WHERE payment_id = %s AND status = 'voiding'",
+                                   ((result.message or '')[:255], payment_id))
+                conn.commit()
+            cursor.execute("""
+                SELECT payment_id, idempotency_key, amount, gateway, attempts FROM payments
+                WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= NOW())
+                ORDER BY payment_id
+                LIMIT %s
+            """, (PAYMENT_CLAIM_LIMIT,))
+            futures = []
+            for payment_id, key, amount, gateway_name, attempts in cursor.fetchall():
+                # claim so another app instance (or the next poll) does not send it too
+                cursor.execute("""UPDATE payments SET status = 'authorizing', attempts = attempts + 1
+                                  WHERE payment_id = %s AND status = 'pending'""", (payment_id,))
+                claimed = cursor.rowcount == 1
+                conn.commit()
+                if claimed:
+                    futures.append(self.payment_executor.submit(
+                        self._authorize_payment, code, payment_id, key, amount, gateway_name, attempts + 1))
+            for future in futures:
+                future.result()
+            return len(futures), None
         except Exception as e:
-            messagebox.showerror("Error", f"Unexpected error loading services: {str(e)}")
-            return {}
+            conn.rollback()
+            return 0, f"Payment processing failed: {str(e)}"
         finally:
             try:
                 conn.close()
             except:
                 pass
 
-    def add_reservation(self, name, phone, room, nights, services, total, payment):
-        conn = self.connect()
+    def schedule_payments(self):
+        """Run process_payments() for every property every PAYMENT_POLL_MS, one cycle at a time."""
+        def worker():
+            try:
+                for code in list(self.properties):
+                    started, err = self.process_payments(code)
+                    if err:
+                        print(f"Error processing payments for {code}: {err}")
+            finally:
+                self.payment_cycle_running = False
+        try:
+            if not self.payment_cycle_running:
+                self.payment_cycle_running = True
+                threading.Thread(target=worker, daemon=True).start()
+            self.root.after(PAYMENT_POLL_MS, self.schedule_payments)
+        except Exception as e:
+            self.payment_cycle_running = False
+            print(f"Error scheduling payments: {e}")
+
+    def _capture_settlement(self, conn, cursor, settlement_id, gateway_name):
+        """Capture every payment assigned to an open settlement and close it. Returns (count, amount)."""
+        cursor.execute("""SELECT payment_id, idempotency_key, amount FROM payments
+                          WHERE settlement_id = %s AND status = 'capturing'""", (settlement_id,))
+        rows = cursor.fetchall()
+        gateway = PAYMENT_GATEWAYS.get(gateway_name)
+        if not rows or gateway is None:
+            cursor.execute("UPDATE settlements SET status = 'empty' WHERE settlement_id = %s", (settlement_id,))
+            cursor.execute("UPDATE payments SET status = 'authorized', settlement_id = NULL WHERE settlement_id = %s AND status = 'capturing'",
+                           (settlement_id,))
+            conn.commit()
+            return 0, 0.0
+        batch_ref, results = gateway.capture_batch([(key, float(amount)) for _, key, amount in rows])
+        captured, failed, total = [], [], 0.0
+        for payment_id, key, amount in rows:
+            result = results.get(key) or PaymentResult('error', message="No result from gateway")
+            if result.status == 'approved':
+                captured.append((payment_id,))
+                total += float(amount)
+            else:
+                failed.append(((result.message or '')[:255], payment_id))
+        if captured:
+            cursor.executemany("UPDATE payments SET status = 'captured', last_error = NULL WHERE payment_id = %s", captured)
+        if failed:
+            # back to authorized with the reason; the next run tries the capture again
+            cursor.executemany("UPDATE payments SET status = 'authorized', settlement_id = NULL, last_error = %s WHERE payment_id = %s", failed)
+        cursor.execute("""UPDATE settlements SET status = 'settled', batch_ref = %s, payment_count = %s, amount = %s
+                          WHERE settlement_id = %s""", (batch_ref, len(captured), total, settlement_id))
+        conn.commit()
+        return len(captured), total
+
+    def settle_payments(self, property_code=None):
+        """
+        Capture authorized payments in batches of PAYMENT_SETTLE_BATCH per gateway, one
+        settlements row per batch. Open settlements left by a crash are finished first
+        (captures reuse the payment's key, so nothing is charged twice).
+        Silent; returns (captured_count, captured_amount, error_message).
+        """
+        code = property_code or self.property_code
+        conn, err = self.try_connect_silent(code)
         if not conn:
-            return False
+            return 0, 0.0, err
+        count, amount = 0, 0.0
         try:
             cursor = conn.cursor()
-            # insert guest
-            cursor.execute("INSERT INTO guests (name, phone) VALUES (%s, %s)", (name, phone))
-            guest_id = cursor.lastrowid
-            # insert reservation
-            cursor.execute(
-                """INSERT INTO reservations (guest_id, room_id, nights, services, total, payment)
-                   VALUES (%s, %s, %s, %s, %s, %s)""",
-                (guest_id, self.rooms[room]['id'], nights, ",".join(services), total, payment)
-            )
-            # update availability
-            cursor.execute("UPDATE rooms SET available = available - 1 WHERE room_id = %s", (self.rooms[room]['id'],))
-            conn.commit()
-            # refresh local cache
-            self.rooms = self.load_rooms()
-            return True
-        except mysql.connector.Error as e:
-            conn.rollback()
-            messagebox.showerror("Database Error", f"Failed to add reservation: {str(e)}")
-            return False
+            cursor.execute("""SELECT settlement_id, gateway FROM settlements
+                              WHERE status = 'open' AND created_at < NOW() - INTERVAL %s SECOND""", (PAYMENT_STALE_SECONDS,))
+            for settlement_id, gateway_name in cursor.fetchall():
+                n, a = self._capture_settlement(conn, cursor, settlement_id, gateway_name)
+                count, amount = count + n, amount + a
+            for gateway_name in PAYMENT_GATEWAYS:
+                while True:
+                    cursor.execute("""SELECT payment_id FROM payments
+                                      WHERE gateway = %s AND status = 'authorized'
+                                      ORDER BY payment_id
+                                      LIMIT %s
+                                      FOR UPDATE""", (gateway_name, PAYMENT_SETTLE_BATCH))
+                    ids = [row[0] for row in cursor.fetchall()]
+                    if not ids:
+                        conn.rollback()
+                        break
+                    cursor.execute("INSERT INTO settlements (gateway) VALUES (%s)", (gateway_name,))
+                    settlement_id = cursor.lastrowid
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cursor.execute(f"""UPDATE payments SET status = 'capturing', settlement_id = %s
+                                       WHERE payment_id IN ({placeholders})""", [settlement_id] + ids)
+                    conn.commit()
+                    n, a = self._capture_settlement(conn, cursor, settlement_id, gateway_name)
+                    count, amount = count + n, amount + a
+                    if len(ids) < PAYMENT_SETTLE_BATCH or n == 0:
+                        break
+            return count, amount, None
         except Exception as e:
             conn.rollback()
-            messagebox.showerror("Error", f"Unexpected error adding reservation: {str(e)}")
-            return False
+            return count, amount, f"Settlement failed: {str(e)}"
         finally:
             try:
                 conn.close()
             except:
                 pass
 
-    def get_reservations(self):
-        conn = self.connect()
+    def schedule_settlement(self):
+        """Run settle_payments() for every property now and every PAYMENT_SETTLE_INTERVAL_MS."""
+        def worker():
+            for code in list(self.properties):
+                count, amount, err = self.settle_payments(code)
+                if err:
+                    print(f"Error settling payments for {code}: {err}")
+                elif count:
+                    print(f"Settled {count} payment(s), ₱{amount:,.2f} for {code}")
+        try:
+            threading.Thread(target=worker, daemon=True).start()
+            self.root.after(PAYMENT_SETTLE_INTERVAL_MS, self.schedule_settlement)
+        except Exception as e:
+            print(f"Error scheduling settlement: {e}")
+
+    def get_payments(self, limit=RESERVATION_LIST_LIMIT, property_code=None):
+        """Most recent gateway payments as (payment_id, reservation_id, method, amount, status, attempts, settlement_id, updated_at, last_error)."""
+        conn = self.connect(property_code, readonly=True)
         if not conn:
             return []
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT r.reservation_id, g.name, g.phone, rm.room_type, r.nights, r.services, r.total, r.payment
-                FROM reservations r
-                LEFT JOIN guests g ON r.guest_id = g.guest_id
-                LEFT JOIN rooms rm ON r.room_id = rm.room_id
-                ORDER BY r.created_at DESC
-            """)
-            rows = cursor.fetchall()
-            return rows
+                SELECT payment_id, reservation_id, method, amount, status, attempts, settlement_id, updated_at, last_error
+                FROM payments
+                ORDER BY payment_id DESC
+                LIMIT %s
+            """, (limit,))
+            return cursor.fetchall()
         except mysql.connector.Error as e:
-            messagebox.showerror("Database Error", f"Failed to retrieve reservations: {str(e)}")
+            messagebox.showerror("Database Error", f"Failed to load payments: {str(e)}")
             return []
         except Exception as e:
-            messagebox.showerror("Error", f"Unexpected error retrieving reservations: {str(e)}")
+            messagebox.showerror("Error", f"Unexpected error loading payments: {str(e)}")
             return []
         finally:
             try:
@@ -227,74 +2537,90 @@ class HotelReservation:
             except:
                 pass
 
-    def get_reservations_filtered(self, query_text):
+    def retry_payments(self, payment_ids, property_code=None):
         """
-        Search reservations by guest name or phone (case-insensitive).
-        Returns rows similar to get_reservations().
+        Queue declined or failed payments for a fresh authorization under a new
+        idempotency key (the old key would replay the decline). Returns the count.
         """
-        conn = self.connect()
+        payment_ids = [int(p) for p in payment_ids]
+        if not payment_ids:
+            return 0
+        code = property_code or self.property_code
+        conn = self.connect(code)
         if not conn:
-            return []
+            return 0
         try:
             cursor = conn.cursor()
-            like_q = f"%{query_text}%"
-            cursor.execute("""
-                SELECT r.reservation_id, g.name, g.phone, rm.room_type, r.nights, r.services, r.total, r.payment
-                FROM reservations r
-                LEFT JOIN guests g ON r.guest_id = g.guest_id
-                LEFT JOIN rooms rm ON r.room_id = rm.room_id
-                WHERE g.name LIKE %s OR g.phone LIKE %s
-                ORDER BY r.created_at DESC
-            """, (like_q, like_q))
+            placeholders = ", ".join(["%s"] * len(payment_ids))
+            cursor.execute(f"""SELECT payment_id, reservation_id FROM payments
+                               WHERE payment_id IN ({placeholders}) AND status IN ('declined', 'failed')
+                               FOR UPDATE""", payment_ids)
             rows = cursor.fetchall()
-            return rows
+            generation = int(time.time())
+            cursor.executemany("""UPDATE payments SET status = 'pending', attempts = 0, next_attempt_at = NULL,
+                                         last_error = NULL, idempotency_key = %s
+                                  WHERE payment_id = %s""",
+                               [(payment_key(code, reservation_id, f"{generation}p{payment_id}"), payment_id)
+                                for payment_id, reservation_id in rows])
+            conn.commit()
+            self._note_write(code)
+            return len(rows)
         except mysql.connector.Error as e:
-            messagebox.showerror("Database Error", f"Search failed: {str(e)}")
-            return []
+            conn.rollback()
+            messagebox.showerror("Database Error", f"Failed to retry payments: {str(e)}")
+            return 0
         except Exception as e:
-            messagebox.showerror("Error", f"Unexpected error during search: {str(e)}")
-            return []
+            conn.rollback()
+            messagebox.showerror("Error", f"Unexpected error retrying payments: {str(e)}")
+            return 0
         finally:
             try:
                 conn.close()
             except:
                 pass
 
-    def delete_reservation(self, res_id):
-        conn = self.connect()
+    # ---------- Receipts ----------
+    def get_receipt_records(self, checkout_day, property_code=None):
+        """Reservations for stays checking out on checkout_day."""
+        conn = self.connect(property_code, readonly=True)
         if not conn:
-            return False
+            return []
         try:
             cursor = conn.cursor()
-            # return room availability (if possible)
-            cursor.execute("SELECT room_id FROM reservations WHERE reservation_id = %s", (res_id,))
-            row = cursor.fetchone()
-            if row and row[0]:
-                cursor.execute("UPDATE rooms SET available = available + 1 WHERE room_id = %s", (row[0],))
-            cursor.execute("DELETE FROM reservations WHERE reservation_id = %s", (res_id,))
-            conn.commit()
-            # refresh local cache so future Room Selection shows updated availability
-            self.rooms = self.load_rooms()
-            return True
+            cursor.execute(f"""
+                SELECT {Reservation.COLUMNS}{RESERVATION_JOINS}
+                WHERE r.created_at < %s
+                  AND DATE(r.created_at) + INTERVAL r.nights DAY = %s
+                ORDER BY r.reservation_id
+            """, (checkout_day, checkout_day))
+            return Reservation.from_rows(cursor.fetchall(), property_code or self.property_code)
         except mysql.connector.Error as e:
-            conn.rollback()
-            messagebox.showerror("Database Error", f"Failed to delete reservation: {str(e)}")
-            return False
+            messagebox.showerror("Database Error", f"Failed to load receipts: {str(e)}")
+            return []
         except Exception as e:
-            conn.rollback()
-            messagebox.showerror("Error", f"Unexpected error deleting reservation: {str(e)}")
-            return False
+            messagebox.showerror("Error", f"Unexpected error loading receipts: {str(e)}")
+            return []
         finally:
             try:
                 conn.close()
             except:
                 pass
 
+    def export_receipts_for_day(self, checkout_day, fmt='pdf', property_code=None):
+        """Render every receipt for checkout_day into receipts/<property>/<day>/. Returns (count, folder)."""
+        records = self.get_receipt_records(checkout_day, property_code)
+        output_dir = os.path.join(RECEIPT_OUTPUT_DIR, property_code or self.property_code, checkout_day.isoformat())
+        if not records:
+            return 0, output_dir
+        paths = render_receipts_batch(records, output_dir, fmt, hotel=self.property_name(property_code))
+        return len(paths), output_dir
+
     # ---------- UI Helpers ----------
     def clear_window(self):
         try:
             for widget in self.root.winfo_children():
-                widget.destroy()
+                if widget is not self.db_banner:
+                    widget.destroy()
         except Exception as e:
             print(f"Error clearing window: {e}")
 
@@ -411,15 +2737,7 @@ class HotelReservation:
     # ---------- Validation helpers ----------
     def validate_phone_number(self, phone):
         """Validate that phone number is exactly 11 digits"""
-        try:
-            # Remove common separators
-            cleaned = phone.replace('-', '').replace(' ', '').replace('+', '')
-            # Check if it's exactly 11 digits
-            if len(cleaned) == 11 and cleaned.isdigit():
-                return True, cleaned
-            return False, None
-        except Exception:
-            return False, None
+        return validate_phone_number(phone)
 
     # ---------- Cancel behavior & pending reset ----------
     def reset_pending(self):
@@ -431,7 +2749,8 @@ class HotelReservation:
                 "room": None,
                 "services": [],
                 "payment": None,
-                "total": 0.0
+                "total": 0.0,
+                "hold": None
             }
         except Exception as e:
             print(f"Error resetting pending: {e}")
@@ -449,6 +2768,7 @@ class HotelReservation:
                         current_toplevel.destroy()
                 except Exception:
                     pass
+                self.release_hold()
                 self.reset_pending()
                 # reload rooms/services from DB to ensure consistent state
                 self.rooms = self.load_rooms()
@@ -467,12 +2787,31 @@ class HotelReservation:
             header_frame = tk.Frame(main_frame, bg=self.colors['primary'], height=200)
             header_frame.pack(fill='x')
             header_frame.pack_propagate(False)
-            tk.Label(header_frame, text="LitHo Hotel", font=('Segoe UI', 36, 'bold'), bg=self.colors['primary'], fg=self.colors['white']).pack(expand=True, pady=(40, 10))
+            tk.Label(header_frame, text=self.property_name(), font=('Segoe UI', 36, 'bold'), bg=self.colors['primary'], fg=self.colors['white']).pack(expand=True, pady=(40, 10))
             tk.Label(header_frame, text="by: Christen Jefferson Escollar", font=('Segoe UI', 14), bg=self.colors['primary'], fg=self.colors['white']).pack()
 
             content_frame = tk.Frame(main_frame, bg=self.colors['light'])
             content_frame.pack(fill='both', expand=True, pady=50)
 
+            # property picker (only when this install serves more than one hotel)
+            if len(self.properties) > 1:
+                picker_frame = tk.Frame(content_frame, bg=self.colors['light'])
+                picker_frame.pack(pady=(0, 10))
+                tk.Label(picker_frame, text="Property:", font=self.fonts['body_bold'], bg=self.colors['light'], fg=self.colors['dark_text']).pack(side='left', padx=(0,8))
+                codes = list(self.properties)
+                property_var = tk.StringVar(value=self.property_name())
+                picker = ttk.Combobox(picker_frame, textvariable=property_var, state='readonly', width=30,
+                                      values=[self.property_name(c) for c in codes])
+                picker.pack(side='left')
+
+                def on_property_change(event=None):
+                    try:
+                        self.switch_property(codes[picker.current()])
+                        self.show_welcome()
+                    except Exception as e:
+                        print(f"Error changing property: {e}")
+                picker.bind("<<ComboboxSelected>>", on_property_change)
+
             button_frame = tk.Frame(content_frame, bg=self.colors['light'])
             button_frame.pack(expand=True)
 
@@ -543,7 +2882,16 @@ class HotelReservation:
             self.pending['services'] = []
             self.pending['payment'] = None
             self.pending['total'] = 0.0
+            self.release_hold()
+
+            self.show_room_selection()
+        except Exception as e:
+            print(f"Error in room_selection: {e}")
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def show_room_selection(self):
+        """Room & services screen for the pending guest (also the fallback when a hold is lost)."""
+        try:
             # refresh rooms/services (in case availability changed)
             self.rooms = self.load_rooms()
             self.services = self.load_services()
@@ -574,7 +2922,7 @@ class HotelReservation:
             else:
                 tk.Label(room_content, text="Select Room Type:", font=self.fonts['body_bold'], bg=self.colors['card'], fg=self.colors['dark_text']).pack(anchor='w', pady=(0,5))
                 for room_name, details in self.rooms.items():
-                    display = f"{room_name} - ₱{details['price']}/night (Available: {details['available']})"
+                    display = f"{room_name} - ₱{details.price}/night (Available: {self.sellable(room_name)})"
                     tk.Radiobutton(room_content, text=display, variable=self.room_choice, value=room_name, font=self.fonts['body'], bg=self.colors['card'], fg=self.colors['dark_text'], selectcolor=self.colors['light']).pack(anchor='w', padx=10, pady=2)
 
             # Services card
@@ -585,7 +2933,8 @@ class HotelReservation:
                 info.pack(anchor='w', pady=(5, 10))
             else:
                 tk.Label(services_content, text="Select Extra Services:", font=self.fonts['body_bold'], bg=self.colors['card'], fg=self.colors['dark_text']).pack(anchor='w', pady=(0,5))
-                for sname, sprice in self.services.items():
+                for sname, service in self.services.items():
+                    sprice = service.price
                     var = tk.IntVar()
                     tk.Checkbutton(services_content, text=f"{sname} - ₱{sprice}", variable=var, font=self.fonts['body'], bg=self.colors['card'], fg=self.colors['dark_text']).pack(anchor='w', padx=10, pady=2)
                     self.service_vars[sname] = var
@@ -605,6 +2954,16 @@ class HotelReservation:
             btn_container = tk.Frame(button_frame, bg=self.colors['light'])
             btn_container.pack()
 
+            def offer_waitlist(room):
+                if not messagebox.askyesno("Unavailable", f"Sorry, this room type is not available.\n\n"
+                                           f"Add {self.pending['name']} to the {room} waitlist? They will be booked "
+                                           "automatically (payment at check-in) when a unit is freed."):
+                    return
+                if self.join_waitlist(room):
+                    messagebox.showinfo("Waitlist", f"{self.pending['name']} has been added to the {room} waitlist.")
+                    self.reset_pending()
+                    self.show_welcome()
+
             def proceed():
                 try:
                     room = self.room_choice.get()
@@ -614,17 +2973,22 @@ class HotelReservation:
                     if not room:
                         messagebox.showwarning("Selection Required", "Please select a room type.")
                         return
-                    if self.rooms[room]['available'] <= 0:
-                        messagebox.showerror("Unavailable", "Sorry, this room type is not available.")
-                        return
                     selected_services = [s for s, v in self.service_vars.items() if v.get() == 1]
                     nights_local = self.pending['nights']
-                    room_cost = self.rooms[room]['price'] * nights_local
-                    service_cost = sum(self.services[s] for s in selected_services) if selected_services else 0.0
+                    room_cost = self.rooms[room].price * nights_local
+                    service_cost = sum(self.services[s].price for s in selected_services) if selected_services else 0.0
                     total = room_cost + service_cost
                     self.pending['room'] = room
                     self.pending['services'] = selected_services
                     self.pending['total'] = total
+                    if self.sellable(room) <= 0:
+                        offer_waitlist(room)
+                        return
+                    # hold a unit while the clerk finishes payment and review
+                    if not self.place_hold(room):
+                        messagebox.showerror("Unavailable", "Sorry, the last unit of this room type was just taken.")
+                        self.show_room_selection()
+                        return
                     self.show_payment_method()
                 except Exception as e:
                     print(f"Error in proceed: {e}")
@@ -635,7 +2999,7 @@ class HotelReservation:
             # Cancel Reservation goes to home
             self.create_hotelreservation_button(btn_container, "Cancel Reservation", lambda: self.confirm_cancel(), 'danger', 250)
         except Exception as e:
-            print(f"Error in room_selection: {e}")
+            print(f"Error in show_room_selection: {e}")
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
     def _bind_preview_traces(self):
@@ -669,10 +3033,11 @@ class HotelReservation:
             total = 0.0
             room_selected = getattr(self, 'room_choice', tk.StringVar()).get() if hasattr(self, 'room_choice') else ""
             if room_selected and room_selected in self.rooms:
-                total += self.rooms[room_selected]['price'] * nights
+                total += self.rooms[room_selected].price * nights
             for s, var in getattr(self, 'service_vars', {}).items():
                 if var.get() == 1:
-                    total += float(self.services.get(s, 0.0))
+                    service = self.services.get(s)
+                    total += service.price if service else 0.0
             if hasattr(self, 'total_preview_label'):
                 self.total_preview_label.config(text=f"Total Preview: ₱{total:.2f}")
         except Exception as e:
@@ -680,9 +3045,13 @@ class HotelReservation:
 
     def _on_test_db(self):
         try:
+            # an explicit test always gets a real attempt, even with the breaker open
+            self.breakers[self.property_code].record_success()
             conn, err = self.try_connect_silent()
             if conn:
                 conn.close()
+                if not any(not b.allow() for b in self.breakers.values()):
+                    self._hide_db_banner()
                 self.rooms = self.load_rooms()
                 self.services = self.load_services()
                 messagebox.showinfo("DB Test", "Connected to database and loaded data. Refreshing room selection...")
@@ -696,15 +3065,15 @@ class HotelReservation:
     def _load_sample_data(self):
         try:
             self.rooms = {
-                "Single Room": {"id": 1, "price": 1200.0, "available": 5},
-                "Double Room": {"id": 2, "price": 2000.0, "available": 4},
-                "Family Suite": {"id": 3, "price": 3500.0, "available": 5},
-                "Deluxe Room": {"id": 4, "price": 4000.0, "available": 5}
+                "Single Room": Room(1, "Single Room", 1200.0, 5),
+                "Double Room": Room(2, "Double Room", 2000.0, 4),
+                "Family Suite": Room(3, "Family Suite", 3500.0, 5),
+                "Deluxe Room": Room(4, "Deluxe Room", 4000.0, 5)
             }
             self.services = {
-                "Parking Space": 100.0,
-                "Room Service": 200.0,
-                "Shuttle Service": 300.0
+                "Parking Space": Service("Parking Space", 100.0),
+                "Room Service": Service("Room Service", 200.0),
+                "Shuttle Service": Service("Shuttle Service", 300.0)
             }
             messagebox.showinfo("Sample Data", "Sample rooms and services loaded (for testing).")
             self.room_selection()
@@ -717,6 +3086,7 @@ class HotelReservation:
             # Refresh local data in case it changed
             self.rooms = self.load_rooms()
             self.services = self.load_services()
+            self.renew_hold()
 
             self.clear_window()
             main_frame = tk.Frame(self.root, bg=self.colors['light'])
@@ -732,7 +3102,7 @@ class HotelReservation:
 
             payment_card, payment_content = self.create_card_frame(content_frame, "Payment Method")
             self.payment_choice = tk.StringVar(value="Cash")
-            self.create_radio_group(payment_content, "Select Payment Method:", ["Cash", "Credit Card", "GCash", "Bank Transfer"], self.payment_choice)
+            self.create_radio_group(payment_content, "Select Payment Method:", PAYMENT_METHODS, self.payment_choice)
 
             total_label = tk.Label(payment_content, text=f"Total to pay: ₱{self.pending.get('total', 0.0):.2f}", font=self.fonts['body_bold'], bg=self.colors['card'], fg=self.colors['dark_text'])
             total_label.pack(anchor='e', pady=(10,0))
@@ -788,6 +3158,7 @@ class HotelReservation:
 
     def show_review(self):
         try:
+            self.renew_hold()
             self.clear_window()
             main_frame = tk.Frame(self.root, bg=self.colors['light'])
             main_frame.pack(fill='both', expand=True)
@@ -847,19 +3218,22 @@ class HotelReservation:
             payment = self.pending['payment']
             total = self.pending['total']
 
-            # Final availability check
-            if room not in self.rooms or self.rooms[room]['available'] <= 0:
+            # Final availability check (a live hold already guarantees the unit)
+            hold = self.pending.get('hold')
+            if not (hold and self.renew_hold()) and (room not in self.rooms or self.sellable(room) <= 0):
                 messagebox.showerror("Unavailable", "Sorry, this room type is no longer available.")
-                self.room_selection()
+                self.show_room_selection()
                 return
 
-            if self.add_reservation(name, phone, room, nights, services, total, payment):
+            if self.add_reservation(name, phone, room, nights, services, total, payment, hold=self.pending.get('hold')):
+                # the hold was consumed by the booking
+                self.pending['hold'] = None
                 # local cache already refreshed inside add_reservation
                 # show receipt in toplevel
                 self.generate_receipt(name, phone, room, nights, services, total, payment)
             else:
-                messagebox.showerror("Error", "Failed to create reservation. Please try again.")
-                self.room_selection()
+                # add_reservation (or connect) has already told the clerk why
+                self.show_room_selection()
         except Exception as e:
             print(f"Error in finalize_reservation: {e}")
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
@@ -911,6 +3285,18 @@ class HotelReservation:
                 self.reset_pending()
                 self.show_welcome()
 
+            def on_save_receipt():
+                try:
+                    reservation = Reservation(self.last_reservation_id, name, phone, room, nights, services,
+                                              total, payment, datetime.now(), self.property_code)
+                    output_dir = os.path.join(RECEIPT_OUTPUT_DIR, self.property_code, date.today().isoformat())
+                    path = render_receipts_batch([reservation], output_dir, 'pdf', hotel=self.property_name())[0]
+                    messagebox.showinfo("Receipt Saved", f"Receipt saved to:\n{os.path.abspath(path)}", parent=receipt_window)
+                except Exception as e:
+                    print(f"Error saving receipt: {e}")
+                    messagebox.showerror("Error", f"Could not save receipt: {str(e)}", parent=receipt_window)
+
+            self.create_hotelreservation_button(content_frame, "💾 Save PDF", on_save_receipt, 'secondary', 150)
             self.create_hotelreservation_button(content_frame, "✓ Close", on_close_receipt, 'primary', 150)
         except Exception as e:
             print(f"Error generating receipt: {e}")
@@ -923,10 +3309,9 @@ class HotelReservation:
             self.rooms = self.load_rooms()
             self.services = self.load_services()
 
-            rows = self.get_reservations()
             # always create a Toplevel so staff can keep main window open
             view_window = tk.Toplevel(self.root)
-            view_window.title("Reservation Management - LitHo Hotel")
+            view_window.title(f"Reservation Management - {self.property_name()}")
             view_window.geometry("1200x700")
             view_window.configure(bg=self.colors['light'])
 
@@ -947,13 +3332,37 @@ class HotelReservation:
             search_entry = tk.Entry(search_frame, textvariable=search_var, font=self.fonts['body'], width=40)
             search_entry.pack(side='left', padx=(0,8))
 
+            multi_property = len(self.properties) > 1
+            all_label = "All properties"
+            scope_var = tk.StringVar(value=self.property_name())
+
+            def scope_code():
+                """Property chosen in the scope list, or None for all properties."""
+                if multi_property and scope_var.get() == all_label:
+                    return None
+                return next((c for c in self.properties if self.property_name(c) == scope_var.get()), self.property_code)
+
+            def fetch_rows(query_text=None):
+                """Reservations for the chosen scope; query_text None lists."""
+                include_archive = archive_var.get()
+                code = scope_code()
+                if code is None:
+                    found, errors = self.get_reservations_all_properties(query_text, include_archive)
+                    if errors:
+                        messagebox.showwarning("Partial Results", "Some properties could not be reached:\n\n" +
+                                               "\n".join(f"{self.property_name(c)}: {err}" for c, err in errors.items()))
+                    return found
+                if query_text is None:
+                    return self.get_reservations(include_archive=include_archive, property_code=code)
+                return self.get_reservations_filtered(query_text, include_archive=include_archive, property_code=code)
+
             def do_search():
                 try:
                     q = search_var.get().strip()
                     if not q:
                         messagebox.showinfo("Search", "Please enter a name or phone number to search.")
                         return
-                    results = self.get_reservations_filtered(q)
+                    results = fetch_rows(q)
                     populate_tree(results)
                 except Exception as e:
                     print(f"Error in do_search: {e}")
@@ -962,16 +3371,28 @@ class HotelReservation:
             search_btn = tk.Button(search_frame, text="🔍 Search", command=do_search, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=10, pady=6)
             search_btn.pack(side='left', padx=(0,8))
 
-            reset_btn = tk.Button(search_frame, text="Show All", command=lambda: populate_tree(self.get_reservations()), bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=10, pady=6)
+            reset_btn = tk.Button(search_frame, text="Show All", command=lambda: populate_tree(fetch_rows()), bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=10, pady=6)
             reset_btn.pack(side='left')
 
+            archive_var = tk.BooleanVar(value=False)
+            tk.Checkbutton(search_frame, text="Include archived", variable=archive_var, font=self.fonts['body'],
+                           bg=self.colors['light'], fg=self.colors['dark_text']).pack(side='left', padx=(8,0))
+
+            if multi_property:
+                ttk.Combobox(search_frame, textvariable=scope_var, state='readonly', width=22,
+                             values=[self.property_name(c) for c in self.properties] + [all_label]).pack(side='left', padx=(8,0))
+
             # Card for tree view
             tree_card, tree_content = self.create_card_frame(content_frame, "Current Reservations")
             tree_card.pack(fill='both', expand=True)
 
             # Treeview and scrollbars
-            columns = ('ID', 'Guest Name', 'Phone', 'Room', 'Nights', 'Services', 'Total', 'Payment')
-            tree = ttk.Treeview(tree_content, columns=columns, show='headings', selectmode='browse')
+            columns = ('ID', 'Guest Name', 'Phone', 'Room', 'Room No.', 'Nights', 'Services', 'Total', 'Payment')
+            column_widths = [60, 180, 140, 140, 80, 80, 200, 110, 120]
+            if multi_property:
+                columns += ('Property',)
+                column_widths.append(160)
+            tree = ttk.Treeview(tree_content, columns=columns, show='headings', selectmode='extended')
             v_scrollbar = ttk.Scrollbar(tree_content, orient='vertical', command=tree.yview)
             h_scrollbar = ttk.Scrollbar(tree_content, orient='horizontal', command=tree.xview)
             tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
@@ -981,12 +3402,12 @@ class HotelReservation:
             tree.pack(fill='both', expand=True)
 
             # configure columns
-            column_widths = [60, 180, 140, 140, 80, 200, 110, 120]
             for col, w in zip(columns, column_widths):
                 tree.heading(col, text=col)
                 tree.column(col, width=w, anchor='w')
 
-            # function to populate tree
+            # function to populate tree from Reservations;
+            # item ids are "<property_code>:<reservation_id>" so actions route to the right database
             def populate_tree(rows_to_show):
                 try:
                     # clear existing
@@ -995,21 +3416,18 @@ class HotelReservation:
                     if not rows_to_show:
                         # show placeholder row
                         return
-                    for row in rows_to_show:
-                        try:
-                            res_id, name, phone, room, nights, services, total, payment = row
-                        except Exception:
-                            # defensive unpack
-                            vals = tuple(row)
-                            vals = tuple(list(vals)[:8] + [""] * (8 - len(vals)))
-                            res_id, name, phone, room, nights, services, total, payment = vals
-                        display_total = f"₱{total}" if total != "" else ""
-                        tree.insert('', 'end', values=(res_id, name, phone, room, nights, services, display_total, payment))
+                    for res in rows_to_show:
+                        display_total = f"₱{res.total}" if res.total is not None else ""
+                        values = (res.reservation_id, res.guest_name or "", res.phone or "", res.room_type or "",
+                                  res.room_number or "", res.nights, res.services or "", display_total, res.payment or "")
+                        if multi_property:
+                            values += (self.property_name(res.property_code),)
+                        tree.insert('', 'end', iid=f"{res.property_code}:{res.reservation_id}", values=values)
                 except Exception as e:
                     print(f"Error populating tree: {e}")
 
             # initial populate
-            populate_tree(rows)
+            populate_tree(fetch_rows())
 
             # bottom button frame
             btn_frame = tk.Frame(content_frame, bg=self.colors['light'])
@@ -1021,33 +3439,194 @@ class HotelReservation:
                 try:
                     self.rooms = self.load_rooms()
                     self.services = self.load_services()
-                    rows_now = self.get_reservations()
+                    rows_now = fetch_rows()
                     populate_tree(rows_now)
+                    if self.occupancy_refresh:
+                        self.occupancy_refresh()
                     messagebox.showinfo("Refreshed", "Reservation list updated.")
                 except Exception as e:
                     print(f"Error in refresh_tree: {e}")
                     messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+            # property_code -> reservation ids from the last cancellation, for Undo
+            last_cancelled = {}
+
             def delete_selected():
                 try:
                     selected = tree.selection()
                     if not selected:
-                        messagebox.showwarning("Selection Required", "Please select a reservation to remove.")
+                        messagebox.showwarning("Selection Required", "Please select one or more reservations to remove.")
                         return
-                    item = selected[0]
-                    values = tree.item(item, 'values')
-                    res_id = values[0]
-                    guest_name = values[1]
-                    if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to remove the reservation for {guest_name}?\n\nThis action cannot be undone."):
-                        if self.delete_reservation(res_id):
-                            messagebox.showinfo("Success", "Reservation removed successfully.")
+                    by_property = {}
+                    for item in selected:
+                        code, res_id = item.split(':', 1)
+                        by_property.setdefault(code, []).append(res_id)
+                    if len(selected) == 1:
+                        prompt = f"Are you sure you want to remove the reservation for {tree.item(selected[0], 'values')[1]}?"
+                    else:
+                        prompt = f"Are you sure you want to remove {len(selected)} reservations?"
+                    if messagebox.askyesno("Confirm Deletion", prompt + "\n\nYou can undo this from this window."):
+                        last_cancelled.clear()
+                        removed, filled, failed = 0, 0, False
+                        for code, ids in by_property.items():
+                            count = self.cancel_reservations(ids, property_code=code)
+                            if count is None:
+                                failed = True
+                                continue
+                            removed += count
+                            filled += len(self.last_waitlist_filled)
+                            last_cancelled[code] = ids
+                        if removed:
+                            message = f"{removed} reservation(s) removed successfully."
+                            if filled:
+                                message += f"\n\n{filled} waitlisted guest(s) were booked into the freed rooms."
+                            messagebox.showinfo("Success", message)
                             refresh_tree()
-                        else:
+                        elif not failed:
                             messagebox.showerror("Error", "Failed to remove reservation. Please try again.")
                 except Exception as e:
                     print(f"Error in delete_selected: {e}")
                     messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+            def undo_delete():
+                try:
+                    if not last_cancelled:
+                        messagebox.showinfo("Undo", "Nothing to undo.")
+                        return
+                    restored, errors = 0, []
+                    for code, ids in list(last_cancelled.items()):
+                        count, err = self.restore_reservations(ids, property_code=code)
+                        if err:
+                            errors.append(err)
+                        else:
+                            restored += count
+                            del last_cancelled[code]
+                    if errors:
+                        messagebox.showerror("Undo", "\n".join(errors))
+                    if restored:
+                        messagebox.showinfo("Undo", f"{restored} reservation(s) restored.")
+                        refresh_tree()
+                except Exception as e:
+                    print(f"Error in undo_delete: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def check_indexes():
+                try:
+                    problems = self.explain_hot_queries(scope_code())
+                    if problems is None:
+                        return
+                    if problems:
+                        messagebox.showwarning("Query Plans", "Hot queries are not using their indexes:\n\n" + "\n".join(problems))
+                    else:
+                        messagebox.showinfo("Query Plans", "Listing and search queries are using their indexes.")
+                except Exception as e:
+                    print(f"Error in check_indexes: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def export_receipts():
+                try:
+                    day_text = simpledialog.askstring("Export Receipts", "Checkout date (YYYY-MM-DD):",
+                                                      initialvalue=date.today().isoformat(), parent=view_window)
+                    if not day_text:
+                        return
+                    try:
+                        checkout_day = datetime.strptime(day_text.strip(), '%Y-%m-%d').date()
+                    except ValueError:
+                        messagebox.showwarning("Invalid Date", "Please enter the date as YYYY-MM-DD.", parent=view_window)
+                        return
+                    view_window.config(cursor='watch')
+                    view_window.update_idletasks()
+                    try:
+                        count, folder = self.export_receipts_for_day(checkout_day, property_code=scope_code())
+                    finally:
+                        view_window.config(cursor='')
+                    if count:
+                        messagebox.showinfo("Export Receipts", f"{count} receipt(s) written to:\n{os.path.abspath(folder)}", parent=view_window)
+                    else:
+                        messagebox.showinfo("Export Receipts", f"No checkouts on {checkout_day.isoformat()}.", parent=view_window)
+                except Exception as e:
+                    print(f"Error in export_receipts: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def assign_rooms():
+                try:
+                    allow_moves = messagebox.askyesno(
+                        "Assign Rooms",
+                        "Repack upcoming stays to close gaps between bookings?\n\n"
+                        "Yes: upcoming guests may get a different room number.\n"
+                        "No: only stays without a room (or with a clash) are assigned.",
+                        parent=view_window)
+                    summary = self.optimize_room_assignments(allow_moves, property_code=scope_code())
+                    if summary is None:
+                        return
+                    message = (f"{summary['stays']} current/upcoming stays checked in {summary['seconds']:.2f}s.\n"
+                               f"{summary['changed']} room assignment(s) updated, {summary['moved']} of them moves.")
+                    if summary['units_created']:
+                        message += f"\n{summary['units_created']} room number(s) created for room types without any."
+                    if summary['unassigned']:
+                        message += f"\n\n{summary['unassigned']} stay(s) could not be given a room (overbooked)."
+                    messagebox.showinfo("Assign Rooms", message, parent=view_window)
+                    refresh_tree()
+                except Exception as e:
+                    print(f"Error in assign_rooms: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def show_waitlist():
+                try:
+                    self.view_waitlist(view_window, scope_code())
+                except Exception as e:
+                    print(f"Error in show_waitlist: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def audit_inventory():
+                try:
+                    code = scope_code()
+                    view_window.config(cursor='watch')
+                    view_window.update_idletasks()
+                    try:
+                        report, err = self.audit_inventory(property_code=code)
+                    finally:
+                        view_window.config(cursor='')
+                    if err:
+                        messagebox.showerror("Inventory Audit", err, parent=view_window)
+                        return
+                    summary = self.format_audit_report(report)
+                    if not report['drift']:
+                        messagebox.showinfo("Inventory Audit", summary, parent=view_window)
+                        return
+                    if messagebox.askyesno("Inventory Audit", summary + "\n\nRepair the availability counters now?", parent=view_window):
+                        repaired, err = self._repair_availability(code, [row[0] for row in report['drift']])
+                        if err:
+                            messagebox.showerror("Inventory Audit", err, parent=view_window)
+                            return
+                        self._note_write(code)
+                        self._refresh_rooms_cache(code)
+                        messagebox.showinfo("Inventory Audit", f"{repaired} availability counter(s) repaired.", parent=view_window)
+                except Exception as e:
+                    print(f"Error in audit_inventory: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def show_payments():
+                try:
+                    self.view_payments(view_window, scope_code())
+                except Exception as e:
+                    print(f"Error in show_payments: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def show_occupancy():
+                try:
+                    self.view_occupancy(view_window, scope_code())
+                except Exception as e:
+                    print(f"Error in show_occupancy: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def show_forecast():
+                try:
+                    self.view_forecast(view_window, scope_code())
+                except Exception as e:
+                    print(f"Error in show_forecast: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
             def close_view():
                 try:
                     view_window.destroy()
@@ -1056,15 +3635,433 @@ class HotelReservation:
 
             # buttons
             tk.Button(container, text="🗑️ Remove Selected", command=delete_selected, bg=self.colors['accent'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(container, text="↩️ Undo Remove", command=undo_delete, bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
             tk.Button(container, text="🔄 Refresh", command=refresh_tree, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
             tk.Button(container, text="⬅️ Close", command=close_view, bg=self.colors['primary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            # tools below work on one property: the scope's, and are disabled for "All properties".
+            # They get their own rows so Close stays on screen at the window's 1200px width.
+            tools = tk.Frame(btn_frame, bg=self.colors['light'])
+            tools.pack(pady=(6, 0))
+            property_tools = [
+                tk.Button(tools, text="🛏️ Assign Rooms", command=assign_rooms, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="⏳ Waitlist", command=show_waitlist, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="💳 Payments", command=show_payments, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="📅 Occupancy", command=show_occupancy, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="📈 Forecast", command=show_forecast, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="🧾 Export Receipts", command=export_receipts, bg=self.colors['success'], fg=self.colors['white'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="🧮 Audit Inventory", command=audit_inventory, bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10),
+                tk.Button(tools, text="🧪 Check Indexes", command=check_indexes, bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10)
+            ]
+            for i, button in enumerate(property_tools):
+                button.grid(row=i // 4, column=i % 4, padx=10, pady=4, sticky='ew')
+
+            def on_scope_change(*args):
+                state = 'disabled' if scope_code() is None else 'normal'
+                for button in property_tools:
+                    button.config(state=state)
+            scope_var.trace_add('write', on_scope_change)
+            on_scope_change()
         except Exception as e:
             print(f"Error in view_reservations: {e}")
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def view_waitlist(self, parent, property_code=None):
+        """Waiting guests for a property (the active one by default), in the order they will be booked."""
+        try:
+            window = tk.Toplevel(parent)
+            window.title(f"Waitlist - {self.property_name(property_code)}")
+            window.geometry("900x500")
+            window.configure(bg=self.colors['light'])
+
+            card, content = self.create_card_frame(window, "Waitlist (next booked first)")
+            columns = ('ID', 'Guest Name', 'Phone', 'Room', 'Nights', 'Priority', 'Since')
+            tree = ttk.Treeview(content, columns=columns, show='headings', selectmode='extended')
+            v_scrollbar = ttk.Scrollbar(content, orient='vertical', command=tree.yview)
+            tree.configure(yscrollcommand=v_scrollbar.set)
+            v_scrollbar.pack(side='right', fill='y')
+            tree.pack(fill='both', expand=True)
+            for col, w in zip(columns, [60, 180, 130, 140, 70, 70, 150]):
+                tree.heading(col, text=col)
+                tree.column(col, width=w, anchor='w')
+
+            def populate():
+                for item in tree.get_children():
+                    tree.delete(item)
+                for entry_id, name, phone, room, nights, priority, created_at in self.get_waitlist(property_code):
+                    since = created_at.strftime('%Y-%m-%d %H:%M') if created_at else ""
+                    tree.insert('', 'end', iid=str(entry_id), values=(entry_id, name or "", phone or "", room, nights, priority, since))
+
+            def remove_selected():
+                try:
+                    selected = tree.selection()
+                    if not selected:
+                        messagebox.showwarning("Selection Required", "Please select one or more waitlist entries.", parent=window)
+                        return
+                    if messagebox.askyesno("Confirm", f"Remove {len(selected)} waitlist entr{'y' if len(selected) == 1 else 'ies'}?", parent=window):
+                        if self.remove_waitlist_entries(selected, property_code):
+                            populate()
+                except Exception as e:
+                    print(f"Error removing waitlist entries: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            populate()
+            btn_frame = tk.Frame(window, bg=self.colors['light'])
+            btn_frame.pack(pady=10)
+            tk.Button(btn_frame, text="🗑️ Remove Selected", command=remove_selected, bg=self.colors['accent'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="⬅️ Close", command=window.destroy, bg=self.colors['primary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+        except Exception as e:
+            print(f"Error in view_waitlist: {e}")
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def view_forecast(self, parent, property_code=None):
+        """Projected occupancy and revenue per room type for a property (the active one by default)."""
+        try:
+            code = property_code or self.property_code
+            window = tk.Toplevel(parent)
+            window.title(f"Forecast - {self.property_name(code)}")
+            window.geometry("900x420")
+            window.configure(bg=self.colors['light'])
+
+            card, content = self.create_card_frame(window, f"Projected occupancy (next {FORECAST_HORIZON_DAYS} nights)")
+            columns = ('Room', 'Rooms', 'Next 7 Days', 'Next 30 Days', f'Next {FORECAST_HORIZON_DAYS} Days', 'Projected Revenue', 'Peak Night')
+            tree = ttk.Treeview(content, columns=columns, show='headings')
+            tree.pack(fill='both', expand=True)
+            for col, w in zip(columns, [160, 70, 100, 100, 100, 150, 150]):
+                tree.heading(col, text=col)
+                tree.column(col, width=w, anchor='w')
+            status = tk.Label(window, text="", font=('Segoe UI', 10), bg=self.colors['light'], fg=self.colors['dark_text'])
+            status.pack()
+
+            def populate(full=False):
+                window.config(cursor='watch')
+                window.update_idletasks()
+                try:
+                    forecast = self.get_forecast(full=full, property_code=code)
+                finally:
+                    window.config(cursor='')
+                if forecast is None:
+                    return
+                for item in tree.get_children():
+                    tree.delete(item)
+                today = date.today()
+                for room_type, capacity, sold, revenue in forecast:
+                    def pct(days):
+                        return f"{100 * sold[:days].mean() / capacity:.0f}%" if capacity else "-"
+                    peak = int(sold.argmax())
+                    peak_text = f"{(today + timedelta(days=peak)).isoformat()} ({sold[peak]:.1f})"
+                    tree.insert('', 'end', values=(room_type, capacity, pct(7), pct(30), pct(FORECAST_HORIZON_DAYS),
+                                                   f"₱{revenue.sum():,.2f}", peak_text))
+                forecaster = self.forecasters.get(code)
+                if forecaster is not None and forecaster.synced_at is not None:
+                    status.config(text=f"History synced {forecaster.synced_at:%Y-%m-%d %H:%M}")
+
+            populate()
+            btn_frame = tk.Frame(window, bg=self.colors['light'])
+            btn_frame.pack(pady=10)
+            tk.Button(btn_frame, text="🔄 Refresh", command=populate, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="♻️ Full Refit", command=lambda: populate(full=True), bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="⬅️ Close", command=window.destroy, bg=self.colors['primary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+        except Exception as e:
+            print(f"Error in view_forecast: {e}")
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def view_occupancy(self, parent, property_code=None):
+        """
+        Room type x night occupancy heatmap for a property (the active one by default), drawn on one canvas
+        (one rectangle per cell). Scrolling moves the canvas view, zooming rescales the
+        existing items, and refreshes recolour only the cells whose count changed.
+        """
+        try:
+            first_day = date.today() - timedelta(days=OCCUPANCY_PAST_DAYS)
+            data = self.get_occupancy_grid(first_day, property_code=property_code)
+            if data is None:
+                return
+            window = tk.Toplevel(parent)
+            window.title(f"Occupancy - {self.property_name(property_code)}")
+            window.geometry("1100x520")
+            window.configure(bg=self.colors['light'])
+
+            last_day = first_day + timedelta(days=OCCUPANCY_DAYS - 1)
+            card, content = self.create_card_frame(window, f"Occupancy by night ({first_day:%b %d, %Y} - {last_day:%b %d, %Y})")
+            frame = tk.Frame(content, bg=self.colors['card'])
+            frame.pack(fill='both', expand=True)
+            corner = tk.Canvas(frame, width=OCCUPANCY_LABEL_WIDTH, height=OCCUPANCY_HEADER_HEIGHT, bg=self.colors['card'], highlightthickness=0)
+            header = tk.Canvas(frame, height=OCCUPANCY_HEADER_HEIGHT, bg=self.colors['card'], highlightthickness=0)
+            labels = tk.Canvas(frame, width=OCCUPANCY_LABEL_WIDTH, bg=self.colors['card'], highlightthickness=0)
+            body = tk.Canvas(frame, bg=self.colors['white'], highlightthickness=0)
+            x_scrollbar = ttk.Scrollbar(frame, orient='horizontal')
+            y_scrollbar = ttk.Scrollbar(frame, orient='vertical')
+            corner.grid(row=0, column=0, sticky='nsew')
+            header.grid(row=0, column=1, sticky='ew')
+            labels.grid(row=1, column=0, sticky='ns')
+            body.grid(row=1, column=1, sticky='nsew')
+            y_scrollbar.grid(row=1, column=2, sticky='ns')
+            x_scrollbar.grid(row=2, column=1, sticky='ew')
+            frame.grid_rowconfigure(1, weight=1)
+            frame.grid_columnconfigure(1, weight=1)
+            status = tk.Label(window, text="Hover over a night for details. Ctrl+wheel or +/- to zoom.",
+                              font=('Segoe UI', 10), bg=self.colors['light'], fg=self.colors['dark_text'])
+            status.pack()
+
+            # the header scrolls with the body horizontally, the labels vertically
+            def scroll_x(*args):
+                body.xview(*args)
+                header.xview(*args)
+
+            def scroll_y(*args):
+                body.yview(*args)
+                labels.yview(*args)
+
+            x_scrollbar.config(command=scroll_x)
+            y_scrollbar.config(command=scroll_y)
+            body.config(xscrollcommand=x_scrollbar.set, yscrollcommand=y_scrollbar.set)
+
+            view = {'rooms': [], 'grid': {}, 'cell_width': OCCUPANCY_CELL_WIDTH}
+            cells = {}   # (room_id, day index) -> canvas item
+
+            def set_scrollregions():
+                width = OCCUPANCY_DAYS * view['cell_width']
+                height = len(view['rooms']) * OCCUPANCY_ROW_HEIGHT
+                body.config(scrollregion=(0, 0, width, height))
+                header.config(scrollregion=(0, 0, width, OCCUPANCY_HEADER_HEIGHT))
+                labels.config(scrollregion=(0, 0, OCCUPANCY_LABEL_WIDTH, height))
+                header.itemconfigure('daynum', state='normal' if view['cell_width'] >= 18 else 'hidden')
+
+            def draw_all(rooms, grid):
+                body.delete('all')
+                header.delete('all')
+                labels.delete('all')
+                cells.clear()
+                view['rooms'], view['grid'] = rooms, grid
+                w, h = view['cell_width'], OCCUPANCY_ROW_HEIGHT
+                for d in range(OCCUPANCY_DAYS):
+                    day = first_day + timedelta(days=d)
+                    x = d * w
+                    if day.weekday() >= 5:
+                        header.create_rectangle(x, 22, x + w, OCCUPANCY_HEADER_HEIGHT, fill=self.colors['light'], outline='')
+                    if day.day == 1 or d == 0:
+                        header.create_line(x, 0, x, OCCUPANCY_HEADER_HEIGHT, fill=self.colors['border'])
+                        header.create_text(x + 3, 10, text=day.strftime('%b %Y'), anchor='w', font=('Segoe UI', 9, 'bold'), fill=self.colors['dark_text'])
+                    header.create_text(x + w / 2, 31, text=str(day.day), font=('Segoe UI', 8), fill=self.colors['dark_text'], tags=('daynum',))
+                for row, (room_id, room_type, capacity) in enumerate(rooms):
+                    y = row * h
+                    labels.create_text(8, y + h / 2, text=f"{room_type} ({capacity})", anchor='w', font=self.fonts['body'], fill=self.colors['dark_text'])
+                    counts = grid.get(room_id, [])
+                    for d, count in enumerate(counts):
+                        cells[(room_id, d)] = body.create_rectangle(d * w, y, (d + 1) * w, y + h, fill=occupancy_color(count, capacity),
+                                                                    outline=self.colors['white'], tags=('cell',))
+                today_x = OCCUPANCY_PAST_DAYS * w
+                body.create_line(today_x, 0, today_x, len(rooms) * h, fill=self.colors['primary'], width=2, tags=('today',))
+                header.create_line(today_x, 22, today_x, OCCUPANCY_HEADER_HEIGHT, fill=self.colors['primary'], width=2)
+                set_scrollregions()
+
+            def zoom(factor, pointer_x=None):
+                old_width = view['cell_width']
+                new_width = min(OCCUPANCY_MAX_CELL_WIDTH, max(OCCUPANCY_MIN_CELL_WIDTH, old_width * factor))
+                if new_width == old_width:
+                    return
+                # keep the night under the pointer (or the left edge) in place
+                pointer_x = 0 if pointer_x is None else pointer_x
+                anchor_day = body.canvasx(pointer_x) / old_width
+                scale = new_width / old_width
+                body.scale('all', 0, 0, scale, 1)
+                header.scale('all', 0, 0, scale, 1)
+                view['cell_width'] = new_width
+                set_scrollregions()
+                left = max(0, anchor_day * new_width - pointer_x)
+                scroll_x('moveto', left / (OCCUPANCY_DAYS * new_width))
+
+            def on_wheel(event):
+                if event.num == 4 or getattr(event, 'delta', 0) > 0:
+                    step = -1
+                else:
+                    step = 1
+                if event.state & 0x0004:   # Ctrl
+                    zoom(1.25 if step < 0 else 0.8, event.x)
+                else:
+                    scroll_x('scroll', step * 3, 'units')
+
+            def on_motion(event):
+                d = int(body.canvasx(event.x) // view['cell_width'])
+                row = int(body.canvasy(event.y) // OCCUPANCY_ROW_HEIGHT)
+                if 0 <= d < OCCUPANCY_DAYS and 0 <= row < len(view['rooms']):
+                    room_id, room_type, capacity = view['rooms'][row]
+                    count = view['grid'][room_id][d]
+                    day = first_day + timedelta(days=d)
+                    share = f" ({100 * count / capacity:.0f}%)" if capacity else ""
+                    status.config(text=f"{room_type} - {day:%a %Y-%m-%d}: {count} of {capacity} rooms booked{share}")
+
+            def refresh(auto=False):
+                if not window.winfo_exists():
+                    return
+                data = self.get_occupancy_grid(first_day, property_code=property_code)
+                if data is None:
+                    return
+                rooms, grid = data
+                if [room[0] for room in rooms] != [room[0] for room in view['rooms']]:
+                    draw_all(rooms, grid)
+                    status.config(text="Room types changed; calendar redrawn.")
+                    return
+                changed = 0
+                for (room_id, _, capacity), (_, _, old_capacity) in zip(rooms, view['rooms']):
+                    old = view['grid'][room_id]
+                    for d, count in enumerate(grid[room_id]):
+                        if count != old[d] or capacity != old_capacity:
+                            body.itemconfigure(cells[(room_id, d)], fill=occupancy_color(count, capacity))
+                            changed += 1
+                view['rooms'], view['grid'] = rooms, grid
+                if changed or not auto:
+                    status.config(text=f"Updated {changed} night(s) at {datetime.now():%H:%M:%S}.")
+
+            def poll():
+                if window.winfo_exists():
+                    refresh(auto=True)
+                    window.after(OCCUPANCY_REFRESH_MS, poll)
+
+            def close():
+                self.occupancy_refresh = None
+                window.destroy()
+
+            draw_all(*data)
+            scroll_x('moveto', max(0, OCCUPANCY_PAST_DAYS - 3) / OCCUPANCY_DAYS)
+            for widget in (body, header, labels):
+                widget.bind('<MouseWheel>', on_wheel)
+                widget.bind('<Button-4>', on_wheel)
+                widget.bind('<Button-5>', on_wheel)
+            body.bind('<Motion>', on_motion)
+            window.bind('<plus>', lambda e: zoom(1.25))
+            window.bind('<equal>', lambda e: zoom(1.25))
+            window.bind('<minus>', lambda e: zoom(0.8))
+            window.protocol("WM_DELETE_WINDOW", close)
+            self.occupancy_refresh = refresh
+            window.after(OCCUPANCY_REFRESH_MS, poll)
+
+            legend = tk.Frame(corner, bg=self.colors['card'])
+            corner.create_window(4, OCCUPANCY_HEADER_HEIGHT / 2, window=legend, anchor='w')
+            for share, text in ((0, "0%"), (0.5, "50%"), (1, "100%")):
+                tk.Label(legend, text=text, bg=occupancy_color(share * 2, 2), font=('Segoe UI', 8), padx=3).pack(side='left')
+            tk.Label(legend, text="over", bg=OCCUPANCY_OVERBOOKED_COLOR, fg=self.colors['white'], font=('Segoe UI', 8), padx=3).pack(side='left')
+
+            btn_frame = tk.Frame(window, bg=self.colors['light'])
+            btn_frame.pack(pady=10)
+            tk.Button(btn_frame, text="➖ Zoom Out", command=lambda: zoom(0.8), bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="➕ Zoom In", command=lambda: zoom(1.25), bg=self.colors['light'], fg=self.colors['dark_text'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="🔄 Refresh", command=refresh, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="⬅️ Close", command=close, bg=self.colors['primary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+        except Exception as e:
+            print(f"Error in view_occupancy: {e}")
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def view_payments(self, parent, property_code=None):
+        """Gateway payments for a property (the active one by default) with their authorization/settlement state."""
+        try:
+            window = tk.Toplevel(parent)
+            window.title(f"Payments - {self.property_name(property_code)}")
+            window.geometry("1050x500")
+            window.configure(bg=self.colors['light'])
+
+            card, content = self.create_card_frame(window, "Card & e-wallet payments")
+            columns = ('ID', 'Reservation', 'Method', 'Amount', 'Status', 'Attempts', 'Settlement', 'Updated', 'Last Error')
+            tree = ttk.Treeview(content, columns=columns, show='headings', selectmode='extended')
+            v_scrollbar = ttk.Scrollbar(content, orient='vertical', command=tree.yview)
+            tree.configure(yscrollcommand=v_scrollbar.set)
+            v_scrollbar.pack(side='right', fill='y')
+            tree.pack(fill='both', expand=True)
+            for col, w in zip(columns, [60, 90, 100, 100, 100, 70, 90, 140, 260]):
+                tree.heading(col, text=col)
+                tree.column(col, width=w, anchor='w')
+
+            def populate():
+                for item in tree.get_children():
+                    tree.delete(item)
+                for payment_id, res_id, method, amount, status, attempts, settlement_id, updated_at, last_error in self.get_payments(property_code=property_code):
+                    updated = updated_at.strftime('%Y-%m-%d %H:%M') if updated_at else ""
+                    tree.insert('', 'end', iid=str(payment_id), values=(payment_id, res_id, method, f"₱{float(amount):,.2f}", status,
+                                                                        attempts, settlement_id or "", updated, last_error or ""))
+
+            def retry_selected():
+                try:
+                    selected = tree.selection()
+                    if not selected:
+                        messagebox.showwarning("Selection Required", "Please select one or more declined or failed payments.", parent=window)
+                        return
+                    count = self.retry_payments(selected, property_code)
+                    messagebox.showinfo("Payments", f"{count} payment(s) queued for a new authorization.", parent=window)
+                    populate()
+                except Exception as e:
+                    print(f"Error retrying payments: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            def settle_now():
+                try:
+                    window.config(cursor='watch')
+                    window.update_idletasks()
+                    try:
+                        count, amount, err = self.settle_payments(property_code)
+                    finally:
+                        window.config(cursor='')
+                    if err:
+                        messagebox.showerror("Settlement", err, parent=window)
+                    else:
+                        self._note_write(property_code)
+                        messagebox.showinfo("Settlement", f"{count} payment(s) captured, ₱{amount:,.2f}.", parent=window)
+                    populate()
+                except Exception as e:
+                    print(f"Error settling payments: {e}")
+                    messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+            populate()
+            btn_frame = tk.Frame(window, bg=self.colors['light'])
+            btn_frame.pack(pady=10)
+            tk.Button(btn_frame, text="🔁 Retry Selected", command=retry_selected, bg=self.colors['accent'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="🏦 Settle Now", command=settle_now, bg=self.colors['success'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="🔄 Refresh", command=populate, bg=self.colors['secondary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+            tk.Button(btn_frame, text="⬅️ Close", command=window.destroy, bg=self.colors['primary'], fg=self.colors['white'], relief='flat', padx=20, pady=10).pack(side='left', padx=10)
+        except Exception as e:
+            print(f"Error in view_payments: {e}")
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+
+# ---------- Index check (no window) ----------
+def check_indexes_cli(property_codes=None):
+    """
+    `python EscollarFinalProj.py --check-indexes [PROPERTY ...]`: print the query plan
+    problems of each property's database. Returns the exit status: 0 when every plan
+    is clean, 1 when a plan regressed, 2 when a database could not be checked.
+    """
+    status = 0
+    for code in property_codes or list(PROPERTIES):
+        if code not in PROPERTIES:
+            print(f"{code}: unknown property")
+            status = 2
+            continue
+        try:
+            conn = mysql.connector.connect(**{'connection_timeout': DB_CONNECT_TIMEOUT_SECONDS, **PROPERTIES[code]['db_config']})
+        except mysql.connector.Error as e:
+            print(f"{code}: could not connect: {e}")
+            status = 2
+            continue
+        try:
+            problems = check_hot_queries(conn.cursor(dictionary=True))
+        except mysql.connector.Error as e:
+            print(f"{code}: could not check query plans: {e}")
+            status = 2
+            continue
+        finally:
+            conn.close()
+        for problem in problems:
+            print(f"{code}: {problem}")
+        if problems:
+            status = max(status, 1)
+        else:
+            print(f"{code}: all hot queries use their indexes")
+    return status
+
 
 # ---------- Run the application ----------
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["--check-indexes"]:
+        sys.exit(check_indexes_cli(sys.argv[2:]))
     try:
         root = tk.Tk()
         app = HotelReservation(root)
@@ -0,0 +1,493 @@
+"""
+Asyncio HTTP booking API for web and channel-manager (OTA) traffic.
+
+Exposes availability, quotes, bookings, search and cancellation for every property
+in hotel_core.PROPERTIES. Each property gets one aiomysql connection pool; bookings
+and cancellations run the same transactions as the desk app (hotel_core.book_steps /
+cancel_steps), so room units, holds and the waitlist behave the same whichever side
+takes the booking. The server does not import the Tk desk app.
+
+Card and e-wallet bookings are stored with a pending payment. This server does not
+talk to the payment gateway: the desk app's payment worker authorizes pending
+payments (and voids cancelled ones), so keep at least one desk app running for each
+property that takes gateway payments through the API.
+
+Requires aiohttp and aiomysql:
+
+    pip install aiohttp aiomysql
+    python booking_api.py serve --port 8080
+    python booking_api.py loadtest --url http://127.0.0.1:8080 --property LITHO_TEST --concurrency 300 --requests 5000
+
+The load test makes real bookings, so it only runs against a property marked
+"test": True in PROPERTIES unless --allow-production is given. Afterwards it
+deletes its bookings, their payments and its guests straight from that property's
+database (no cancellation copies, no waitlist fills).
+
+Endpoints (PROPERTY is a key of PROPERTIES, e.g. LITHO):
+
+    GET    /api/PROPERTY/availability
+    POST   /api/PROPERTY/quote          {"room_type", "nights", "services": [...]}
+    POST   /api/PROPERTY/reservations   {"name", "phone", "room_type", "nights", "services": [...], "payment"}
+    GET    /api/PROPERTY/reservations?q=TEXT
+    DELETE /api/PROPERTY/reservations/ID
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+import aiomysql
+from aiohttp import ClientError, ClientSession, TCPConnector, web
+
+from hotel_core import (
+    PAYMENT_METHODS, PROPERTIES, RELEASE_ROOMS_SQL, RESERVATION_SEARCH_SQL, ROOMS_SQL, PaymentCaptured, Reservation, Room, RoomUnavailable,
+    Service, UnknownRoomType, book_steps, cancel_steps, run_steps_async, validate_phone_number
+)
+
+API_POOL_MIN = 2
+API_POOL_MAX = 20               # per property; requests beyond this wait for a connection
+API_CONNECT_TIMEOUT = 5
+API_ACQUIRE_TIMEOUT = 10        # seconds a request waits for a pooled connection before a 503
+API_CATALOG_TTL = 1.0           # seconds availability/prices are shared between requests
+API_SEARCH_LIMIT = 100
+API_MAX_NIGHTS = 365
+API_TX_RETRIES = 3
+API_RETRYABLE_ERRORS = {1205, 1213}   # lock wait timeout, deadlock
+API_LISTEN_BACKLOG = 1024       # room for hundreds of clients connecting at once
+
+
+class ApiError(Exception):
+    """Request failure reported to the client as {"error": message} with status."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status, dumps=lambda obj: json.dumps(obj, default=_json_default))
+
+
+def reservation_dict(reservation):
+    return {name: getattr(reservation, name) for name in Reservation.__slots__}
+
+
+# ---------- Database access ----------
+class PropertyStore:
+    """Connection pool and short-lived catalog snapshot for one property."""
+    def __init__(self, code, db_config):
+        self.code = code
+        self.db_config = db_config
+        self.pool = None
+        self.catalog = None         # (loaded_at, rooms, services)
+        self.catalog_lock = asyncio.Lock()
+
+    async def open(self):
+        config = self.db_config
+        self.pool = await aiomysql.create_pool(
+            host=config.get('host', 'localhost'), port=int(config.get('port', 3306)),
+            user=config.get('user', 'root'), password=config.get('password', ''),
+            db=config['database'], minsize=API_POOL_MIN, maxsize=API_POOL_MAX,
+            connect_timeout=API_CONNECT_TIMEOUT, autocommit=False, charset='utf8mb4'
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """A pooled connection; raises asyncio.TimeoutError when none frees up within API_ACQUIRE_TIMEOUT."""
+        conn = await asyncio.wait_for(self.pool.acquire(), API_ACQUIRE_TIMEOUT)
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
+    async def transaction(self, work):
+        """Run `await work(cursor)` in one transaction, retrying deadlocks and lock timeouts."""
+        for attempt in range(API_TX_RETRIES):
+            async with self.acquire() as conn:
+                try:
+                    await conn.begin()
+                    async with conn.cursor() as cursor:
+                        result = await work(cursor)
+                    await conn.commit()
+                    return result
+                except aiomysql.OperationalError as e:
+                    await conn.rollback()
+                    if e.args and e.args[0] in API_RETRYABLE_ERRORS and attempt + 1 < API_TX_RETRIES:
+                        await asyncio.sleep(0.02 * (2 ** attempt) * random.random())
+                        continue
+                    raise
+                except BaseException:
+                    await conn.rollback()
+                    raise
+
+    async def query(self, sql, params=()):
+        async with self.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                rows = await cursor.fetchall()
+            # end the implicit read transaction so the pooled connection sees new rows
+            await conn.rollback()
+            return rows
+
+    async def get_catalog(self):
+        """Rooms and services, shared by all requests within API_CATALOG_TTL (one reload at a time)."""
+        if self.catalog and time.monotonic() - self.catalog[0] < API_CATALOG_TTL:
+            return self.catalog[1], self.catalog[2]
+        async with self.catalog_lock:
+            if self.catalog and time.monotonic() - self.catalog[0] < API_CATALOG_TTL:
+                return self.catalog[1], self.catalog[2]
+            rooms = {room.room_type: room for room in map(Room.from_row, await self.query(ROOMS_SQL))}
+            services = {service.name: service
+                        for service in map(Service.from_row, await self.query(f"SELECT {Service.COLUMNS} FROM services"))}
+            self.catalog = (time.monotonic(), rooms, services)
+            return rooms, services
+
+    def invalidate_catalog(self):
+        self.catalog = None
+
+
+# ---------- Request parsing ----------
+def _parse_stay(body, services_catalog):
+    """Validated (nights, services) from a quote/booking body."""
+    nights = body.get('nights')
+    if not isinstance(nights, int) or isinstance(nights, bool) or not 0 < nights <= API_MAX_NIGHTS:
+        raise ApiError(400, f"nights must be a whole number from 1 to {API_MAX_NIGHTS}")
+    services = body.get('services') or []
+    if not isinstance(services, list) or not all(isinstance(s, str) for s in services):
+        raise ApiError(400, "services must be a list of service names")
+    unknown = [s for s in services if s not in services_catalog]
+    if unknown:
+        raise ApiError(400, f"Unknown service(s): {', '.join(unknown)}")
+    return nights, list(dict.fromkeys(services))
+
+
+def _quote(room, nights, services, services_catalog):
+    room_cost = float(room.price) * nights
+    service_cost = sum(float(services_catalog[s].price) for s in services)
+    return {
+        'room_type': room.room_type,
+        'nights': nights,
+        'services': services,
+        'room_cost': room_cost,
+        'service_cost': service_cost,
+        'total': room_cost + service_cost
+    }
+
+
+def _text_field(body, name):
+    """A required, non-blank string field of the request body."""
+    value = body.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ApiError(400, f"{name} is required")
+    return value.strip()
+
+
+async def _read_json(request):
+    try:
+        body = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return body
+
+
+def _store(request):
+    store = request.app['stores'].get(request.match_info['property'])
+    if store is None:
+        raise ApiError(404, f"Unknown property {request.match_info['property']}")
+    return store
+
+
+# ---------- Handlers ----------
+async def availability(request):
+    store = _store(request)
+    rooms, services = await store.get_catalog()
+    return json_response({
+        'property': store.code,
+        'name': PROPERTIES[store.code]['name'],
+        'rooms': [{'room_type': r.room_type, 'price': r.price, 'available': max(0, r.available - r.held)}
+                  for r in rooms.values()],
+        'services': [{'name': s.name, 'price': s.price} for s in services.values()]
+    })
+
+
+async def quote(request):
+    store = _store(request)
+    body = await _read_json(request)
+    room_type = _text_field(body, 'room_type')
+    rooms, services = await store.get_catalog()
+    room = rooms.get(room_type)
+    if room is None:
+        raise ApiError(404, f"Unknown room type {room_type!r}")
+    nights, chosen = _parse_stay(body, services)
+    result = _quote(room, nights, chosen, services)
+    result['available'] = max(0, room.available - room.held)
+    return json_response(result)
+
+
+async def book(request):
+    store = _store(request)
+    body = await _read_json(request)
+    name = _text_field(body, 'name')
+    room_type = _text_field(body, 'room_type')
+    phone = body.get('phone')
+    is_valid, phone = validate_phone_number(phone) if isinstance(phone, str) else (False, None)
+    if not is_valid:
+        raise ApiError(400, "phone must be an 11-digit phone number")
+    payment = body.get('payment') or PAYMENT_METHODS[0]
+    if payment not in PAYMENT_METHODS:
+        raise ApiError(400, f"payment must be one of: {', '.join(PAYMENT_METHODS)}")
+    _, services = await store.get_catalog()
+    nights, chosen = _parse_stay(body, services)
+    # room price from the locked row (see book_steps), services from the current catalog
+    service_cost = sum(float(services[s].price) for s in chosen)
+
+    async def work(cursor):
+        return await run_steps_async(cursor, book_steps(store.code, room_type, name, phone, nights, chosen, payment,
+                                                        service_cost=service_cost))
+
+    try:
+        booking = await store.transaction(work)
+    except UnknownRoomType as e:
+        raise ApiError(404, str(e))
+    except RoomUnavailable as e:
+        raise ApiError(409, str(e))
+    store.invalidate_catalog()
+    del booking['guest_id']
+    return json_response(booking, status=201)
+
+
+async def search(request):
+    store = _store(request)
+    text = request.query.get('q', '').strip()
+    if not text:
+        raise ApiError(400, "q is required")
+    like_q = f"%{text}%"
+    rows = await store.query(RESERVATION_SEARCH_SQL.rstrip() + "\n    LIMIT %s", (like_q, like_q, API_SEARCH_LIMIT))
+    return json_response({'reservations': [reservation_dict(r) for r in Reservation.from_rows(rows, store.code)]})
+
+
+async def cancel(request):
+    store = _store(request)
+    try:
+        reservation_id = int(request.match_info['reservation_id'])
+    except ValueError:
+        raise ApiError(400, "reservation id must be a number")
+
+    async def work(cursor):
+        found, filled = await run_steps_async(cursor, cancel_steps([reservation_id]))
+        if not found:
+            raise ApiError(404, f"Reservation {reservation_id} not found")
+        return {'cancelled': reservation_id, 'waitlist_booked': [res_id for _, res_id in filled]}
+
+    try:
+        result = await store.transaction(work)
+    except PaymentCaptured as e:
+        raise ApiError(409, str(e))
+    store.invalidate_catalog()
+    return json_response(result)
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    try:
+        return await handler(request)
+    except ApiError as e:
+        return json_response({'error': e.message}, status=e.status)
+    except aiomysql.Error as e:
+        print(f"Database error on {request.method} {request.path}: {e}")
+        return json_response({'error': "Database unavailable, please retry."}, status=503)
+    except asyncio.TimeoutError:
+        print(f"No database connection free for {request.method} {request.path}")
+        return json_response({'error': "Server busy, please retry."}, status=503)
+
+
+def make_app(properties=PROPERTIES):
+    app = web.Application(middlewares=[error_middleware])
+    app['stores'] = {code: PropertyStore(code, prop['db_config']) for code, prop in properties.items()}
+
+    async def on_startup(app):
+        for store in app['stores'].values():
+            await store.open()
+
+    async def on_cleanup(app):
+        for store in app['stores'].values():
+            await store.close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get('/api/{property}/availability', availability)
+    app.router.add_post('/api/{property}/quote', quote)
+    app.router.add_post('/api/{property}/reservations', book)
+    app.router.add_get('/api/{property}/reservations', search)
+    app.router.add_delete('/api/{property}/reservations/{reservation_id}', cancel)
+    return app
+
+
+# ---------- Load test ----------
+# operation -> share of requests
+LOADTEST_MIX = {'availability': 0.55, 'quote': 0.25, 'search': 0.1, 'book': 0.1}
+LOADTEST_PHONE_PREFIX = "0999"
+LOADTEST_NAME = "Load Test"
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def purge_test_bookings_steps(res_ids):
+    """
+    Delete load-test bookings outright: give their units back, drop their payments
+    and rows, then the test guests nothing else refers to. Unlike cancel_steps this
+    keeps no cancelled copy and books nobody off the waitlist.
+    Returns (bookings deleted, guests deleted).
+    """
+    placeholders = ", ".join(["%s"] * len(res_ids))
+    locked = yield 'all', f"SELECT reservation_id FROM reservations WHERE reservation_id IN ({placeholders}) FOR UPDATE", res_ids
+    found = [row[0] for row in locked]
+    deleted = 0
+    if found:
+        placeholders = ", ".join(["%s"] * len(found))
+        yield 'exec', RELEASE_ROOMS_SQL.format(placeholders=placeholders), found
+        yield 'exec', f"DELETE FROM payments WHERE reservation_id IN ({placeholders})", found
+        deleted = yield 'exec', f"DELETE FROM reservations WHERE reservation_id IN ({placeholders})", found
+    guests = yield 'exec', """
+        DELETE g FROM guests g
+        WHERE g.phone LIKE %s AND g.name LIKE %s
+          AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.guest_id = g.guest_id)
+          AND NOT EXISTS (SELECT 1 FROM reservations_cancelled c WHERE c.guest_id = g.guest_id)
+          AND NOT EXISTS (SELECT 1 FROM reservations_archive a WHERE a.guest_id = g.guest_id)
+          AND NOT EXISTS (SELECT 1 FROM waitlist w WHERE w.guest_id = g.guest_id)
+    """, (LOADTEST_PHONE_PREFIX + "%", LOADTEST_NAME + "%")
+    return deleted, guests
+
+
+async def purge_test_bookings(property_code, res_ids):
+    store = PropertyStore(property_code, PROPERTIES[property_code]['db_config'])
+    await store.open()
+    try:
+        return await store.transaction(lambda cursor: run_steps_async(cursor, purge_test_bookings_steps(res_ids)))
+    finally:
+        await store.close()
+
+
+async def run_loadtest(url, property_code, concurrency, total_requests, cleanup=True):
+    """
+    Drive the API with `concurrency` simultaneous clients until total_requests are done,
+    then print throughput, latency percentiles per operation and status counts.
+    Bookings are made for 0999xxxxxxx test phones and deleted afterwards (cleanup,
+    see purge_test_bookings_steps), which needs this install's database access.
+    """
+    base = f"{url.rstrip('/')}/api/{property_code}"
+    latencies = {op: [] for op in LOADTEST_MIX}
+    statuses = {}
+    booked = []
+    ops, weights = zip(*LOADTEST_MIX.items())
+    remaining = [total_requests]
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        async with session.get(f"{base}/availability") as response:
+            catalog = await response.json()
+        room_types = [room['room_type'] for room in catalog.get('rooms', [])]
+        service_names = [service['name'] for service in catalog.get('services', [])]
+        if not room_types:
+            print("No rooms to test against; load the sample data first.")
+            return
+
+        async def call(op):
+            stay = {'room_type': random.choice(room_types), 'nights': random.randint(1, 4),
+                    'services': random.sample(service_names, random.randint(0, len(service_names)))}
+            if op == 'availability':
+                return session.get(f"{base}/availability")
+            if op == 'quote':
+                return session.post(f"{base}/quote", json=stay)
+            if op == 'search':
+                return session.get(f"{base}/reservations", params={'q': LOADTEST_NAME})
+            phone = f"{LOADTEST_PHONE_PREFIX}{random.randint(0, 9999999):07d}"
+            return session.post(f"{base}/reservations", json=dict(stay, name=f"{LOADTEST_NAME} {phone[-4:]}", phone=phone))
+
+        async def client():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                op = random.choices(ops, weights)[0]
+                started = time.perf_counter()
+                try:
+                    async with await call(op) as response:
+                        data = await response.json()
+                        status = response.status
+                except (ClientError, asyncio.TimeoutError, ValueError) as e:
+                    data, status = None, type(e).__name__
+                latencies[op].append(time.perf_counter() - started)
+                statuses[(op, status)] = statuses.get((op, status), 0) + 1
+                if op == 'book' and status == 201:
+                    booked.append(data['reservation_id'])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        print(f"{total_requests} requests, {concurrency} concurrent clients, {elapsed:.2f}s "
+              f"({total_requests / elapsed:.0f} req/s)")
+        for op, values in latencies.items():
+            values.sort()
+            if values:
+                print(f"  {op:<13} n={len(values):<6} p50={_percentile(values, 0.5) * 1000:7.1f}ms "
+                      f"p95={_percentile(values, 0.95) * 1000:7.1f}ms p99={_percentile(values, 0.99) * 1000:7.1f}ms")
+        for (op, status), count in sorted(statuses.items(), key=lambda item: str(item[0])):
+            print(f"  {op:<13} {status}: {count}")
+
+    if cleanup and booked:
+        deleted, guests = await purge_test_bookings(property_code, booked)
+        print(f"Deleted {deleted} of {len(booked)} test booking(s) and {guests} test guest(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hotel booking HTTP API")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the API server")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    load = commands.add_parser('loadtest', help="load test a running server")
+    load.add_argument('--url', default='http://127.0.0.1:8080')
+    load.add_argument('--property', default=next((code for code, prop in PROPERTIES.items() if prop.get('test')),
+                                                  next(iter(PROPERTIES))))
+    load.add_argument('--concurrency', type=int, default=200)
+    load.add_argument('--requests', type=int, default=5000)
+    load.add_argument('--no-cleanup', action='store_true', help="keep the test bookings")
+    load.add_argument('--allow-production', action='store_true',
+                      help="allow a property not marked \"test\": True (real bookings are made and deleted)")
+    args = parser.parse_args()
+    if args.command == 'loadtest':
+        if args.property not in PROPERTIES:
+            parser.error(f"unknown property {args.property}; choose from {', '.join(PROPERTIES)}")
+        if not PROPERTIES[args.property].get('test') and not args.allow_production:
+            parser.error(f"{args.property} is not a test property; the load test books real reservations. "
+                         f"Mark a staging property \"test\": True or pass --allow-production.")
+    if args.command == 'serve':
+        web.run_app(make_app(), host=args.host, port=args.port, backlog=API_LISTEN_BACKLOG)
+    else:
+        asyncio.run(run_loadtest(args.url, args.property, args.concurrency, args.requests, not args.no_cleanup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,681 @@
+"""
+Hotel booking logic shared by the Tk desk app (EscollarFinalProj.py) and the HTTP
+booking API (booking_api.py): the property list, row records, the booking SQL, room
+assignment, payment gateways and the booking and cancellation transactions.
+
+Nothing here imports tkinter or a database driver. The transactions are written as
+step generators that yield SQL and receive its results, so the desk app runs them on
+mysql.connector and the API on aiomysql (see run_steps / run_steps_async).
+"""
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+# ✅ Properties served by this install. Each property has its own database
+# (its own rooms, services, guests and reservations); add an entry per hotel.
+PROPERTIES = {
+    "LITHO": {
+        "name": "LitHo Hotel",
+        "db_config": {
+            "host": "localhost",   # Default MySQL host
+            "user": "root",        # Default MySQL user
+            "password": "",        # Enter your MySQL password here if you have one
+            "database": "hotel_reservation_system"  # Created on startup if missing (see ensure_schema)
+        },
+        # Optional read replicas; each entry overrides db_config, e.g. a second
+        # local instance replicating from the first:
+        # "replicas": [{"port": 3307}],
+    },
+    # A staging copy; "test": True lets `booking_api.py loadtest` book into it.
+    # "LITHO_TEST": {
+    #     "name": "LitHo Hotel (test)",
+    #     "db_config": {"host": "localhost", "user": "root", "password": "", "database": "hotel_reservation_test"},
+    #     "test": True,
+    # },
+    # "LITHO_ANNEX": {
+    #     "name": "LitHo Annex",
+    #     "db_config": {"host": "localhost", "user": "root", "password": "", "database": "hotel_reservation_annex"}
+    # },
+}
+
+# ---------- Records ----------
+# Compact row types decoded from plain tuple cursors. Each record's COLUMNS is the
+# select list its queries use, so the column -> position map is fixed and
+# from_row() just unpacks.
+class Room:
+    """A room type; held counts units under an active checkout hold."""
+    __slots__ = ('room_id', 'room_type', 'price', 'available', 'held')
+    # over rooms rm LEFT JOIN inventory_holds h, grouped by room (see ROOMS_SQL)
+    COLUMNS = "rm.room_id, rm.room_type, rm.price, rm.available, COUNT(h.hold_id)"
+
+    def __init__(self, room_id, room_type, price=0.0, available=0, held=0):
+        self.room_id = room_id
+        self.room_type = room_type
+        self.price = price
+        self.available = available
+        self.held = held
+
+    @classmethod
+    def from_row(cls, row):
+        room_id, room_type, price, available, held = row
+        return cls(room_id, room_type,
+                   float(price) if price is not None else 0.0,
+                   int(available) if available is not None else 0,
+                   int(held or 0))
+
+class Service:
+    __slots__ = ('name', 'price')
+    COLUMNS = "name, price"
+
+    def __init__(self, name, price=0.0):
+        self.name = name
+        self.price = price
+
+    @classmethod
+    def from_row(cls, row):
+        name, price = row
+        return cls(name, float(price) if price is not None else 0.0)
+
+class Guest:
+    __slots__ = ('guest_id', 'name', 'phone')
+    COLUMNS = "guest_id, name, phone"
+
+    def __init__(self, guest_id, name, phone):
+        self.guest_id = guest_id
+        self.name = name
+        self.phone = phone
+
+    @classmethod
+    def from_row(cls, row):
+        guest_id, name, phone = row
+        return cls(guest_id, name, phone)
+
+class Reservation:
+    """A listing row: reservation joined with its guest, room type and assigned room number."""
+    __slots__ = ('reservation_id', 'guest_name', 'phone', 'room_type', 'nights',
+                 'services', 'total', 'payment', 'created_at', 'property_code', 'room_number')
+    # over reservations r joined with guests g, rooms rm and room_units u (see RESERVATION_JOINS)
+    COLUMNS = ("r.reservation_id, g.name, g.phone, rm.room_type, r.nights, r.services, r.total, r.payment, "
+               "r.created_at, u.room_number")
+
+    def __init__(self, reservation_id, guest_name, phone, room_type, nights, services,
+                 total, payment, created_at=None, property_code=None, room_number=None):
+        self.reservation_id = reservation_id
+        self.guest_name = guest_name
+        self.phone = phone
+        self.room_type = room_type
+        self.nights = nights
+        self.services = services
+        self.total = total
+        self.payment = payment
+        self.created_at = created_at
+        self.property_code = property_code
+        self.room_number = room_number
+
+    @classmethod
+    def from_row(cls, row, property_code=None):
+        reservation_id, guest_name, phone, room_type, nights, services, total, payment, created_at, room_number = row
+        return cls(reservation_id, guest_name, phone, room_type, nights, services,
+                   total, payment, created_at, property_code, room_number)
+
+    @classmethod
+    def from_rows(cls, rows, property_code=None):
+        return [cls.from_row(row, property_code) for row in rows]
+
+# Reservation listing and search; the desk app also runs them against the archive
+RESERVATION_JOINS = """
+    FROM reservations r
+    LEFT JOIN guests g ON r.guest_id = g.guest_id
+    LEFT JOIN rooms rm ON r.room_id = rm.room_id
+    LEFT JOIN room_units u ON r.unit_id = u.unit_id
+"""
+
+RESERVATION_LIST_SQL = f"""
+    SELECT {Reservation.COLUMNS}{RESERVATION_JOINS}
+    ORDER BY r.created_at DESC
+    LIMIT %s
+"""
+
+RESERVATION_SEARCH_SQL = f"""
+    SELECT {Reservation.COLUMNS}{RESERVATION_JOINS}
+    WHERE g.name LIKE %s OR g.phone LIKE %s
+    ORDER BY r.created_at DESC
+"""
+
+# Column list shared by the copies between reservations and its archive/cancelled tables
+RESERVATION_COLUMNS = "reservation_id, guest_id, room_id, nights, services, total, payment, created_at"
+# Copies into the archive/cancelled tables keep the room number too (unit_id); a
+# restored reservation is placed again instead, as its unit may be taken by then
+RESERVATION_COPY_COLUMNS = RESERVATION_COLUMNS + ", unit_id"
+
+# Payment label on bookings made automatically from the waitlist
+WAITLIST_PAYMENT = "Pay at Check-in"
+
+# Rooms with the number of units under an active hold
+ROOMS_SQL = f"""
+    SELECT {Room.COLUMNS}
+    FROM rooms rm
+    LEFT JOIN inventory_holds h ON h.room_id = rm.room_id AND h.expires_at > NOW()
+    GROUP BY rm.room_id, rm.room_type, rm.price, rm.available
+"""
+
+
+# Payment methods offered at checkout and through the API
+PAYMENT_METHODS = ["Cash", "Credit Card", "GCash", "Bank Transfer"]
+
+# Gateway payments: authorized by the desk app's payment worker after booking
+PAYMENT_METHOD_GATEWAYS = {"Credit Card": "simulated", "GCash": "simulated"}   # others are settled at the desk
+PAYMENT_CURRENCY = "PHP"
+
+INSERT_PAYMENT_SQL = """
+    INSERT INTO payments (reservation_id, method, gateway, amount, currency, idempotency_key)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+# {placeholders}: reservation ids being cancelled. Unauthorized payments are dropped;
+# authorized (or in-flight) ones are voided at the gateway by the payment worker.
+# capturing/captured payments are refused earlier by cancel_steps (PaymentCaptured)
+VOID_PAYMENTS_SQL = """
+    UPDATE payments
+    SET status = CASE WHEN status = 'pending' THEN 'voided' ELSE 'void_pending' END
+    WHERE reservation_id IN ({placeholders}) AND status IN ('pending', 'authorizing', 'authorized')
+"""
+
+# Booking statements (see the transactions below)
+# LAST_INSERT_ID(guest_id) makes lastrowid the existing id on a duplicate phone
+UPSERT_GUEST_SQL = """
+    INSERT INTO guests (name, phone) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE name = VALUES(name), guest_id = LAST_INSERT_ID(guest_id)
+"""
+INSERT_RESERVATION_SQL = """
+    INSERT INTO reservations (guest_id, room_id, nights, services, total, payment)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+ROOM_UNITS_SQL = "SELECT unit_id FROM room_units WHERE room_id = %s ORDER BY room_number"
+ROOM_STAYS_SQL = """
+    SELECT reservation_id, DATE(created_at), nights, unit_id FROM reservations
+    WHERE room_id = %s AND DATE(created_at) + INTERVAL nights DAY > CURDATE()
+"""
+WAITLIST_NEXT_SQL = """
+    SELECT entry_id, guest_id, nights, services, total FROM waitlist
+    WHERE room_id = %s AND status = 'waiting'
+    ORDER BY priority DESC, entry_id
+    LIMIT %s
+    FOR UPDATE
+"""
+# gives back the units of reservations about to be deleted, one UPDATE per call
+RELEASE_ROOMS_SQL = """
+    UPDATE rooms rm
+    JOIN (SELECT room_id, COUNT(*) AS n FROM reservations
+          WHERE reservation_id IN ({placeholders}) AND room_id IS NOT NULL
+          GROUP BY room_id) freed ON rm.room_id = freed.room_id
+    SET rm.available = rm.available + freed.n
+"""
+
+
+def validate_phone_number(phone):
+    """Validate that phone number is exactly 11 digits; returns (is_valid, cleaned)."""
+    try:
+        # Remove common separators
+        cleaned = phone.replace('-', '').replace(' ', '').replace('+', '')
+        # Check if it's exactly 11 digits
+        if len(cleaned) == 11 and cleaned.isdigit():
+            return True, cleaned
+        return False, None
+    except Exception:
+        return False, None
+
+# ---------- Room assignment ----------
+# A stay occupies the nights [check_in, check_out) as date ordinals; check-in is the
+# booking date. Placement costs favour back-to-back stays and avoid leaving a single
+# night between two stays, which can never be sold.
+NEVER_USED = -1
+OPEN_GAP_COST = 400
+ORPHAN_NIGHT_COST = 1000
+
+def _gap_cost(gap):
+    if gap is None:
+        return OPEN_GAP_COST
+    if gap == 1:
+        return ORPHAN_NIGHT_COST
+    return gap
+
+def _best_free_unit(free, start, end, next_pinned):
+    """
+    Pick a unit from free (sorted (free_from, unit_id) pairs) for the stay [start, end):
+    the tightest fit that does not strand a single night, else an unused unit, else
+    the tightest fit anyway. Units whose next pinned stay (next_pinned) begins
+    before end are skipped. None when no unit can take the stay.
+    """
+    i = bisect_right(free, (start, float('inf'))) - 1
+    orphan = None
+    while i >= 0:
+        free_from, unit_id = free[i]
+        i -= 1
+        pinned_at = next_pinned.get(unit_id)
+        if pinned_at is not None and pinned_at < end:
+            continue
+        gap = None if free_from == NEVER_USED else start - free_from
+        if gap == 1 or (pinned_at is not None and pinned_at - end == 1):
+            if orphan is None:
+                orphan = unit_id
+            continue
+        if gap is not None and _gap_cost(gap) > OPEN_GAP_COST:
+            # unused units sort first; take one that is clear for the whole stay
+            for unused_from, unused_id in free:
+                if unused_from != NEVER_USED:
+                    break
+                if next_pinned.get(unused_id, end) >= end:
+                    return unused_id
+        return unit_id
+    return orphan
+
+def plan_room_assignments(unit_ids, bookings, today, allow_moves=False):
+    """
+    Assign one room type's stays to physical units in a single sweep by check-in.
+    bookings are (reservation_id, start, end, unit_id) with date ordinals. Guests
+    already in house keep their unit, and so do later stays unless allow_moves,
+    in which case they are repacked best-fit. Kept stays are pinned before the
+    sweep, so a stay placed earlier never takes a unit a later kept stay needs;
+    a kept stay overlapping an earlier one on the same unit is placed afresh.
+    Returns {reservation_id: unit_id, or None when no unit is free}.
+    """
+    pins = {unit_id: [] for unit_id in unit_ids}
+    movable = []
+    for booking in bookings:
+        unit_id = booking[3]
+        if unit_id in pins and (not allow_moves or booking[1] <= today):
+            pins[unit_id].append(booking)
+        else:
+            movable.append(booking)
+    next_pinned = {}
+    for unit_id, pinned in pins.items():
+        pinned.sort(key=lambda b: (b[1], b[2]))
+        kept = deque()
+        for booking in pinned:
+            if kept and booking[1] < kept[-1][2]:
+                movable.append(booking)
+            else:
+                kept.append(booking)
+        pins[unit_id] = kept
+        if kept:
+            next_pinned[unit_id] = kept[0][1]
+
+    free_from = {unit_id: NEVER_USED for unit_id in unit_ids}
+    free = sorted((NEVER_USED, unit_id) for unit_id in unit_ids)
+    plan = {}
+
+    def take(unit_id, end):
+        free.pop(bisect_left(free, (free_from[unit_id], unit_id)))
+        free_from[unit_id] = max(free_from[unit_id], end)
+        insort(free, (free_from[unit_id], unit_id))
+
+    # pinned stays go first on a shared check-in day; longer stays first among the rest
+    sweep = [(b[1], 0, -b[2], b[0], b[3]) for kept in pins.values() for b in kept]
+    sweep.extend((b[1], 1, -b[2], b[0], None) for b in movable)
+    sweep.sort()
+    for start, is_movable, neg_end, res_id, unit_id in sweep:
+        if is_movable:
+            unit_id = _best_free_unit(free, start, -neg_end, next_pinned)
+        else:
+            kept = pins[unit_id]
+            kept.popleft()
+            if kept:
+                next_pinned[unit_id] = kept[0][1]
+            else:
+                del next_pinned[unit_id]
+        plan[res_id] = unit_id
+        if unit_id is not None:
+            take(unit_id, -neg_end)
+    return plan
+
+def stays_from_rows(rows):
+    """ROOM_STAYS_SQL rows -> (reservation_id, start, end, unit_id) date-ordinal tuples."""
+    bookings = []
+    for res_id, check_in, nights, unit_id in rows:
+        start = check_in.toordinal()
+        bookings.append((res_id, start, start + int(nights), unit_id))
+    return bookings
+
+def place_unassigned_stays(unit_ids, bookings):
+    """
+    Best-fitting free unit for each stay in bookings that has no (valid) unit,
+    leaving assigned stays where they are: plan_room_assignments() without moves.
+    A stay that overlaps another on its unit is re-placed if a unit is free.
+    Returns (unit_id, reservation_id) updates.
+    """
+    plan = plan_room_assignments(unit_ids, bookings, None)
+    return [(plan[res_id], res_id) for res_id, _, _, unit_id in bookings
+            if plan[res_id] is not None and plan[res_id] != unit_id]
+
+# ---------- Payment gateways ----------
+def payment_key(property_code, reservation_id, generation=0):
+    """Idempotency key for a reservation's authorization; retry from scratch with a new generation."""
+    key = f"{property_code}-res{reservation_id}-auth"
+    return key if not generation else f"{key}-{generation}"
+
+class PaymentResult:
+    """Gateway answer: status is 'approved', 'declined' or 'error' (transient, retry)."""
+    __slots__ = ('status', 'reference', 'message')
+
+    def __init__(self, status, reference=None, message=None):
+        self.status = status
+        self.reference = reference
+        self.message = message
+
+class PaymentGateway(ABC):
+    """
+    Base class for a payment processor. Every call carries the payment's idempotency
+    key; repeating a call with the same key must return the original outcome and
+    never charge twice, which is what makes the payment worker's retries safe.
+    """
+    name = None
+
+    @abstractmethod
+    def authorize(self, key, amount, currency, description):
+        """-> PaymentResult"""
+
+    @abstractmethod
+    def capture_batch(self, items):
+        """items: [(key, amount)] -> (batch_ref, {key: PaymentResult})"""
+
+    @abstractmethod
+    def void(self, key):
+        """-> PaymentResult"""
+
+class SimulatedGateway(PaymentGateway):
+    """
+    Local stand-in for a card/e-wallet processor: approves, declines or fails
+    transiently at the given rates after a short delay, and remembers outcomes per
+    key like a real gateway's idempotency layer.
+    """
+    name = "simulated"
+
+    def __init__(self, decline_rate=0.05, error_rate=0.1, latency=(0.05, 0.4), seed=None):
+        self.decline_rate = decline_rate
+        self.error_rate = error_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.authorizations = {}   # key -> final PaymentResult
+        self.captures = {}
+        self.voided = set()
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def _delay(self):
+        time.sleep(self.random.uniform(*self.latency))
+
+    def authorize(self, key, amount, currency, description):
+        self._delay()
+        with self.lock:
+            if key in self.authorizations:
+                return self.authorizations[key]
+            roll = self.random.random()
+            if roll < self.error_rate:
+                return PaymentResult('error', message="Simulated gateway timeout")
+            if roll < self.error_rate + self.decline_rate:
+                result = PaymentResult('declined', message="Simulated decline: insufficient funds")
+            else:
+                result = PaymentResult('approved', reference=f"SIM-A{len(self.authorizations) + 1:06d}")
+            self.authorizations[key] = result
+            return result
+
+    def capture_batch(self, items):
+        self._delay()
+        with self.lock:
+            self.batches += 1
+            batch_ref = f"SIM-B{self.batches:05d}"
+            results = {}
+            for key, amount in items:
+                if key not in self.captures:
+                    auth = self.authorizations.get(key)
+                    if auth is None or auth.status != 'approved' or key in self.voided:
+                        self.captures[key] = PaymentResult('declined', message="No open authorization")
+                    else:
+                        self.captures[key] = PaymentResult('approved', reference=batch_ref)
+                results[key] = self.captures[key]
+            return batch_ref, results
+
+    def void(self, key):
+        self._delay()
+        with self.lock:
+            if key in self.captures and self.captures[key].status == 'approved':
+                return PaymentResult('declined', message="Already captured")
+            self.voided.add(key)
+            return PaymentResult('approved')
+
+# gateway name -> instance; register a real processor under the name PAYMENT_METHOD_GATEWAYS uses
+PAYMENT_GATEWAYS = {}
+
+def register_gateway(gateway):
+    PAYMENT_GATEWAYS[gateway.name] = gateway
+
+register_gateway(SimulatedGateway())
+
+def payment_gateway_for(method):
+    """Gateway name handling this payment method, or None for desk-settled methods."""
+    name = PAYMENT_METHOD_GATEWAYS.get(method)
+    return name if name in PAYMENT_GATEWAYS else None
+
+# ---------- Booking transactions ----------
+# Each *_steps() generator holds one transaction's SQL and decisions but does no I/O:
+# it yields (kind, sql, params) and is sent the result -- 'one': fetchone(),
+# 'all': fetchall(), 'insert': lastrowid, 'exec' and 'many': rowcount. run_steps()
+# and run_steps_async() drive them on a cursor inside the caller's transaction; the
+# caller commits, or rolls back when a step raises.
+class BookingError(Exception):
+    """A booking that cannot go ahead; the message is meant for the guest or clerk."""
+
+class UnknownRoomType(BookingError):
+    pass
+
+class RoomUnavailable(BookingError):
+    pass
+
+class PaymentCaptured(BookingError):
+    pass
+
+def run_steps(cursor, steps):
+    """Run a *_steps() generator on a DB-API cursor; returns the generator's result."""
+    result = None
+    while True:
+        try:
+            kind, sql, params = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        if kind == 'many':
+            cursor.executemany(sql, params)
+            result = cursor.rowcount
+            continue
+        cursor.execute(sql, params)
+        if kind == 'one':
+            result = cursor.fetchone()
+        elif kind == 'all':
+            result = cursor.fetchall()
+        elif kind == 'insert':
+            result = cursor.lastrowid
+        else:
+            result = cursor.rowcount
+
+async def run_steps_async(cursor, steps):
+    """run_steps() for an asyncio cursor (aiomysql)."""
+    result = None
+    while True:
+        try:
+            kind, sql, params = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        if kind == 'many':
+            await cursor.executemany(sql, params)
+            result = cursor.rowcount
+            continue
+        await cursor.execute(sql, params)
+        if kind == 'one':
+            result = await cursor.fetchone()
+        elif kind == 'all':
+            result = await cursor.fetchall()
+        elif kind == 'insert':
+            result = cursor.lastrowid
+        else:
+            result = cursor.rowcount
+
+def room_schedule_steps(room_id):
+    """Units of one room type and its current and future stays (see stays_from_rows)."""
+    units = [row[0] for row in (yield 'all', ROOM_UNITS_SQL, (room_id,))]
+    bookings = stays_from_rows((yield 'all', ROOM_STAYS_SQL, (room_id,)))
+    return units, bookings
+
+def place_unassigned_steps(room_ids):
+    """
+    Incremental step after a booking or cancellation: put stays of these room
+    types that have no unit into the best-fitting free unit, moving nobody.
+    Returns how many were placed.
+    """
+    updates = []
+    for room_id in room_ids:
+        units, bookings = yield from room_schedule_steps(room_id)
+        updates.extend(place_unassigned_stays(units, bookings))
+    if updates:
+        yield 'many', "UPDATE reservations SET unit_id = %s WHERE reservation_id = %s", updates
+    return len(updates)
+
+def fill_from_waitlist_steps(freed):
+    """
+    Book waiting entries into freed units. freed maps room_id -> units just
+    released. Each room type's queue is read highest priority first, then oldest
+    first, straight off idx_waitlist_queue. Returns the booked (entry_id, reservation_id) pairs.
+    """
+    filled = []
+    for room_id, units in freed.items():
+        entries = yield 'all', WAITLIST_NEXT_SQL, (room_id, units)
+        for entry_id, guest_id, nights, services, total in entries:
+            reservation_id = yield 'insert', INSERT_RESERVATION_SQL, (guest_id, room_id, nights, services, total, WAITLIST_PAYMENT)
+            yield 'exec', "UPDATE waitlist SET status = 'booked', reservation_id = %s WHERE entry_id = %s", (reservation_id, entry_id)
+            filled.append((entry_id, reservation_id))
+        if entries:
+            yield 'exec', "UPDATE rooms SET available = available - %s WHERE room_id = %s", (len(entries), room_id)
+    return filled
+
+def book_steps(property_code, room_type, name, phone, nights, services, payment,
+               total=None, service_cost=0.0, guest_id=None, hold_id=None):
+    """
+    Book one unit of room_type. The room row is locked first; then the caller's
+    hold (hold_id) is consumed or, without a live one, the booking has to fit beside
+    other clerks' active holds. guest_id skips the guest upsert when the caller
+    already knows it. total defaults to the locked price for the nights plus
+    service_cost. Card and e-wallet bookings get a pending payment, authorized by
+    the desk app's payment worker. Returns a dict describing the booking.
+    Raises UnknownRoomType or RoomUnavailable.
+    """
+    row = yield 'one', "SELECT room_id, room_type, price, available FROM rooms WHERE room_type = %s FOR UPDATE", (room_type,)
+    if not row:
+        raise UnknownRoomType(f"Unknown room type {room_type!r}")
+    held_by_us = False
+    if hold_id is not None:
+        held_by_us = (yield 'exec', "DELETE FROM inventory_holds WHERE hold_id = %s AND expires_at > NOW()", (hold_id,)) == 1
+        if not held_by_us:
+            yield 'exec', "DELETE FROM inventory_holds WHERE hold_id = %s", (hold_id,)
+    held = 0
+    if not held_by_us:
+        held = (yield 'one', "SELECT COUNT(*) FROM inventory_holds WHERE room_id = %s AND expires_at > NOW()", (row[0],))[0]
+    room = Room.from_row((*row, held))
+    if not held_by_us and room.available - room.held <= 0:
+        raise RoomUnavailable("Sorry, this room type is no longer available.")
+    if guest_id is None:
+        # one guest row per phone
+        is_valid, cleaned = validate_phone_number(phone)
+        guest_id = yield 'insert', UPSERT_GUEST_SQL, (name, cleaned if is_valid else phone)
+    if total is None:
+        total = room.price * nights + service_cost
+    reservation_id = yield 'insert', INSERT_RESERVATION_SQL, (guest_id, room.room_id, nights, ",".join(services), total, payment)
+    gateway = payment_gateway_for(payment)
+    if gateway:
+        yield 'insert', INSERT_PAYMENT_SQL, (reservation_id, payment, gateway, total, PAYMENT_CURRENCY,
+                                             payment_key(property_code, reservation_id))
+    yield 'exec', "UPDATE rooms SET available = available - 1 WHERE room_id = %s", (room.room_id,)
+    # give the new stay a physical room
+    yield from place_unassigned_steps([room.room_id])
+    unit = yield 'one', """
+        SELECT u.room_number FROM reservations r
+        LEFT JOIN room_units u ON r.unit_id = u.unit_id
+        WHERE r.reservation_id = %s
+    """, (reservation_id,)
+    return {
+        'reservation_id': reservation_id,
+        'guest_id': guest_id,
+        'room_type': room.room_type,
+        'room_number': unit[0] if unit else None,
+        'nights': nights,
+        'services': list(services),
+        'total': total,
+        'payment': payment,
+        'payment_status': 'pending' if gateway else None
+    }
+
+def cancel_steps(res_ids):
+    """
+    Cancel reservations: lock them, give availability back with one UPDATE grouped
+    by room, move the rows to reservations_cancelled so the desk app can restore
+    them, void their payments, then book waitlisted guests into the freed units and
+    place stays still without a room. Returns (cancelled ids, waitlist bookings as
+    (entry_id, reservation_id)); nothing is changed when no id matches.
+    Raises PaymentCaptured if any of them has been charged: that money goes back
+    through a refund with the gateway, not a void.
+    """
+    placeholders = ", ".join(["%s"] * len(res_ids))
+    # lock the rows first so two clients cannot return the same unit twice
+    locked = yield 'all', f"SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN ({placeholders}) FOR UPDATE", res_ids
+    found = [row[0] for row in locked]
+    if not found:
+        return [], []
+    freed = {}
+    for _, room_id in locked:
+        if room_id:
+            freed[room_id] = freed.get(room_id, 0) + 1
+    placeholders = ", ".join(["%s"] * len(found))
+    # locks the payment rows too, so a settlement run cannot start capturing them meanwhile
+    charged = yield 'all', f"""SELECT reservation_id FROM payments
+                               WHERE reservation_id IN ({placeholders}) AND status IN ('capturing', 'captured')
+                               FOR UPDATE""", found
+    if charged:
+        ids = ", ".join(str(res_id) for res_id in sorted({row[0] for row in charged}))
+        raise PaymentCaptured(f"Reservation {ids} has already been charged. Refund the payment "
+                              f"with the gateway before cancelling.")
+    yield 'exec', RELEASE_ROOMS_SQL.format(placeholders=placeholders), found
+    yield 'exec', f"""INSERT INTO reservations_cancelled ({RESERVATION_COPY_COLUMNS})
+                      SELECT {RESERVATION_COPY_COLUMNS} FROM reservations WHERE reservation_id IN ({placeholders})""", found
+    yield 'exec', f"DELETE FROM reservations WHERE reservation_id IN ({placeholders})", found
+    yield 'exec', VOID_PAYMENTS_SQL.format(placeholders=placeholders), found
+    filled = yield from fill_from_waitlist_steps(freed)
+    # freed rooms go to waitlist bookings or stays still without a room
+    yield from place_unassigned_steps(freed.keys())
+    return found, filled
+
+def restore_payments_steps(property_code, res_ids):
+    """
+    Reverse VOID_PAYMENTS_SQL for restored reservations. A void the payment worker
+    has not claimed yet is withdrawn and a payment voided before any authorization
+    goes back to pending; once a void may have reached the gateway, a new pending
+    payment is queued under a fresh idempotency key. Returns the payments reinstated.
+    """
+    placeholders = ", ".join(["%s"] * len(res_ids))
+    rows = yield 'all', f"""
+        SELECT p.payment_id, p.reservation_id, p.method, p.gateway, p.amount, p.currency, p.status, p.attempts
+        FROM payments p
+        WHERE p.reservation_id IN ({placeholders})
+          AND p.payment_id = (SELECT MAX(payment_id) FROM payments WHERE reservation_id = p.reservation_id)
+          AND p.status IN ('void_pending', 'voiding', 'voided')
+        FOR UPDATE
+    """, res_ids
+    generation = int(time.time())
+    for payment_id, reservation_id, method, gateway, amount, currency, status, attempts in rows:
+        if status == 'void_pending':
+            yield 'exec', "UPDATE payments SET status = IF(auth_code IS NULL, 'pending', 'authorized') WHERE payment_id = %s", (payment_id,)
+        elif status == 'voided' and not attempts:
+            yield 'exec', "UPDATE payments SET status = 'pending' WHERE payment_id = %s", (payment_id,)
+        else:
+            yield 'insert', INSERT_PAYMENT_SQL, (reservation_id, method, gateway, amount, currency,
+                                                 payment_key(property_code, reservation_id, f"{generation}r{payment_id}"))
+    return len(rows)
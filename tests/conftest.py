@@ -0,0 +1,223 @@
+"""
+Shared fixtures. The app is a single Tk module talking to MySQL; tests build a
+HotelReservation without a window and point mysql.connector.connect at FakeDB,
+a scripted stand-in that answers each statement from registered patterns.
+"""
+import os
+import queue
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def squash(sql):
+    return " ".join(sql.split())
+
+
+class FakeDB:
+    """
+    Statements are matched against the registered patterns (the most recently
+    registered match wins) and answered with rows (a list), a rowcount (an int),
+    an exception to raise, or a callable(params) returning one of those.
+    Everything executed is kept in .log as (sql, params) with whitespace squashed.
+    """
+    def __init__(self):
+        self.handlers = []
+        self.log = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.next_id = 1000
+        self.connect_error = None
+        self.configs = []
+        self.lock = threading.Lock()
+
+    def on(self, pattern, result=None):
+        self.handlers.insert(0, (re.compile(pattern, re.I), result))
+        return self
+
+    def connect(self, **config):
+        self.configs.append(config)
+        if self.connect_error is not None:
+            raise self.connect_error
+        return FakeConnection(self)
+
+    def statements(self, pattern):
+        """Logged (sql, params) whose sql matches pattern."""
+        return [(sql, params) for sql, params in self.log if re.search(pattern, sql, re.I)]
+
+    def answer(self, sql, params):
+        for pattern, result in self.handlers:
+            if pattern.search(sql):
+                if callable(result) and not isinstance(result, BaseException):
+                    result = result(params)
+                if isinstance(result, BaseException):
+                    raise result
+                return result
+        return []
+
+
+class FakeCursor:
+    def __init__(self, db, dictionary=False):
+        self.db = db
+        self.dictionary = dictionary
+        self.rows = []
+        self.rowcount = -1
+        self.lastrowid = None
+        self.column_names = ()
+
+    def execute(self, sql, params=()):
+        sql = squash(sql)
+        with self.db.lock:
+            self.db.log.append((sql, tuple(params or ())))
+        result = self.db.answer(sql, tuple(params or ()))
+        if isinstance(result, int):
+            self.rows, self.rowcount = [], result
+        else:
+            self.rows = list(result or [])
+            self.rowcount = len(self.rows)
+        if sql.upper().startswith("INSERT"):
+            with self.db.lock:
+                self.db.next_id += 1
+                self.lastrowid = self.db.next_id
+
+    def executemany(self, sql, seq_params):
+        seq_params = [tuple(params) for params in seq_params]
+        sql = squash(sql)
+        with self.db.lock:
+            self.db.log.append((sql, seq_params))
+        for params in seq_params:
+            self.db.answer(sql, params)
+        self.rows, self.rowcount = [], len(seq_params)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.db, dictionary)
+
+    def commit(self):
+        self.db.commits += 1
+        self.db.log.append(("COMMIT", ()))
+
+    def rollback(self):
+        self.db.rollbacks += 1
+        self.db.log.append(("ROLLBACK", ()))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRoot:
+    """Records root.after() calls instead of running a Tk event loop."""
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func=None, *args):
+        self.scheduled.append((ms, func, args))
+        return f"after#{len(self.scheduled)}"
+
+    def title(self, *args):
+        pass
+
+
+class FakeMessagebox:
+    def __init__(self):
+        self.shown = []
+
+    def _record(self, kind):
+        def show(title, message=None, **kwargs):
+            self.shown.append((kind, title, message))
+            return True
+        return show
+
+    def __getattr__(self, name):
+        return self._record(name)
+
+
+@pytest.fixture
+def core():
+    """hotel_core needs neither tkinter nor a MySQL driver."""
+    import hotel_core
+    return hotel_core
+
+
+@pytest.fixture
+def hotel():
+    return pytest.importorskip("EscollarFinalProj", reason="needs mysql-connector-python and tkinter")
+
+
+@pytest.fixture
+def rawdb():
+    """A FakeDB for code that takes a cursor directly (hotel_core, the API)."""
+    return FakeDB()
+
+
+@pytest.fixture
+def db(hotel, monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(hotel.mysql.connector, "connect", fake.connect)
+    return fake
+
+
+@pytest.fixture
+def app(hotel, db, monkeypatch):
+    """A HotelReservation with its session state but no window or background jobs."""
+    monkeypatch.setattr(hotel, "messagebox", FakeMessagebox())
+    app = hotel.HotelReservation.__new__(hotel.HotelReservation)
+    app.root = FakeRoot()
+    app.setup_styles()
+    app.properties = {
+        "LITHO": {"name": "LitHo Hotel", "db_config": {"host": "db", "user": "root", "password": "", "database": "litho"}},
+        "ANNEX": {"name": "LitHo Annex", "db_config": {"host": "db", "user": "root", "password": "", "database": "annex"}},
+    }
+    app.property_code = "LITHO"
+    app.db_config = app.properties["LITHO"]["db_config"]
+    app.property_caches = {}
+    app.replica_state = {}
+    app.last_write_at = {}
+    app.replica_turn = {}
+    app.replica_lock = threading.Lock()
+    app.breakers = {code: hotel.CircuitBreaker() for code in app.properties}
+    app.catalog_cache = {}
+    app.db_banner = None
+    app.probing = set()
+    app.breaker_events = queue.SimpleQueue()
+    app.rooms = {}
+    app.services = {}
+    app.guest_ids = {}
+    app.last_reservation_id = None
+    app.last_waitlist_filled = []
+    app.forecasters = {}
+    app.occupancy_refresh = None
+    app.payment_executor = ThreadPoolExecutor(max_workers=2)
+    app.payment_cycle_running = False
+    app.reset_pending()
+    app.hold_heap = []
+    app.hold_expiry = {}
+    yield app
+    app.payment_executor.shutdown(wait=True)
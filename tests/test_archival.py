@@ -0,0 +1,41 @@
+def test_archive_moves_a_locked_batch_and_returns_units(app, db):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE created_at <", [(1, 10), (2, 10), (3, None), (4, 11)])
+    moved, err = app.archive_completed_reservations(after_days=30, batch_size=100)
+    assert (moved, err) == (4, None)
+
+    select_sql, params = db.statements(r"^SELECT reservation_id, room_id FROM reservations")[0]
+    assert select_sql.endswith("FOR UPDATE")
+    assert params == (30, 30, 100)
+
+    insert_sql, insert_params = db.statements(r"^INSERT INTO reservations_archive")[0]
+    assert "unit_id) SELECT" in insert_sql and insert_sql.count("unit_id") == 2
+    assert insert_params == (1, 2, 3, 4)
+    assert db.statements(r"^DELETE FROM reservations WHERE")[0][1] == (1, 2, 3, 4)
+
+    credits = {params[1]: params[0] for _, params in db.statements(r"^UPDATE rooms SET available = available \+")}
+    assert credits == {10: 2, 11: 1}
+    assert db.log[-1] == ("COMMIT", ())
+
+
+def test_archive_runs_one_transaction_per_full_batch(app, db):
+    batches = [[(1, 10), (2, 10)], [(3, 10)]]
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE created_at <", lambda params: batches.pop(0) if batches else [])
+    moved, err = app.archive_completed_reservations(batch_size=2)
+    assert (moved, err) == (3, None)
+    assert db.commits == 2
+
+
+def test_archive_reports_failures_without_a_dialog(app, db, hotel):
+    db.on(r"^INSERT INTO reservations_archive", hotel.mysql.connector.Error(msg="disk full"))
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE created_at <", [(1, 10)])
+    moved, err = app.archive_completed_reservations()
+    assert moved == 0 and "disk full" in err
+    assert db.rollbacks == 1
+    assert hotel.messagebox.shown == []
+
+
+def test_archive_and_cancel_copies_keep_the_room_number(hotel):
+    assert hotel.RESERVATION_COPY_COLUMNS.endswith(", unit_id")
+    assert "unit_id" not in hotel.RESERVATION_COLUMNS
+    assert "FROM reservations_archive r" in hotel.ARCHIVE_LIST_SQL
+    assert "LEFT JOIN room_units u ON r.unit_id = u.unit_id" in hotel.ARCHIVE_LIST_SQL
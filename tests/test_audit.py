@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def drifted(db):
+    db.on(r"^SELECT room_id, room_type, available FROM rooms", [(1, "Deluxe", 4), (2, "Suite", 1), (3, "Loft", -1)])
+    db.on(r"^SELECT room_id, COUNT\(\*\) FROM room_units", [(1, 5), (2, 3)])
+    db.on(r"^SELECT MIN\(reservation_id\), MAX\(reservation_id\) FROM reservations$", [(1, 10)])
+    db.on(r"^SELECT MIN\(reservation_id\), MAX\(reservation_id\) FROM reservations_", [(None, None)])
+    db.on(r"^SELECT MIN\(guest_id\)", [(None, None)])
+    # Deluxe: 5 units, 1 booked -> 4 free (matches); Suite: 3 units, 1 booked -> 2 free, counter says 1
+    db.on(r"FROM reservations r LEFT JOIN rooms rm", [(1, 1, 0, 0), (2, 1, 0, 0), (None, 2, 0, 1)])
+    return db
+
+
+def test_audit_reports_drift_without_touching_counters(app, drifted):
+    report, err = app.audit_inventory(workers=2)
+    assert err is None
+    assert report['drift'] == [(2, "Suite", 1, 2)]
+    assert report['unknown_capacity'] == [(3, "Loft", -1)]
+    assert report['dangling_guests'] == {"reservations": 1}
+    assert (report['reservations'], report['repaired']) == (4, 0)
+    assert drifted.statements(r"^UPDATE rooms") == []
+
+
+def test_audit_repair_rechecks_under_a_lock(app, drifted):
+    drifted.on(r"^SELECT available FROM rooms WHERE room_id", [(1,)])
+    drifted.on(r"^SELECT COUNT\(\*\) FROM room_units WHERE room_id", [(3,)])
+    drifted.on(r"^SELECT COUNT\(\*\) FROM reservations WHERE room_id", [(1,)])
+    report, err = app.audit_inventory(repair=True)
+    assert err is None and report['repaired'] == 1
+    assert drifted.statements(r"^SELECT available FROM rooms")[0][0].endswith("FOR UPDATE")
+    assert drifted.statements(r"^UPDATE rooms SET available = %s")[0][1] == (2, 2)
+
+
+def test_nightly_audit_is_report_only_by_default(app, hotel, monkeypatch):
+    assert hotel.AUDIT_REPAIR_NIGHTLY is False
+    calls = []
+    monkeypatch.setattr(app, "audit_inventory", lambda repair, property_code: calls.append((property_code, repair)) or ({}, "skipped"))
+
+    class InlineThread:
+        def __init__(self, target, daemon=None):
+            self.target = target
+
+        def start(self):
+            self.target()
+
+    monkeypatch.setattr(hotel.threading, "Thread", InlineThread)
+    app.schedule_night_audit()
+    _, run, _ = app.root.scheduled[0]
+    run()
+    assert calls == [("LITHO", False), ("ANNEX", False)]
+    # and it re-arms itself for the next night
+    assert len(app.root.scheduled) == 2
@@ -0,0 +1,80 @@
+import pytest
+
+ROOM = (10, "Deluxe", 2500.0, 3)
+
+
+def booked(core, rawdb, **kwargs):
+    args = dict(property_code="LITHO", room_type="Deluxe", name="Ana Cruz", phone="09171234567", nights=2,
+                services=["Spa"], payment="Cash", service_cost=500.0)
+    args.update(kwargs)
+    cursor = rawdb.connect().cursor()
+    return core.run_steps(cursor, core.book_steps(**args))
+
+
+def test_booking_prices_from_the_locked_row(core, rawdb):
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [ROOM])
+    rawdb.on(r"SELECT COUNT\(\*\) FROM inventory_holds", [(1,)])
+    rawdb.on(r"SELECT u.room_number", [("10-001",)])
+    booking = booked(core, rawdb)
+    assert booking["total"] == 5500.0 and booking["room_number"] == "10-001"
+    assert booking["payment_status"] is None and rawdb.statements(r"^INSERT INTO payments") == []
+    [(_, params)] = rawdb.statements(r"^INSERT INTO reservations")
+    assert params == (booking["guest_id"], 10, 2, "Spa", 5500.0, "Cash")
+    assert rawdb.statements(r"^UPDATE rooms SET available = available - 1")[0][1] == (10,)
+
+
+def test_gateway_bookings_get_a_pending_payment(core, rawdb):
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [ROOM])
+    rawdb.on(r"SELECT COUNT\(\*\) FROM inventory_holds", [(0,)])
+    booking = booked(core, rawdb, payment="GCash", guest_id=7)
+    assert booking["payment_status"] == "pending" and booking["guest_id"] == 7
+    assert rawdb.statements(r"^INSERT INTO guests") == []
+    [(_, params)] = rawdb.statements(r"^INSERT INTO payments")
+    assert params[-1] == core.payment_key("LITHO", booking["reservation_id"])
+
+
+def test_other_clerks_holds_can_fill_the_room(core, rawdb):
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [ROOM])
+    rawdb.on(r"SELECT COUNT\(\*\) FROM inventory_holds", [(3,)])
+    with pytest.raises(core.RoomUnavailable):
+        booked(core, rawdb)
+    assert rawdb.statements(r"^INSERT") == []
+
+
+def test_our_own_hold_is_consumed(core, rawdb):
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [(10, "Deluxe", 2500.0, 1)])
+    rawdb.on(r"^DELETE FROM inventory_holds WHERE hold_id = %s AND expires_at", 1)
+    booked(core, rawdb, hold_id=42)
+    assert rawdb.statements(r"SELECT COUNT\(\*\) FROM inventory_holds") == []
+    assert rawdb.statements(r"^INSERT INTO reservations")
+
+
+def test_unknown_room_types_are_reported(core, rawdb):
+    with pytest.raises(core.UnknownRoomType):
+        booked(core, rawdb, room_type="Penthouse")
+
+
+def test_cancel_steps_change_nothing_for_unknown_ids(core, rawdb):
+    cursor = rawdb.connect().cursor()
+    assert core.run_steps(cursor, core.cancel_steps([99])) == ([], [])
+    assert len(rawdb.log) == 1
+
+
+def test_cancel_steps_free_the_room_and_void_payments(core, rawdb):
+    rawdb.on(r"^SELECT reservation_id, room_id FROM reservations", [(5, 10)])
+    cursor = rawdb.connect().cursor()
+    assert core.run_steps(cursor, core.cancel_steps([5])) == ([5], [])
+    for pattern in (r"^UPDATE rooms rm JOIN", r"^INSERT INTO reservations_cancelled",
+                    r"^DELETE FROM reservations WHERE", r"^UPDATE payments"):
+        assert rawdb.statements(pattern)[0][1] == (5,)
+
+
+def test_charged_reservations_are_not_cancelled(core, rawdb):
+    rawdb.on(r"^SELECT reservation_id, room_id FROM reservations", [(5, 10), (6, 10)])
+    rawdb.on(r"^SELECT reservation_id FROM payments", [(6,)])
+    cursor = rawdb.connect().cursor()
+    with pytest.raises(core.PaymentCaptured, match="Reservation 6 has already been charged"):
+        core.run_steps(cursor, core.cancel_steps([5, 6]))
+    lock_sql, params = rawdb.statements(r"^SELECT reservation_id FROM payments")[0]
+    assert "'capturing', 'captured'" in lock_sql and lock_sql.endswith("FOR UPDATE") and params == (5, 6)
+    assert rawdb.statements(r"^(UPDATE|DELETE|INSERT)") == []
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("aiomysql")
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+import booking_api  # noqa: E402
+from hotel_core import Room, Service  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class AsyncCursor:
+    """aiomysql-style cursor over a FakeDB cursor."""
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def execute(self, sql, params=()):
+        self.cursor.execute(sql, params)
+
+    async def executemany(self, sql, seq_params):
+        self.cursor.executemany(sql, seq_params)
+
+    async def fetchone(self):
+        return self.cursor.fetchone()
+
+    async def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+
+class StubStore:
+    """PropertyStore with a fixed catalog and FakeDB-backed transactions."""
+    def __init__(self, db):
+        self.code = "LITHO"
+        self.db = db
+        self.invalidated = 0
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def get_catalog(self):
+        return {"Deluxe": Room(10, "Deluxe", 2500.0, 3, 0)}, {"Spa": Service("Spa", 500.0)}
+
+    async def transaction(self, work):
+        return await work(AsyncCursor(self.db.connect().cursor()))
+
+    def invalidate_catalog(self):
+        self.invalidated += 1
+
+
+def call(store, method, path, **kwargs):
+    async def run():
+        app = booking_api.make_app({})
+        app['stores'] = {"LITHO": store}
+        async with TestClient(TestServer(app)) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json()
+    return asyncio.run(run())
+
+
+def test_the_server_does_not_import_the_desk_app():
+    probe = "import sys, booking_api; print('tkinter' in sys.modules, 'EscollarFinalProj' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+
+
+@pytest.mark.parametrize("body", [{"room_type": ["Deluxe"], "nights": 1}, {"room_type": {}, "nights": 1},
+                                  {"nights": 1}, {"room_type": "Deluxe", "nights": "2"}])
+def test_malformed_quotes_are_rejected(rawdb, body):
+    status, data = call(StubStore(rawdb), "POST", "/api/LITHO/quote", json=body)
+    assert status == 400 and "error" in data
+
+
+def test_quotes_price_room_and_services(rawdb):
+    status, data = call(StubStore(rawdb), "POST", "/api/LITHO/quote",
+                        json={"room_type": "Deluxe", "nights": 2, "services": ["Spa"]})
+    assert status == 200 and data["total"] == 5500.0 and data["available"] == 3
+
+
+@pytest.mark.parametrize("body", [{"name": 5, "phone": "09171234567"}, {"name": "Ana", "phone": 9171234567},
+                                  {"name": "Ana", "phone": "123"}])
+def test_malformed_bookings_are_rejected(rawdb, body):
+    body.update(room_type="Deluxe", nights=1)
+    status, _ = call(StubStore(rawdb), "POST", "/api/LITHO/reservations", json=body)
+    assert status == 400 and rawdb.log == []
+
+
+def test_a_booking_runs_the_shared_transaction(rawdb):
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [(10, "Deluxe", 2500.0, 3)])
+    rawdb.on(r"SELECT COUNT\(\*\) FROM inventory_holds", [(0,)])
+    store = StubStore(rawdb)
+    status, data = call(store, "POST", "/api/LITHO/reservations",
+                        json={"name": "Ana", "phone": "09171234567", "room_type": "Deluxe", "nights": 2,
+                              "services": ["Spa"], "payment": "GCash"})
+    assert status == 201 and data["total"] == 5500.0 and data["payment_status"] == "pending"
+    assert "guest_id" not in data and store.invalidated == 1
+    assert rawdb.statements(r"^INSERT INTO payments")
+
+
+def test_booking_conflicts_map_to_client_errors(rawdb):
+    body = {"name": "Ana", "phone": "09171234567", "room_type": "Deluxe", "nights": 1}
+    assert call(StubStore(rawdb), "POST", "/api/LITHO/reservations", json=body)[0] == 404
+    rawdb.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [(10, "Deluxe", 2500.0, 0)])
+    rawdb.on(r"SELECT COUNT\(\*\) FROM inventory_holds", [(0,)])
+    assert call(StubStore(rawdb), "POST", "/api/LITHO/reservations", json=body)[0] == 409
+
+
+def test_cancelling_an_unknown_reservation_is_a_404(rawdb):
+    status, data = call(StubStore(rawdb), "DELETE", "/api/LITHO/reservations/99")
+    assert status == 404 and "99" in data["error"]
+
+
+def test_cancelling_reports_waitlist_bookings(rawdb):
+    rawdb.on(r"^SELECT reservation_id, room_id FROM reservations", [(5, 10)])
+    rawdb.on(r"FROM waitlist WHERE room_id", [(3, 100, 1, "", 2500.0)])
+    status, data = call(StubStore(rawdb), "DELETE", "/api/LITHO/reservations/5")
+    assert status == 200 and data["cancelled"] == 5 and len(data["waitlist_booked"]) == 1
+
+
+def test_an_exhausted_pool_is_a_503(monkeypatch):
+    class StuckPool:
+        async def acquire(self):
+            await asyncio.sleep(60)
+
+    monkeypatch.setattr(booking_api, "API_ACQUIRE_TIMEOUT", 0.01)
+    store = booking_api.PropertyStore("LITHO", {"database": "litho"})
+    store.pool = StuckPool()
+    store.open = store.close = lambda: asyncio.sleep(0)
+    status, data = call(store, "GET", "/api/LITHO/availability")
+    assert status == 503 and "busy" in data["error"]
+
+
+def test_cancelling_a_charged_reservation_is_a_409(rawdb):
+    rawdb.on(r"^SELECT reservation_id, room_id FROM reservations", [(5, 10)])
+    rawdb.on(r"^SELECT reservation_id FROM payments", [(5,)])
+    status, data = call(StubStore(rawdb), "DELETE", "/api/LITHO/reservations/5")
+    assert status == 409 and "already been charged" in data["error"]
+
+
+def test_load_test_cleanup_deletes_without_touching_the_waitlist(rawdb, core):
+    rawdb.on(r"^SELECT reservation_id FROM reservations WHERE reservation_id IN", [(7,), (8,)])
+    rawdb.on(r"^DELETE FROM reservations WHERE", 2)
+    rawdb.on(r"^DELETE g FROM guests g", 2)
+    cursor = rawdb.connect().cursor()
+    assert core.run_steps(cursor, booking_api.purge_test_bookings_steps([7, 8, 9])) == (2, 2)
+    assert rawdb.statements(r"^UPDATE rooms rm JOIN")[0][1] == (7, 8)
+    assert rawdb.statements(r"^DELETE FROM payments")[0][1] == (7, 8)
+    assert rawdb.statements(r"^DELETE g FROM guests g")[0][1] == ("0999%", "Load Test%")
+    assert rawdb.statements(r"waitlist WHERE room_id|reservations_cancelled \(") == []
+
+
+@pytest.mark.parametrize("argv, refused", [(["--property", "LITHO"], True),
+                                           (["--property", "LITHO", "--allow-production"], False),
+                                           (["--property", "STAGING"], False),
+                                           (["--property", "NOPE", "--allow-production"], True)])
+def test_the_load_test_needs_a_test_property(monkeypatch, argv, refused):
+    ran = []
+
+    async def fake_loadtest(*args):
+        ran.append(args)
+
+    monkeypatch.setitem(booking_api.PROPERTIES, "STAGING", {"name": "Staging", "db_config": {}, "test": True})
+    monkeypatch.setattr(booking_api, "run_loadtest", fake_loadtest)
+    monkeypatch.setattr(sys, "argv", ["booking_api.py", "loadtest"] + argv)
+    if refused:
+        with pytest.raises(SystemExit):
+            booking_api.main()
+    else:
+        booking_api.main()
+    assert bool(ran) is not refused
@@ -0,0 +1,117 @@
+import threading
+
+
+def test_breaker_opens_once_after_the_threshold(hotel):
+    breaker = hotel.CircuitBreaker(threshold=2)
+    assert breaker.record_failure("timeout") is False and breaker.allow()
+    assert breaker.record_failure("timeout") is True and not breaker.allow()
+    assert breaker.record_failure("timeout") is False
+    assert breaker.record_success() is True
+    assert breaker.allow() and breaker.failures == 0
+
+
+def test_probe_backoff_doubles_up_to_the_cap(hotel):
+    breaker = hotel.CircuitBreaker()
+    delays = [breaker.next_probe_delay() for _ in range(8)]
+    assert delays[:3] == [hotel.CIRCUIT_PROBE_BASE_MS, 2 * hotel.CIRCUIT_PROBE_BASE_MS, 4 * hotel.CIRCUIT_PROBE_BASE_MS]
+    assert max(delays) == hotel.CIRCUIT_PROBE_MAX_MS
+    breaker.record_success()
+    assert breaker.next_probe_delay() == hotel.CIRCUIT_PROBE_BASE_MS
+
+
+def test_a_worker_thread_opening_the_breaker_reaches_the_main_loop(app, db, hotel, monkeypatch):
+    shown = []
+    monkeypatch.setattr(app, "_show_db_banner", shown.append)
+    db.connect_error = hotel.mysql.connector.Error(msg="gone away")
+
+    def background_job():
+        for _ in range(hotel.CIRCUIT_FAILURE_THRESHOLD):
+            assert app.try_connect_silent("ANNEX") == (None, "gone away")
+
+    worker = threading.Thread(target=background_job)
+    worker.start()
+    worker.join()
+    assert not app.breakers["ANNEX"].allow()
+    assert shown == []  # nothing touched Tk from the worker
+
+    app._poll_breaker_events()
+    assert shown == ["ANNEX"]
+    assert app.root.scheduled[-1][:2] == (hotel.CIRCUIT_POLL_MS, app._poll_breaker_events)
+    app._poll_breaker_events()
+    assert shown == ["ANNEX"]
+
+
+def test_a_breaker_closed_before_the_poll_shows_nothing(app, db, hotel, monkeypatch):
+    shown = []
+    monkeypatch.setattr(app, "_show_db_banner", shown.append)
+    db.connect_error = hotel.mysql.connector.Error(msg="gone away")
+    for _ in range(hotel.CIRCUIT_FAILURE_THRESHOLD):
+        app.ensure_schema("LITHO")
+    app.breakers["LITHO"].record_success()
+    app._poll_breaker_events()
+    assert shown == []
+
+
+def test_an_open_breaker_fails_fast(app, db, hotel, monkeypatch):
+    shown = []
+    monkeypatch.setattr(app, "_show_db_banner", shown.append)
+    for _ in range(hotel.CIRCUIT_FAILURE_THRESHOLD):
+        app.breakers["LITHO"].record_failure("gone away")
+    assert app.connect() is None
+    assert db.configs == [] and shown == ["LITHO"]
+
+
+def test_a_successful_probe_closes_the_breaker(app, db, monkeypatch):
+    reloaded = []
+    monkeypatch.setattr(app, "load_rooms", lambda: reloaded.append("rooms") or {})
+    monkeypatch.setattr(app, "load_services", lambda: reloaded.append("services") or {})
+    app.breakers["LITHO"].record_failure("x")
+    app.breakers["LITHO"].record_failure("x")
+    app.probing.add("LITHO")
+    done = threading.Thread(target=lambda: None)
+    done.start()
+    done.join()
+    app._finish_probe("LITHO", done, {'ok': True})
+    assert app.breakers["LITHO"].allow() and app.probing == set()
+    assert reloaded == ["rooms", "services"]
+
+
+def test_a_failed_probe_backs_off(app, hotel):
+    app.breakers["ANNEX"].record_failure("x")
+    app.breakers["ANNEX"].record_failure("x")
+    done = threading.Thread(target=lambda: None)
+    done.start()
+    done.join()
+    app._finish_probe("ANNEX", done, {'error': "still down"})
+    assert app.breakers["ANNEX"].last_error == "still down"
+    assert app.root.scheduled[-1] == (hotel.CIRCUIT_PROBE_BASE_MS, app._probe_database, ("ANNEX",))
+
+
+def test_startup_bootstraps_properties_in_parallel_off_the_main_loop(app, db, monkeypatch):
+    annex_released = threading.Event()
+    litho_done = threading.Event()
+
+    def ensure_schema(code):
+        if code == "ANNEX":
+            annex_released.wait(5)  # an unreachable property sitting in its connect timeout
+            return False, "timed out"
+        litho_done.set()
+        return True, None
+
+    loaded = []
+    monkeypatch.setattr(app, "ensure_schema", ensure_schema)
+    monkeypatch.setattr(app, "load_rooms", lambda: loaded.append("rooms") or {})
+    monkeypatch.setattr(app, "load_services", lambda: loaded.append("services") or {})
+
+    app._initial_db_load()  # returns while ANNEX is still stuck
+    ms, finish, (thread, result) = app.root.scheduled[-1]
+    assert finish == app._finish_initial_load and thread.is_alive()
+    assert litho_done.wait(5)  # LITHO was not queued behind ANNEX
+
+    finish(thread, result)
+    assert app.root.scheduled[-1][1] == app._finish_initial_load and loaded == []
+
+    annex_released.set()
+    thread.join(5)
+    finish(thread, result)
+    assert loaded == ["rooms", "services"]
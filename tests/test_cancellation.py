@@ -0,0 +1,66 @@
+def test_bulk_cancel_is_one_set_based_transaction(app, db, hotel):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN", [(1, 10), (2, 10), (3, 11)])
+    assert app.cancel_reservations(["1", 2, 3, 4]) == 3
+
+    lock_sql, lock_params = db.statements(r"^SELECT reservation_id, room_id FROM reservations")[0]
+    assert lock_sql.endswith("FOR UPDATE") and lock_params == (1, 2, 3, 4)
+    # one grouped UPDATE for every room type, over the rows actually found
+    [(restock_sql, restock_params)] = db.statements(r"^UPDATE rooms rm JOIN")
+    assert "GROUP BY room_id" in restock_sql and restock_params == (1, 2, 3)
+    assert db.statements(r"^INSERT INTO reservations_cancelled")[0][1] == (1, 2, 3)
+    assert db.statements(r"^DELETE FROM reservations WHERE")[0][1] == (1, 2, 3)
+    assert len(db.statements(r"^UPDATE payments")) == 1
+    assert db.commits == 1 and db.rollbacks == 0
+    # everything ran before the commit on the same connection
+    assert db.log.index(("COMMIT", ())) > db.log.index(db.statements(r"^DELETE FROM reservations WHERE")[0])
+
+
+def test_bulk_cancel_of_unknown_ids_changes_nothing(app, db):
+    assert app.cancel_reservations([7, 8]) == 0
+    assert db.statements(r"^(UPDATE|DELETE|INSERT)") == []
+    assert db.rollbacks == 1
+
+
+def test_bulk_cancel_of_nothing_skips_the_database(app, db):
+    assert app.cancel_reservations([]) == 0
+    assert db.configs == []
+
+
+def test_bulk_cancel_rolls_back_on_error(app, db, hotel):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN", [(1, 10)])
+    db.on(r"^DELETE FROM reservations WHERE", hotel.mysql.connector.Error(msg="lock wait timeout"))
+    assert app.cancel_reservations([1]) is None
+    assert db.commits == 0 and db.rollbacks == 1
+    assert hotel.messagebox.shown[-1][0] == "showerror"
+
+
+def test_delete_reservation_goes_through_the_bulk_path(app, db):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN", [(5, 10)])
+    assert app.delete_reservation("5") is True
+    assert db.statements(r"^DELETE FROM reservations WHERE")[0][1] == (5,)
+
+
+def test_restore_refuses_when_the_rooms_are_gone(app, db):
+    db.on(r"FROM reservations_cancelled c", [(10, 2, "Deluxe", 1)])
+    restored, err = app.restore_reservations([1, 2])
+    assert restored == 0 and "Only 1 Deluxe left; 2 needed" in err
+    assert db.statements(r"^INSERT INTO reservations ") == []
+    assert db.rollbacks == 1
+
+
+def test_restore_moves_rows_back_and_takes_the_units(app, db):
+    db.on(r"FROM reservations_cancelled c", [(10, 2, "Deluxe", 3)])
+    db.on(r"^INSERT INTO reservations \(", 2)
+    assert app.restore_reservations([1, 2]) == (2, None)
+    assert "SET rm.available = rm.available - taken.n" in db.statements(r"^UPDATE rooms rm JOIN")[0][0]
+    assert db.statements(r"^DELETE FROM reservations_cancelled")[0][1] == (1, 2)
+    assert db.commits == 1
+
+
+def test_restore_leaves_units_other_clerks_are_holding(app, db):
+    db.on(r"FROM reservations_cancelled c", [(10, 2, "Deluxe", 3)])
+    db.on(r"^SELECT room_id, COUNT\(\*\) FROM inventory_holds", [(10, 2)])
+    restored, err = app.restore_reservations([1, 2])
+    assert restored == 0 and "Only 1 Deluxe left; 2 needed" in err
+    assert "expires_at > NOW()" in db.statements(r"FROM inventory_holds")[0][0]
+    assert db.statements(r"^INSERT INTO reservations ") == []
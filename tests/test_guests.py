@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize("raw, cleaned", [
+    ("09171234567", "09171234567"),
+    ("0917-123-4567", "09171234567"),
+    ("0917 123 4567", "09171234567"),
+    ("+63917123456", "63917123456"),
+])
+def test_validate_phone_number_normalizes_separators(hotel, raw, cleaned):
+    assert hotel.validate_phone_number(raw) == (True, cleaned)
+
+
+@pytest.mark.parametrize("raw", ["", "0917123456", "091712345678", "0917abc4567", None])
+def test_validate_phone_number_rejects(hotel, raw):
+    assert hotel.validate_phone_number(raw) == (False, None)
+
+
+def test_upsert_guest_keys_on_normalized_phone(app, db):
+    db.on(r"^INSERT INTO guests", 1)
+    cursor = db.connect().cursor()
+    guest_id = app._upsert_guest(cursor, "Ana Cruz", "0917-123-4567")
+    assert db.statements(r"^INSERT INTO guests")[0][1] == ("Ana Cruz", "09171234567")
+    assert app.guest_ids["09171234567"].guest_id == guest_id
+
+    # same guest again: answered from the session cache
+    assert app._upsert_guest(cursor, "Ana Cruz", "0917 123 4567") == guest_id
+    assert len(db.statements(r"^INSERT INTO guests")) == 1
+
+    # a new name for the same phone goes back to the database (ON DUPLICATE KEY renames)
+    app._upsert_guest(cursor, "Ana C. Reyes", "09171234567")
+    assert len(db.statements(r"^INSERT INTO guests")) == 2
+    assert app.guest_ids["09171234567"].name == "Ana C. Reyes"
+
+
+def test_upsert_sql_returns_the_existing_id_on_duplicate_phone(hotel):
+    assert "ON DUPLICATE KEY UPDATE" in hotel.UPSERT_GUEST_SQL
+    assert "guest_id = LAST_INSERT_ID(guest_id)" in hotel.UPSERT_GUEST_SQL
+
+
+def test_dedup_migration_repoints_reservations_before_deleting_duplicates(hotel):
+    _, _, statements = next(m for m in hotel.SCHEMA_MIGRATIONS if m[0] == 3)
+    repoint = next(i for i, stmt in enumerate(statements) if "SET r.guest_id = k.keep_id" in stmt)
+    delete = next(i for i, stmt in enumerate(statements) if stmt.lstrip().startswith("DELETE g"))
+    unique = next(i for i, stmt in enumerate(statements) if "UNIQUE INDEX uq_guests_phone" in stmt)
+    assert repoint < delete < unique
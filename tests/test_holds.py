@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+
+def test_place_hold_takes_the_room_lock_and_tracks_the_lease(app, db, hotel):
+    app.rooms = {"Deluxe": hotel.Room(4, "Deluxe", 4000, 2, 1)}
+    db.on(r"^SELECT available FROM rooms WHERE room_id", [(2,)])
+    db.on(r"^SELECT COUNT\(\*\) FROM inventory_holds", [(1,)])
+    assert app.place_hold("Deluxe") is True
+    code, hold_id, room_name = app.pending['hold']
+    assert (code, room_name) == ("LITHO", "Deluxe")
+    assert db.statements(r"^SELECT available FROM rooms")[0][0].endswith("FOR UPDATE")
+    assert app.hold_heap[0][1:] == ("LITHO", hold_id)
+    assert app.hold_expiry[("LITHO", hold_id)] == app.hold_heap[0][0]
+
+
+def test_place_hold_fails_when_other_clerks_hold_the_rest(app, db, hotel):
+    app.rooms = {"Deluxe": hotel.Room(4, "Deluxe", 4000, 1, 1)}
+    db.on(r"^SELECT available FROM rooms WHERE room_id", [(1,)])
+    db.on(r"^SELECT COUNT\(\*\) FROM inventory_holds", [(1,)])
+    assert app.place_hold("Deluxe") is False
+    assert db.statements(r"^INSERT INTO inventory_holds") == []
+    assert app.pending.get('hold') is None
+
+
+def test_sellable_counts_our_own_hold_as_available(app, hotel):
+    app.rooms = {"Deluxe": hotel.Room(4, "Deluxe", 4000, 2, 2)}
+    assert app.sellable("Deluxe") == 0
+    app.pending['hold'] = ("LITHO", 7, "Deluxe")
+    assert app.sellable("Deluxe") == 1
+    app.pending['hold'] = ("ANNEX", 7, "Deluxe")
+    assert app.sellable("Deluxe") == 0
+
+
+def test_renew_drops_a_lapsed_hold(app, db):
+    app.pending['hold'] = ("LITHO", 7, "Deluxe")
+    app.hold_expiry[("LITHO", 7)] = datetime.now()
+    db.on(r"^UPDATE inventory_holds SET expires_at", 0)
+    assert app.renew_hold() is False
+    assert app.pending['hold'] is None and app.hold_expiry == {}
+
+
+def test_reaper_skips_renewed_entries_and_reschedules(app, db, hotel):
+    now = datetime.now()
+    app._track_hold("LITHO", 1, now - timedelta(seconds=5))
+    app._track_hold("LITHO", 2, now - timedelta(seconds=3))
+    app._track_hold("LITHO", 2, now + timedelta(seconds=60))  # renewed
+    app._track_hold("ANNEX", 3, now - timedelta(seconds=1))
+    app.pending['hold'] = ("LITHO", 1, "Deluxe")
+    app.reap_expired_holds()
+
+    deletes = {config["database"]: params
+               for config, (_, params) in zip(db.configs, db.statements(r"^DELETE FROM inventory_holds"))}
+    assert deletes == {"litho": (1,), "annex": (3,)}
+    assert list(app.hold_expiry) == [("LITHO", 2)]
+    assert len(app.hold_heap) == 1
+    assert app.pending['hold'] is None
+    assert app.root.scheduled[-1][:2] == (hotel.HOLD_REAP_INTERVAL_MS, app.reap_expired_holds)
+
+
+def test_release_gives_the_unit_back(app, db):
+    app.pending['hold'] = ("ANNEX", 9, "Deluxe")
+    app.hold_expiry[("ANNEX", 9)] = datetime.now()
+    app.release_hold()
+    assert db.statements(r"^DELETE FROM inventory_holds WHERE hold_id = %s")[0][1] == (9,)
+    assert db.configs[-1]["database"] == "annex"
+    assert app.pending['hold'] is None and app.hold_expiry == {}
+
+
+def test_a_failed_booking_is_reported_once(app, db, hotel, monkeypatch):
+    app.rooms = {"Deluxe": hotel.Room(4, "Deluxe", 4000, 1, 0)}
+    app.pending.update(name="Ana Cruz", phone="09171234567", nights=1, room="Deluxe", services=[],
+                       payment="Cash", total=4000.0)
+    back = []
+    monkeypatch.setattr(app, "show_room_selection", lambda: back.append(True))
+    # another clerk's hold lands after the screen's check: the locked count says no
+    db.on(r"FROM rooms WHERE room_type = %s FOR UPDATE", [(4, "Deluxe", 4000, 1)])
+    db.on(r"^SELECT COUNT\(\*\) FROM inventory_holds", [(1,)])
+    app.finalize_reservation()
+    assert [shown[:2] for shown in hotel.messagebox.shown] == [("showerror", "Unavailable")]
+    assert back == [True]
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+FIRST = date(2025, 3, 1)
+
+
+def test_stays_are_counted_per_night_and_clipped_to_the_window(hotel):
+    stays = [(1, FIRST - timedelta(days=2), 3),   # last night falls on day 0
+             (1, FIRST + timedelta(days=1), 2),
+             (1, FIRST + timedelta(days=2), 10),  # runs past the window
+             (2, FIRST, 1),
+             (9, FIRST, 1)]                       # room type not listed
+    grid = hotel.build_occupancy_grid(stays, [1, 2, 3], FIRST.toordinal(), 5)
+    assert grid == {1: [1, 1, 2, 1, 1], 2: [1, 0, 0, 0, 0], 3: [0, 0, 0, 0, 0]}
+
+
+def test_stays_outside_the_window_are_ignored(hotel):
+    stays = [(1, FIRST - timedelta(days=5), 2), (1, FIRST + timedelta(days=7), 1), (1, FIRST, 0)]
+    assert hotel.build_occupancy_grid(stays, [1], FIRST.toordinal(), 7) == {1: [0] * 7}
+
+
+def test_colors_run_from_empty_to_full(hotel):
+    palette = hotel.OCCUPANCY_PALETTE
+    assert hotel.occupancy_color(0, 4) == palette[0]
+    assert hotel.occupancy_color(2, 4) == palette[len(palette) // 2]
+    assert hotel.occupancy_color(4, 4) == palette[-1]
+    assert hotel.occupancy_color(5, 4) == hotel.OCCUPANCY_OVERBOOKED_COLOR
+    assert hotel.occupancy_color(0, 0) == palette[0] and hotel.occupancy_color(1, 0) == palette[-1]
+
+
+def test_recent_grids_skip_the_archive(app, db):
+    db.on(r"FROM rooms rm ORDER BY rm.room_id", [(1, "Deluxe", 3)])
+    db.on(r"FROM reservations WHERE room_id IS NOT NULL", [(1, date.today(), 2)])
+    rooms, grid = app.get_occupancy_grid(date.today(), days=3)
+    assert rooms == [(1, "Deluxe", 3)] and grid == {1: [1, 1, 0]}
+    assert db.statements(r"FROM reservations_archive") == []
+
+
+def test_old_grids_include_archived_stays(app, db, hotel):
+    first_day = date.today() - timedelta(days=hotel.ARCHIVE_AFTER_DAYS + 30)
+    db.on(r"FROM rooms rm ORDER BY rm.room_id", [(1, "Deluxe", 3)])
+    db.on(r"FROM reservations_archive WHERE", [(1, first_day, 1)])
+    _, grid = app.get_occupancy_grid(first_day, days=2)
+    assert grid == {1: [1, 0]}
+    assert db.statements(r"FROM reservations_archive")[0][1] == (first_day + timedelta(days=2), first_day)
@@ -0,0 +1,239 @@
+import pytest
+
+
+class PaymentsTable:
+    """Just enough of the payments table, answering the payment statements on a FakeDB."""
+    def __init__(self, db):
+        self.rows = {}
+        self.next_id = 1
+        handlers = {
+            r"^UPDATE payments SET status = CASE WHEN status = 'pending'": self.void_for_cancel,
+            r"^SELECT p.payment_id, p.reservation_id": self.newest_voided,
+            r"^UPDATE payments SET status = IF\(auth_code IS NULL": self.withdraw_void,
+            r"^UPDATE payments SET status = 'pending' WHERE payment_id = %s$": self.unvoid,
+            r"^INSERT INTO payments": self.insert,
+            r"^SELECT payment_id, idempotency_key, gateway FROM payments": self.voids_due,
+            r"^UPDATE payments SET status = 'voiding'": self.claim_void,
+            r"^UPDATE payments SET status = 'voided'": lambda params: self.move(params[0], 'voiding', 'voided'),
+            r"^SELECT payment_id, idempotency_key, amount, gateway, attempts FROM payments": self.pending,
+            r"^UPDATE payments SET status = 'authorizing'": self.claim_authorization,
+            r"^UPDATE payments SET status = 'authorized', auth_code": self.authorized,
+            r"^UPDATE payments SET status = 'pending', last_error": self.retry_later,
+            r"^UPDATE payments SET status = %s, last_error": lambda params: self.move(params[2], 'authorizing', params[0]),
+            r"^SELECT payment_id FROM payments WHERE gateway = %s AND status = 'authorized'": self.authorized_ids,
+            r"^UPDATE payments SET status = 'capturing'": self.claim_capture,
+            r"WHERE settlement_id = %s AND status = 'capturing'": self.capturing,
+            r"^UPDATE payments SET status = 'captured'": lambda params: self.move(params[0], 'capturing', 'captured'),
+        }
+        for pattern, handler in handlers.items():
+            db.on(pattern, handler)
+
+    def add(self, reservation_id, status, key, attempts=0, auth_code=None, amount=5000.0):
+        payment_id = self.next_id
+        self.next_id += 1
+        self.rows[payment_id] = {'reservation_id': reservation_id, 'method': "GCash", 'gateway': "simulated",
+                                 'amount': amount, 'currency': "PHP", 'status': status, 'key': key,
+                                 'attempts': attempts, 'auth_code': auth_code, 'settlement_id': None}
+        return payment_id
+
+    def move(self, payment_id, from_status, to_status):
+        row = self.rows[payment_id]
+        if row['status'] != from_status:
+            return 0
+        row['status'] = to_status
+        return 1
+
+    def void_for_cancel(self, res_ids):
+        n = 0
+        for row in self.rows.values():
+            if row['reservation_id'] in res_ids and row['status'] in ('pending', 'authorizing', 'authorized'):
+                row['status'] = 'voided' if row['status'] == 'pending' else 'void_pending'
+                n += 1
+        return n
+
+    def newest_voided(self, res_ids):
+        newest = {}
+        for payment_id, row in self.rows.items():
+            if row['reservation_id'] in res_ids:
+                newest[row['reservation_id']] = payment_id
+        return [(pid, r['reservation_id'], r['method'], r['gateway'], r['amount'], r['currency'], r['status'], r['attempts'])
+                for pid, r in ((pid, self.rows[pid]) for pid in newest.values())
+                if r['status'] in ('void_pending', 'voiding', 'voided')]
+
+    def withdraw_void(self, params):
+        row = self.rows[params[0]]
+        row['status'] = 'pending' if row['auth_code'] is None else 'authorized'
+        return 1
+
+    def unvoid(self, params):
+        return self.move(params[0], 'voided', 'pending')
+
+    def insert(self, params):
+        reservation_id, method, gateway, amount, currency, key = params
+        self.add(reservation_id, 'pending', key, amount=amount)
+        return 1
+
+    def voids_due(self, params):
+        return [(pid, r['key'], r['gateway']) for pid, r in self.rows.items() if r['status'] == 'void_pending']
+
+    def claim_void(self, params):
+        return self.move(params[0], 'void_pending', 'voiding')
+
+    def pending(self, params):
+        return [(pid, r['key'], r['amount'], r['gateway'], r['attempts'])
+                for pid, r in self.rows.items() if r['status'] == 'pending']
+
+    def claim_authorization(self, params):
+        claimed = self.move(params[0], 'pending', 'authorizing')
+        self.rows[params[0]]['attempts'] += claimed
+        return claimed
+
+    def authorized(self, params):
+        reference, payment_id = params
+        self.rows[payment_id]['auth_code'] = reference
+        return self.move(payment_id, 'authorizing', 'authorized')
+
+    def retry_later(self, params):
+        return self.move(params[-1], 'authorizing', 'pending')
+
+    def authorized_ids(self, params):
+        return [(pid,) for pid, r in self.rows.items() if r['gateway'] == params[0] and r['status'] == 'authorized']
+
+    def claim_capture(self, params):
+        settlement_id, *ids = params
+        for payment_id in ids:
+            self.rows[payment_id]['settlement_id'] = settlement_id
+            self.move(payment_id, 'authorized', 'capturing')
+        return len(ids)
+
+    def capturing(self, params):
+        return [(pid, r['key'], r['amount']) for pid, r in self.rows.items()
+                if r['settlement_id'] == params[0] and r['status'] == 'capturing']
+
+    def statuses(self):
+        return {payment_id: row['status'] for payment_id, row in self.rows.items()}
+
+
+@pytest.fixture
+def gateway(core, monkeypatch):
+    gateway = core.SimulatedGateway(decline_rate=0, error_rate=0, latency=(0, 0), seed=1)
+    monkeypatch.setitem(core.PAYMENT_GATEWAYS, "simulated", gateway)
+    return gateway
+
+
+@pytest.fixture
+def payments(app, db):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN", [(5, 10)])
+    db.on(r"FROM reservations_cancelled c", [(10, 1, "Deluxe", 3)])
+    db.on(r"^INSERT INTO reservations \(", 1)
+    return PaymentsTable(db)
+
+
+def authorized_payment(payments, gateway, key="LITHO-res5-auth"):
+    result = gateway.authorize(key, 5000.0, "PHP", "Reservation 5")
+    return payments.add(5, 'authorized', key, attempts=1, auth_code=result.reference)
+
+
+def test_gateways_must_implement_every_call(core):
+    with pytest.raises(TypeError):
+        core.PaymentGateway()
+
+    class AuthorizeOnly(core.PaymentGateway):
+        def authorize(self, key, amount, currency, description):
+            return core.PaymentResult('approved')
+
+    with pytest.raises(TypeError):
+        AuthorizeOnly()
+
+
+def test_simulated_gateway_replays_outcomes_per_key(core):
+    gateway = core.SimulatedGateway(decline_rate=0, error_rate=0, latency=(0, 0), seed=3)
+    first = gateway.authorize("k1", 10.0, "PHP", "")
+    assert gateway.authorize("k1", 10.0, "PHP", "") is first
+    _, results = gateway.capture_batch([("k1", 10.0), ("k2", 5.0)])
+    assert results["k1"].status == 'approved' and results["k2"].status == 'declined'
+    assert gateway.void("k1").status == 'declined'
+
+
+def test_pending_payments_are_claimed_and_authorized(app, payments, gateway):
+    payment_id = payments.add(5, 'pending', "LITHO-res5-auth")
+    assert app.process_payments("LITHO") == (1, None)
+    assert payments.rows[payment_id]['status'] == 'authorized'
+    assert payments.rows[payment_id]['auth_code'] == gateway.authorizations["LITHO-res5-auth"].reference
+
+
+def test_transient_errors_back_off_then_fail(app, db, payments, core, hotel, monkeypatch):
+    monkeypatch.setitem(core.PAYMENT_GATEWAYS, "simulated", core.SimulatedGateway(error_rate=1, latency=(0, 0)))
+    payment_id = payments.add(5, 'pending', "LITHO-res5-auth")
+    app.process_payments("LITHO")
+    assert payments.rows[payment_id]['status'] == 'pending'
+    assert db.statements(r"^UPDATE payments SET status = 'pending', last_error")[0][1][1] == hotel.PAYMENT_RETRY_BASE_SECONDS
+    payments.rows[payment_id]['attempts'] = hotel.PAYMENT_MAX_ATTEMPTS - 1
+    app.process_payments("LITHO")
+    assert payments.rows[payment_id]['status'] == 'failed'
+
+
+def test_undo_before_the_void_is_sent_keeps_the_authorization(app, payments, gateway):
+    payment_id = authorized_payment(payments, gateway)
+    assert app.cancel_reservations([5]) == 1
+    assert payments.statuses() == {payment_id: 'void_pending'}
+    assert app.restore_reservations([5]) == (1, None)
+    assert payments.statuses() == {payment_id: 'authorized'}
+    assert app.settle_payments("LITHO") == (1, 5000.0, None)
+    assert payments.statuses() == {payment_id: 'captured'} and gateway.voided == set()
+
+
+def test_undo_after_the_void_requeues_under_a_new_key(app, payments, gateway):
+    old_id = authorized_payment(payments, gateway)
+    app.cancel_reservations([5])
+    app.process_payments("LITHO")
+    assert payments.statuses() == {old_id: 'voided'} and gateway.voided == {"LITHO-res5-auth"}
+
+    app.restore_reservations([5])
+    [new_id] = set(payments.rows) - {old_id}
+    new_key = payments.rows[new_id]['key']
+    assert new_key.startswith("LITHO-res5-auth-") and new_key.endswith(f"r{old_id}")
+    assert payments.statuses() == {old_id: 'voided', new_id: 'pending'}
+
+    app.process_payments("LITHO")
+    assert app.settle_payments("LITHO") == (1, 5000.0, None)
+    assert payments.statuses() == {old_id: 'voided', new_id: 'captured'}
+
+
+def test_undo_of_a_payment_never_sent_reuses_it(app, payments, gateway):
+    payment_id = payments.add(5, 'pending', "LITHO-res5-auth")
+    app.cancel_reservations([5])
+    assert payments.statuses() == {payment_id: 'voided'}
+    app.restore_reservations([5])
+    assert payments.statuses() == {payment_id: 'pending'}
+
+
+def test_a_void_in_flight_is_not_withdrawn(app, payments, gateway):
+    payment_id = authorized_payment(payments, gateway)
+    payments.rows[payment_id]['status'] = 'voiding'
+    app.restore_reservations([5])
+    assert len(payments.rows) == 2 and payments.rows[payment_id]['status'] == 'voiding'
+
+
+def test_background_payment_work_does_not_stamp_reads(app, payments, gateway):
+    payments.add(5, 'pending', "LITHO-res5-auth")
+    app.process_payments("LITHO")
+    app.settle_payments("LITHO")
+    assert app.last_write_at == {}
+
+
+def test_a_charged_reservation_cannot_be_cancelled(app, db, payments, hotel):
+    payment_id = payments.add(5, 'captured', "LITHO-res5-auth", attempts=1, auth_code="SIM-A000001")
+    db.on(r"^SELECT reservation_id FROM payments", lambda params: [
+        (row['reservation_id'],) for row in payments.rows.values()
+        if row['reservation_id'] in params and row['status'] in ('capturing', 'captured')])
+    assert app.cancel_reservations([5]) is None
+    assert hotel.messagebox.shown[-1][:2] == ("showwarning", "Cannot Cancel")
+    assert db.statements(r"^DELETE FROM reservations") == [] and db.rollbacks == 1
+    assert payments.statuses() == {payment_id: 'captured'}
+
+
+def test_unexpected_errors_loading_payments_reach_a_dialog(app, db, hotel):
+    db.on(r"FROM payments ORDER BY payment_id DESC", ValueError("bad row"))
+    assert app.get_payments() == []
+    assert hotel.messagebox.shown[-1] == ("showerror", "Error", "Unexpected error loading payments: bad row")
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import FakeDB
+
+
+def listing_row(res_id, created_at):
+    return (res_id, "Guest", "09171234567", "Deluxe", 2, "", 100, "Cash", created_at, None)
+
+
+def per_database(hotel, monkeypatch, **dbs):
+    """Route connections to one FakeDB per database name; a missing name is unreachable."""
+    def connect(**config):
+        if config["database"] not in dbs:
+            raise hotel.mysql.connector.Error(msg=f"{config['database']} down")
+        return dbs[config["database"]].connect(**config)
+    monkeypatch.setattr(hotel.mysql.connector, "connect", connect)
+
+
+def test_fan_out_merges_properties_newest_first(app, hotel, monkeypatch):
+    per_database(hotel, monkeypatch,
+                 litho=FakeDB().on(r"^SELECT r.reservation_id", [listing_row(1, datetime(2026, 1, 2))]),
+                 annex=FakeDB().on(r"^SELECT r.reservation_id", [listing_row(7, datetime(2026, 1, 3)),
+                                                                  listing_row(8, datetime(2026, 1, 1))]))
+    rows, errors = app.get_reservations_all_properties()
+    assert errors == {}
+    assert [(r.property_code, r.reservation_id) for r in rows] == [("ANNEX", 7), ("LITHO", 1), ("ANNEX", 8)]
+
+
+def test_fan_out_reports_unreachable_properties(app, hotel, monkeypatch):
+    per_database(hotel, monkeypatch, litho=FakeDB().on(r"^SELECT r.reservation_id", [listing_row(1, datetime(2026, 1, 2))]))
+    rows, errors = app.get_reservations_all_properties("Guest")
+    assert [r.property_code for r in rows] == ["LITHO"]
+    assert list(errors) == ["ANNEX"] and "annex down" in errors["ANNEX"]
+
+
+def test_switch_property_keeps_the_outgoing_caches(app, db, hotel):
+    db.on(r"FROM rooms rm", [(1, "Deluxe", 2500, 3, 0)])
+    db.on(r"FROM services", [("Breakfast", 300)])
+    app.rooms = {"Standard": hotel.Room(9, "Standard", 1500, 1)}
+    app.switch_property("ANNEX")
+    assert app.property_code == "ANNEX" and list(app.rooms) == ["Deluxe"]
+    assert db.configs[-1]["database"] == "annex"
+    connections = len(db.configs)
+    app.switch_property("LITHO")
+    assert list(app.rooms) == ["Standard"]
+    assert len(db.configs) == connections
+
+
+@pytest.mark.parametrize("call", [
+    lambda app: app.get_waitlist("ANNEX"),
+    lambda app: app.get_payments(property_code="ANNEX"),
+    lambda app: app.explain_hot_queries("ANNEX"),
+    lambda app: app.get_receipt_records(datetime(2026, 1, 1).date(), "ANNEX"),
+    lambda app: app.optimize_room_assignments(property_code="ANNEX"),
+])
+def test_staff_tools_use_the_requested_property(app, db, call):
+    call(app)
+    assert {config["database"] for config in db.configs} == {"annex"}
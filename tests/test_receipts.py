@@ -0,0 +1,64 @@
+import os
+import re
+from datetime import date, datetime
+
+import pytest
+
+
+@pytest.fixture
+def reservation(hotel):
+    return hotel.Reservation(42, "Ana (Cruz)", "09171234567", "Deluxe", 3, "Breakfast,Spa", 8100.5, "GCash",
+                             datetime(2026, 3, 1, 14, 30), "LITHO", "101")
+
+
+def test_text_receipt_fields(hotel, reservation):
+    text = hotel.render_receipt_text(reservation, hotel="LitHo Hotel")
+    assert text.startswith("LitHo Hotel\nReservation Receipt #42\n")
+    assert "Room Number:       101" in text
+    assert "Check-in:          2026-03-01" in text
+    assert "Total Amount:      ₱8100.50" in text
+
+
+def test_text_receipt_without_a_room_number(hotel, reservation):
+    reservation.room_number = None
+    assert "Room Number:       To be assigned" in hotel.render_receipt_text(reservation)
+
+
+def test_pdf_receipt_is_well_formed(hotel, reservation):
+    pdf = hotel.render_receipt_pdf(reservation, hotel="LitHo Hotel")
+    assert pdf.startswith(b"%PDF-1.4\n") and pdf.endswith(b"%%EOF\n")
+    # every xref entry points at its object
+    xref_at = int(re.search(rb"startxref\n(\d+)\n", pdf).group(1))
+    assert pdf[xref_at:].startswith(b"xref\n")
+    offsets = [int(m) for m in re.findall(rb"(\d{10}) 00000 n", pdf)]
+    for number, offset in enumerate(offsets, 1):
+        assert pdf[offset:].startswith(b"%d 0 obj\n" % number)
+    # parentheses in the guest name are escaped, the peso sign is spelled out
+    assert rb"Ana \(Cruz\)" in pdf
+    assert b"PHP 8100.50" in pdf
+
+
+def test_batch_writes_one_file_per_receipt(hotel, reservation, tmp_path):
+    other = hotel.Reservation(43, "Ben", "09170000000", "Standard", 1, "", 1500, "Cash", datetime(2026, 3, 2))
+    paths = hotel.render_receipts_batch([reservation, other], str(tmp_path / "out"), fmt='txt')
+    assert [os.path.basename(p) for p in paths] == ["receipt_42.txt", "receipt_43.txt"]
+    assert "Ben" in open(paths[1], encoding='utf-8').read()
+
+
+def test_large_batches_render_in_worker_processes(hotel, tmp_path, monkeypatch):
+    monkeypatch.setattr(hotel, "RECEIPT_PARALLEL_THRESHOLD", 4)
+    batch = [hotel.Reservation(i, f"Guest {i}", "09171234567", "Deluxe", 1, "", 100, "Cash", datetime(2026, 3, 1))
+             for i in range(1, 9)]
+    paths = hotel.render_receipts_batch(batch, str(tmp_path), fmt='pdf', workers=2)
+    assert len(paths) == 8
+    assert all(open(p, 'rb').read().startswith(b"%PDF") for p in paths)
+
+
+def test_export_writes_into_a_property_and_day_folder(app, db, hotel, tmp_path, monkeypatch):
+    monkeypatch.setattr(hotel, "RECEIPT_OUTPUT_DIR", str(tmp_path))
+    db.on(r"^SELECT r.reservation_id", [(5, "Ana", "09171234567", "Deluxe", 2, "", 5000, "Cash", datetime(2026, 3, 1), "101")])
+    count, folder = app.export_receipts_for_day(date(2026, 3, 3), property_code="ANNEX")
+    assert count == 1
+    assert folder == os.path.join(str(tmp_path), "ANNEX", "2026-03-03")
+    assert os.listdir(folder) == ["receipt_5.pdf"]
+    assert db.configs[-1]["database"] == "annex"
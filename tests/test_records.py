@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+
+@pytest.mark.parametrize("name", ["Room", "Service", "Guest", "Reservation"])
+def test_every_record_pairs_columns_with_from_row(hotel, name):
+    record = getattr(hotel, name)
+    width = len(record.COLUMNS.split(","))
+    row = tuple(range(1, width + 1))
+    assert isinstance(record.from_row(row), record)
+    with pytest.raises(ValueError):
+        record.from_row(row + (0,))
+
+
+def test_record_queries_select_the_record_columns(hotel):
+    for sql in (hotel.RESERVATION_LIST_SQL, hotel.RESERVATION_SEARCH_SQL):
+        assert f"SELECT {hotel.Reservation.COLUMNS}" in sql
+    assert f"SELECT {hotel.Room.COLUMNS}" in hotel.ROOMS_SQL
+
+
+def test_room_from_row_normalizes_nulls(hotel):
+    room = hotel.Room.from_row((1, "Deluxe", None, None, None))
+    assert (room.price, room.available, room.held) == (0.0, 0, 0)
+
+
+def test_reservation_from_rows_tags_the_property(hotel):
+    row = (5, "Ana", "09171234567", "Deluxe", 2, "Spa", 5000, "Cash", datetime(2026, 3, 1), "101")
+    [reservation] = hotel.Reservation.from_rows([row], "ANNEX")
+    assert (reservation.property_code, reservation.room_number, reservation.guest_name) == ("ANNEX", "101", "Ana")
+
+
+def test_receipt_records_use_the_listing_columns(app, db, hotel):
+    db.on(r"^SELECT r.reservation_id", [(5, "Ana", "09171234567", "Deluxe", 2, "", 5000, "Cash", datetime(2026, 3, 1), None)])
+    [reservation] = app.get_receipt_records(datetime(2026, 3, 1).date())
+    assert reservation.reservation_id == 5
+    assert db.statements(r"^SELECT r.reservation_id")[0][0].startswith(f"SELECT {hotel.Reservation.COLUMNS}")
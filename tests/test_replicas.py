@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def replicated(app, monkeypatch):
+    app.properties["LITHO"]["replicas"] = [{"host": "replica-1"}]
+    monkeypatch.setattr(app, "_measure_replica_lag", lambda conn: 1)
+    return app
+
+
+def test_reads_go_to_a_caught_up_replica(replicated, db):
+    assert replicated.connect(readonly=True) is not None
+    assert db.configs[-1]["host"] == "replica-1"
+    assert replicated.replica_state[("LITHO", 0)][1] == 1
+
+
+def test_connecting_for_writes_does_not_stamp_the_session(replicated, db):
+    replicated.connect()
+    replicated.try_connect_silent("LITHO")
+    assert replicated.last_write_at == {}
+    replicated.connect(readonly=True)
+    assert db.configs[-1]["host"] == "replica-1"
+
+
+def test_a_committed_write_keeps_reads_on_the_primary(replicated, db):
+    assert replicated.remove_waitlist_entries([3]) is True
+    assert "LITHO" in replicated.last_write_at
+    replicated.connect(readonly=True)
+    replicated.connect(readonly=True)
+    # the first read measures the replica and falls back, the second skips it outright
+    assert [config["host"] for config in db.configs[1:]] == ["replica-1", "db", "db"]
+
+
+def test_a_rolled_back_write_does_not_stamp(replicated, db, hotel):
+    db.on(r"^UPDATE waitlist", hotel.mysql.connector.Error(msg="deadlock"))
+    assert replicated.remove_waitlist_entries([3]) is False
+    assert replicated.last_write_at == {}
+
+
+def test_the_stamp_expires_after_lag_plus_margin(replicated, db, hotel):
+    replicated.connect(readonly=True)  # measures lag = 1
+    replicated.last_write_at["LITHO"] = time.monotonic() - (1 + hotel.REPLICA_STICKY_SECONDS + 1)
+    replicated.connect(readonly=True)
+    assert db.configs[-1]["host"] == "replica-1"
+
+
+def test_fan_out_threads_share_the_replica_state(replicated, db):
+    replicated.properties["ANNEX"]["replicas"] = [{"host": "replica-2"}]
+    barrier = threading.Barrier(8)
+
+    def read(code):
+        barrier.wait()
+        for _ in range(50):
+            conn = replicated.connect(code, readonly=True)
+            conn.close()
+            replicated._note_write(code)
+
+    threads = [threading.Thread(target=read, args=(code,)) for code in ["LITHO", "ANNEX"] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert set(replicated.replica_state) == {("LITHO", 0), ("ANNEX", 0)}
+    assert replicated.replica_turn == {"LITHO": 200, "ANNEX": 200}
@@ -0,0 +1,67 @@
+import random
+
+
+def overlaps(plan, bookings):
+    by_unit = {}
+    for res_id, start, end, _ in bookings:
+        if plan.get(res_id) is not None:
+            by_unit.setdefault(plan[res_id], []).append((start, end))
+    return [(unit_id, a, b) for unit_id, stays in by_unit.items()
+            for a, b in zip(sorted(stays), sorted(stays)[1:]) if b[0] < a[1]]
+
+
+def test_upcoming_stays_keep_their_unit_without_a_repack(core):
+    bookings = [(10, 101, 120, 2), (11, 107, 110, 1), (12, 105, 108, None)]
+    assert core.plan_room_assignments([1, 2], bookings, today=100) == {10: 2, 11: 1, 12: None}
+
+
+def test_repack_moves_only_stays_that_have_not_started(core):
+    bookings = [(1, 98, 103, 2), (2, 103, 105, 1), (3, 101, 103, None)]
+    plan = core.plan_room_assignments([1, 2], bookings, today=100, allow_moves=True)
+    assert plan[1] == 2
+    # back to back behind the in-house guest rather than alone on unit 1
+    assert plan[2] == 2 and plan[3] == 1
+
+
+def test_conflicting_assignments_are_placed_afresh(core):
+    bookings = [(1, 10, 15, 1), (2, 12, 14, 1)]
+    assert core.plan_room_assignments([1, 2], bookings, today=0) == {1: 1, 2: 2}
+
+
+def test_placement_avoids_stranding_a_single_night(core):
+    # unit 1 frees on day 9, unit 2 on day 10; a stay from day 10 should not leave day 9 empty
+    bookings = [(1, 5, 9, 1), (2, 5, 10, 2), (3, 10, 12, None)]
+    assert core.plan_room_assignments([1, 2], bookings, today=0)[3] == 2
+
+
+def test_place_unassigned_moves_nobody(core):
+    bookings = [(1, 10, 20, 1), (2, 12, 14, None), (3, 15, 18, 2), (4, 11, 13, None)]
+    updates = core.place_unassigned_stays([1, 2], bookings)
+    # 4 checks in first and takes unit 2; 2 then overlaps both units
+    assert updates == [(2, 4)]
+    assert core.place_unassigned_stays([], bookings) == []
+
+
+def test_large_schedules_pack_without_overlaps(core):
+    rng = random.Random(7)
+    units = list(range(1, 41))
+    bookings = []
+    for res_id in range(2000):
+        start = rng.randint(0, 700)
+        bookings.append((res_id, start, start + rng.randint(1, 7), rng.choice(units + [None] * 40)))
+    plan = core.plan_room_assignments(units, bookings, today=350, allow_moves=True)
+    assert overlaps(plan, bookings) == []
+    updates = core.place_unassigned_stays(units, bookings)
+    final = {res_id: unit_id for res_id, _, _, unit_id in bookings}
+    final.update((res_id, unit_id) for unit_id, res_id in updates)
+    assert overlaps(final, bookings) == []
+    assert sum(unit_id is None for unit_id in final.values()) < sum(b[3] is None for b in bookings)
+
+
+def test_unit_numbers_stay_unique_past_a_hundred(app, db):
+    db.on(r"WHERE NOT EXISTS \(SELECT 1 FROM room_units", [(1, 120), (11, 5)])
+    assert app._ensure_room_units(db.connect().cursor()) == 125
+    [(_, numbers)] = db.statements(r"^INSERT INTO room_units")
+    names = [number for _, number in numbers]
+    assert len(set(names)) == 125
+    assert names[0] == "1-001" and "1-110" in names and "11-001" in names
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+
+def test_migrations_are_numbered_in_order(hotel):
+    versions = [version for version, _, _ in hotel.SCHEMA_MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+def test_orphan_rows_are_cleared_before_foreign_keys(hotel):
+    _, _, statements = hotel.SCHEMA_MIGRATIONS[1]
+    first_fk = next(i for i, stmt in enumerate(statements) if "FOREIGN KEY" in stmt)
+    cleanups = [i for i, stmt in enumerate(statements) if stmt.lstrip().startswith("UPDATE reservations")]
+    assert len(cleanups) == 2
+    assert all(i < first_fk for i in cleanups)
+    assert any("SET r.guest_id = NULL" in statements[i] for i in cleanups)
+    assert any("SET r.room_id = NULL" in statements[i] for i in cleanups)
+
+
+def test_ensure_schema_applies_pending_migrations(app, db, hotel):
+    db.on(r"^SELECT version FROM schema_migrations", [(v,) for v, _, _ in hotel.SCHEMA_MIGRATIONS[:-1]])
+    ok, err = app.ensure_schema()
+    assert (ok, err) == (True, None)
+    recorded = db.statements(r"^INSERT INTO schema_migrations")
+    assert [params[0] for _, params in recorded] == [hotel.SCHEMA_MIGRATIONS[-1][0]]
+    assert db.log[0][0] == "CREATE DATABASE IF NOT EXISTS `litho`"
+    assert "database" not in db.configs[0]
+
+
+def test_ensure_schema_skips_ddl_that_is_already_in_place(app, db, hotel):
+    db.on(r"^SELECT version FROM schema_migrations", [])
+    db.on(r"ADD INDEX idx_res_guest", hotel.mysql.connector.Error(msg="Duplicate key name", errno=1061))
+    ok, err = app.ensure_schema()
+    assert ok, err
+    assert len(db.statements(r"^INSERT INTO schema_migrations")) == len(hotel.SCHEMA_MIGRATIONS)
+
+
+def test_ensure_schema_stops_at_a_failing_migration(app, db, hotel):
+    db.on(r"^SELECT version FROM schema_migrations", [(1,)])
+    db.on(r"ADD CONSTRAINT fk_res_room", hotel.mysql.connector.Error(msg="Cannot add foreign key", errno=1452))
+    ok, err = app.ensure_schema()
+    assert not ok
+    assert "Migration failed" in err
+    assert db.statements(r"^INSERT INTO schema_migrations") == []
+    assert db.rollbacks == 1
+
+
+def test_plan_problems_flags_table_and_index_scans(hotel):
+    plan_problems = hotel.plan_problems
+    plan = [
+        {'table': 'r', 'type': 'ALL', 'rows': 90000, 'key': None, 'Extra': 'Using where'},
+        {'table': 'g', 'type': 'index', 'rows': 5000, 'key': 'idx_guests_name_phone', 'Extra': ''},
+        {'table': 'rm', 'type': 'ALL', 'rows': 4, 'key': None, 'Extra': ''},
+    ]
+    problems = plan_problems("search", plan, {"r", "g"})
+    assert len(problems) == 2
+    assert "full scan on 'r'" in problems[0]
+    assert "full index scan on 'g'" in problems[1]
+    assert plan_problems("search", plan[1:], {"r", "g"}, index_scan_aliases={"g"}) == []
+
+
+def test_plan_problems_flags_filesort_unless_allowed(hotel):
+    plan_problems = hotel.plan_problems
+    plan = [{'table': 'r', 'type': 'ALL', 'rows': 10, 'Extra': 'Using filesort'}]
+    assert plan_problems("listing", plan, set()) == ["listing: filesort on 'r' (Using filesort)"]
+    assert plan_problems("listing", plan, set(), allow_filesort=True) == []
+
+
+def test_check_hot_queries_passes_the_intended_plans(hotel, db):
+    good = {
+        "listing": [{'table': 'r', 'type': 'index', 'key': 'idx_res_listing', 'Extra': 'Backward index scan'},
+                    {'table': 'g', 'type': 'eq_ref', 'key': 'PRIMARY', 'Extra': ''}],
+        "search": [{'table': 'g', 'type': 'index', 'key': 'idx_guests_name_phone', 'Extra': 'Using where; Using index'},
+                   {'table': 'r', 'type': 'ref', 'key': 'idx_res_guest', 'Extra': 'Using filesort'}],
+    }
+    db.on(r"^EXPLAIN .* LIMIT %s$", good["listing"])
+    db.on(r"^EXPLAIN .* LIKE %s", good["search"])
+    assert hotel.check_hot_queries(db.connect().cursor(dictionary=True)) == []
+
+    db.on(r"^EXPLAIN .* LIKE %s", [{'table': 'r', 'type': 'ALL', 'rows': 1, 'Extra': ''}])
+    assert hotel.check_hot_queries(db.connect().cursor(dictionary=True)) == ["search: full scan on 'r' (rows≈1)"]
+
+
+def test_check_indexes_cli_exit_status(hotel, db, monkeypatch, capsys):
+    monkeypatch.setattr(hotel, "PROPERTIES", {"LITHO": {"name": "LitHo", "db_config": {"database": "litho"}}})
+    db.on(r"^EXPLAIN", [{'table': 'r', 'type': 'ALL', 'rows': 1, 'Extra': ''}])
+    assert hotel.check_indexes_cli() == 1
+    db.on(r"^EXPLAIN", [])
+    assert hotel.check_indexes_cli() == 0
+    db.connect_error = hotel.mysql.connector.Error(msg="down")
+    assert hotel.check_indexes_cli() == 2
+    assert hotel.check_indexes_cli(["NOPE"]) == 2
+    assert "LITHO: all hot queries use their indexes" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not os.environ.get("HOTEL_TEST_DB"), reason="set HOTEL_TEST_DB=1 to EXPLAIN against the configured MySQL")
+def test_hot_query_plans_on_a_real_database(hotel):
+    assert hotel.check_indexes_cli() == 0
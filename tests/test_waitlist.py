@@ -0,0 +1,39 @@
+def test_fill_books_the_queue_head_for_each_freed_room(app, db, core):
+    queues = {10: [(1, 100, 2, "", 5000), (2, 101, 1, "Spa", 2500)], 11: []}
+    db.on(r"FROM waitlist WHERE room_id", lambda params: queues[params[0]][:params[1]])
+    cursor = db.connect().cursor()
+    filled = app._fill_from_waitlist(cursor, {10: 2, 11: 1})
+
+    assert [entry for entry, _ in filled] == [1, 2]
+    assert db.statements(r"FROM waitlist WHERE room_id")[0][1] == (10, 2)
+    inserts = db.statements(r"^INSERT INTO reservations")
+    assert [params[0] for _, params in inserts] == [100, 101]
+    assert all(params[-1] == core.WAITLIST_PAYMENT for _, params in inserts)
+    booked = db.statements(r"^UPDATE waitlist SET status = 'booked'")
+    assert [params for _, params in booked] == [(res_id, entry) for entry, res_id in filled]
+    # one availability decrement per room type that took bookings
+    assert [params for _, params in db.statements(r"^UPDATE rooms SET available = available -")] == [(2, 10)]
+
+
+def test_queue_is_read_by_priority_then_age_under_lock(core):
+    sql = " ".join(core.WAITLIST_NEXT_SQL.split())
+    assert "ORDER BY priority DESC, entry_id LIMIT %s FOR UPDATE" in sql
+
+
+def test_cancellation_hands_freed_units_to_the_waitlist(app, db):
+    db.on(r"^SELECT reservation_id, room_id FROM reservations WHERE reservation_id IN", [(1, 10), (2, 10)])
+    db.on(r"FROM waitlist WHERE room_id", [(5, 100, 2, "", 5000)])
+    assert app.cancel_reservations([1, 2]) == 2
+    assert db.statements(r"FROM waitlist WHERE room_id")[0][1] == (10, 2)
+    assert [entry for entry, _ in app.last_waitlist_filled] == [5]
+    # the waitlist booking lands in the cancelling transaction
+    booked_at = db.log.index(db.statements(r"^UPDATE waitlist SET status = 'booked'")[0])
+    assert booked_at < db.log.index(("COMMIT", ()))
+    assert db.commits == 1
+
+
+def test_remove_only_touches_waiting_entries(app, db):
+    assert app.remove_waitlist_entries(["3", 4], property_code="ANNEX") is True
+    sql, params = db.statements(r"^UPDATE waitlist SET status = 'cancelled'")[0]
+    assert "status = 'waiting'" in sql and params == (3, 4)
+    assert db.configs[-1]["database"] == "annex"